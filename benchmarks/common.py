@@ -0,0 +1,70 @@
+# burudani_backend/benchmarks/common.py
+#
+# Shared setup for the benchmark scripts: boots the app against a throwaway
+# SQLite database, seeds a synthetic catalog and logs in the admin user.
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp(prefix='burudani-bench-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}")
+# Benchmarks log in far more often than a client would; keep the auth throttle out of the way
+for _rule in ('LOGIN_RATE_LIMIT_PER_IP', 'LOGIN_RATE_LIMIT_PER_EMAIL', 'REGISTER_RATE_LIMIT_PER_IP'):
+    os.environ.setdefault(_rule, '1000000/60')
+
+def quiet():
+    """Swallow the debug prints emitted by the app while benchmarking"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+with quiet():
+    from src.main import app
+    from src.models.user import db
+    from src.models.content import Content, Stream, Category
+
+def seed_catalog(size=200, categories=5):
+    """Grow the catalog to `size` content rows, each with one category and one stream"""
+    with app.app_context():
+        existing = Content.query.count()
+        if existing >= size:
+            return
+        cats = Category.query.filter(Category.name.like('Bench Category %')).order_by(Category.name).all()
+        if not cats:
+            cats = [Category(name=f'Bench Category {i}', description='Benchmark category') for i in range(categories)]
+            db.session.add_all(cats)
+        for i in range(existing, size):
+            content = Content(
+                title=f'Benchmark Title {i}',
+                description=f'Synthetic description for benchmark title number {i}',
+                type=('movie', 'live_tv', 'sport')[i % 3],
+                thumbnail_url=f'https://cdn.example.com/thumbs/{i}.jpg',
+                is_premium=i % 7 == 0,
+                is_featured=i % 10 == 0,
+                is_trending=i % 11 == 0,
+            )
+            content.categories = [cats[i % len(cats)]]
+            content.streams = [Stream(
+                stream_url=f'https://live.example.com/channel{i}/index.m3u8',
+                stream_type='hls',
+                channel_id=f'channel-{i}',
+            )]
+            db.session.add(content)
+        db.session.commit()
+
+def login(client, email='admin@burudani.com', password='admin123'):
+    """Return Authorization headers for the given credentials"""
+    with quiet():
+        response = client.post('/api/login', json={'email': email, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def timed(fn, repeat=1):
+    """Run fn `repeat` times and return (last result, mean seconds per call)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
@@ -0,0 +1,113 @@
+# burudani_backend/benchmarks/drm_spike.py
+#
+# DRM token throughput for one worker during a live-sports start-time
+# spike: every viewer asks for a token for the same channel within a few
+# seconds, and players retry. Compares the old per-request SHA-256 + dict
+# build with the signed-token issuer (first request and retries), then
+# drives POST /api/stream/drm-token and /api/stream/drm-token/verify. Also
+# checks that a viewer without a subscription gets no token for a premium
+# channel and that unknown channels are refused.
+#
+#   python benchmarks/drm_spike.py [--viewers 2000] [--retries 3]
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from common import app, db, quiet
+from src.models.content import Content, Stream
+from src.models.user import User
+from src.services.drm import DrmTokenIssuer
+
+CHANNEL = 'channel-derby'
+PREMIUM_CHANNEL = 'channel-derby-ppv'
+STREAM_URL = 'https://live.example.com/derby/index.m3u8'
+
+def legacy_token(stream_url, channel_id, user_id):
+    """The previous generate_mock_drm_token(), for comparison"""
+    token_data = f"{stream_url}:{channel_id}:{user_id}:{int(time.time() // 300)}"
+    token_hash = hashlib.sha256(token_data.encode()).hexdigest()
+    return {
+        'token': f"nv-auth-{token_hash[:32]}",
+        'expires_at': int(time.time()) + 3600,
+        'license_url': 'https://azy4sj9b.anycast.nagra.com/TENANTID/wvls/contentlicenseservice/v1/licenses',
+        'headers': {
+            'nv-authorizations': f"nv-auth-{token_hash[:32]}",
+            'Referer': 'app.burudanimax.com',
+            'User-Agent': 'BurudaniApp/1.0.0'
+        }
+    }
+
+def rate(fn, calls):
+    start = time.perf_counter()
+    fn()
+    return calls / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--viewers', type=int, default=2000)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--http-viewers', type=int, default=200)
+    args = parser.parse_args()
+
+    viewers = [str(uuid.uuid4()) for _ in range(args.viewers)]
+    calls = args.viewers * args.retries
+    issuer = DrmTokenIssuer('bench-secret')
+    print(f'{args.viewers} viewers x {args.retries} requests for one channel')
+    print(f"  legacy sha256 + dict      {rate(lambda: [legacy_token(STREAM_URL, CHANNEL, v) for _ in range(args.retries) for v in viewers], calls):>10.0f} tokens/s")
+    print(f"  signed, first request     {rate(lambda: [issuer.issue(v, CHANNEL) for v in viewers], args.viewers):>10.0f} tokens/s")
+    print(f"  signed, retries (cached)  {rate(lambda: [issuer.issue(v, CHANNEL) for _ in range(args.retries) for v in viewers], calls):>10.0f} tokens/s")
+    tokens = [issuer.issue(v, CHANNEL)['token'] for v in viewers]
+    print(f"  verify                    {rate(lambda: [issuer.verify(t) for t in tokens], len(tokens)):>10.0f} tokens/s")
+
+    with app.app_context():
+        for channel_id, is_premium in ((CHANNEL, False), (PREMIUM_CHANNEL, True)):
+            if not Stream.query.filter_by(channel_id=channel_id).first():
+                db.session.add(Content(title=channel_id, type='sport', is_premium=is_premium, streams=[
+                    Stream(stream_url=STREAM_URL, stream_type='hls', channel_id=channel_id)
+                ]))
+        users = [User(email=f'bench-viewer-{i}@burudani.com') for i in range(args.http_viewers)]
+        existing = {u.email: u for u in User.query.filter(User.email.like('bench-viewer-%'))}
+        users = [existing.get(u.email, u) for u in users]
+        db.session.add_all(users)
+        db.session.commit()
+        headers = [{'Authorization': f'Bearer {create_access_token(identity=u.id)}'} for u in users]
+
+    client = app.test_client()
+    body = {'stream_url': STREAM_URL, 'channel_id': CHANNEL}
+    issued = []
+
+    def spike():
+        for _ in range(args.retries):
+            for h in headers:
+                response = client.post('/api/stream/drm-token', headers=h, json=body)
+                assert response.status_code == 200, response.get_json()
+                issued.append(response.get_json()['data']['token'])
+
+    def verify():
+        for token in issued[:len(headers)]:
+            assert client.post('/api/stream/drm-token/verify', json={'token': token}).status_code == 200
+
+    with quiet():
+        http_rate = rate(spike, len(headers) * args.retries)
+        verify_rate = rate(verify, len(headers))
+        premium = client.post('/api/stream/drm-token', headers=headers[0], json={'channel_id': PREMIUM_CHANNEL})
+        unknown = client.post('/api/stream/drm-token', headers=headers[0], json={'channel_id': 'channel-missing'})
+    assert premium.status_code == 403, premium.get_json()
+    assert unknown.status_code == 404, unknown.get_json()
+    print(f'HTTP, {len(headers)} viewers x {args.retries}: drm-token {http_rate:.0f} req/s, verify {verify_rate:.0f} req/s')
+    print('premium channel without a subscription: 403; unknown channel: 404')
+    expires_at = app.extensions['drm_tokens'].verify(issued[0])[2]
+    window = app.extensions['drm_tokens'].window
+    print(f'token expires {expires_at - time.time():.0f}s from now (window end + grace); '
+          f'aligned to window boundary: {(expires_at - app.extensions["drm_tokens"].grace) % window == 0}')
+    print(f"issuer stats: {app.extensions['drm_tokens'].stats()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# burudani_backend/benchmarks/epg_grid.py
+#
+# Preloading a 50-channel live-TV grid: one /api/stream/link plus one
+# /api/stream/drm-token call per channel, against a single POST
+# /api/stream/links for the whole grid. Reports requests, SQL statements
+# and total latency with the stream index cold and warm.
+#
+#   python benchmarks/epg_grid.py [--channels 50]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import app, seed_catalog, login, quiet
+from src.models.content import Stream
+from src.services.query_counter import QueryCounter
+from src.services.stream_index import stream_index
+
+def per_channel(client, headers, channels):
+    for channel_id in channels:
+        link = client.post('/api/stream/link', headers=headers, json={'channel_id': channel_id})
+        assert link.status_code == 200, link.get_json()
+        token = client.post('/api/stream/drm-token', headers=headers, json={
+            'stream_url': link.get_json()['streamURLAndroid'], 'channel_id': channel_id,
+        })
+        assert token.status_code == 200
+    return len(channels) * 2
+
+def batch(client, headers, channels):
+    response = client.post('/api/stream/links', headers=headers, json={'channel_ids': channels})
+    links = response.get_json()['links']
+    assert response.status_code == 200 and len(links) == len(channels)
+    assert all('drm' in link for link in links), [link for link in links if 'drm' not in link][:1]
+    return 1
+
+def measure(fn, client, headers, channels):
+    with QueryCounter() as counter, quiet():
+        start = time.perf_counter()
+        requests = fn(client, headers, channels)
+        elapsed = (time.perf_counter() - start) * 1000
+    return requests, counter.count, elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--channels', type=int, default=50)
+    args = parser.parse_args()
+
+    seed_catalog(max(args.channels, 200))
+    with app.app_context():
+        channels = [s.channel_id for s in Stream.query.filter(Stream.channel_id.isnot(None)).limit(args.channels)]
+    client = app.test_client()
+    headers = login(client)
+
+    print(f'{len(channels)}-channel grid preload')
+    print(f"{'approach':28} {'index':>5} {'requests':>9} {'queries':>8} {'total ms':>9}")
+    for label, fn in (('link + drm-token per channel', per_channel), ('POST /stream/links', batch)):
+        for state in ('cold', 'warm'):
+            if state == 'cold':
+                stream_index.evict(everything=True)
+            requests, queries, elapsed = measure(fn, client, headers, channels)
+            print(f'{label:28} {state:>5} {requests:>9} {queries:>8} {elapsed:>9.1f}')
+
+if __name__ == '__main__':
+    main()
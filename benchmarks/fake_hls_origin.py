@@ -0,0 +1,119 @@
+# burudani_backend/benchmarks/fake_hls_origin.py
+#
+# Local stand-in for a live-TV HLS origin. Serves a master playlist at
+# /<channel>/index.m3u8 and a live media playlist (a sliding window of
+# segments) at /<channel>/<rendition>/playlist.m3u8 for any channel, except
+# channels marked down (404) or broken (500); every response can be delayed
+# to mimic a slow CDN edge. Trickle channels serve a long master playlist in
+# small, separately flushed chunks, as a busy edge does; moved channels
+# answer 302 to the same path on another origin.
+#
+#   python benchmarks/fake_hls_origin.py [--port 8766] [--delay 0.2] [--down channel-3,channel-7]
+
+import argparse
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+VARIANTS = ((800000, '640x360'), (1400000, '842x480'), (2800000, '1280x720'), (5000000, '1920x1080'))
+SEGMENT_SECONDS = 6
+WINDOW_SEGMENTS = 5
+# 60 renditions (several KB of playlist) for trickle channels
+LONG_LADDER = tuple((200000 + 100000 * i, f'{320 + 16 * i}x{180 + 9 * i}') for i in range(60))
+TRICKLE_CHUNK = 512
+
+def master_playlist(channel, variants=VARIANTS):
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+    for bandwidth, resolution in variants:
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={resolution}')
+        lines.append(f'{resolution}/playlist.m3u8')
+    return '\n'.join(lines) + '\n'
+
+def media_playlist():
+    sequence = int(time.time() // SEGMENT_SECONDS)
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}',
+             f'#EXT-X-MEDIA-SEQUENCE:{sequence}']
+    for number in range(sequence, sequence + WINDOW_SEGMENTS):
+        lines.append(f'#EXTINF:{SEGMENT_SECONDS}.000,')
+        lines.append(f'segment{number}.ts')
+    return '\n'.join(lines) + '\n'
+
+class FakeHlsServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # a prober opens many connections at once
+
+class FakeHlsHandler(BaseHTTPRequestHandler):
+    def _send(self, status, body, content_type='application/vnd.apple.mpegurl', chunk=None):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            if chunk:
+                self.wfile.flush()
+                for start in range(0, len(body), chunk):
+                    self.wfile.write(body[start:start + chunk])
+                    self.wfile.flush()
+                    time.sleep(0.002)
+            else:
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the prober timed out before we answered
+
+    def do_GET(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        channel = parts[0]
+        self.server.requests[channel] += 1
+        self.server.paths[urlparse(self.path).path] += 1
+        time.sleep(self.server.slow.get(channel, self.server.delay))
+        if channel in self.server.moved:
+            self.send_response(302)
+            self.send_header('Location', self.server.moved[channel] + self.path)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if channel in self.server.down:
+            return self._send(404, 'Not found', 'text/plain')
+        if channel in self.server.broken:
+            return self._send(500, 'Origin error', 'text/plain')
+        if parts[-1] == 'index.m3u8' and channel in self.server.trickle:
+            return self._send(200, master_playlist(channel, LONG_LADDER), chunk=TRICKLE_CHUNK)
+        if parts[-1] == 'index.m3u8':
+            return self._send(200, master_playlist(channel))
+        if parts[-1] == 'playlist.m3u8':
+            return self._send(200, media_playlist())
+        self._send(404, 'Not found', 'text/plain')
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_hls_origin(delay=0.0, port=0, down=(), broken=(), slow=None, trickle=(), moved=None):
+    """Start the fake origin in a daemon thread; returns (server, base_url)"""
+    server = FakeHlsServer(('127.0.0.1', port), FakeHlsHandler)
+    server.delay = delay
+    server.down = set(down)
+    server.broken = set(broken)
+    server.slow = dict(slow or {})  # channel -> delay overriding `delay`
+    server.trickle = set(trickle)
+    server.moved = dict(moved or {})  # channel -> base URL it redirects to
+    server.requests = Counter()  # channel -> GETs
+    server.paths = Counter()  # path -> GETs
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--delay', type=float, default=0.0)
+    parser.add_argument('--down', default='')
+    args = parser.parse_args()
+    server, url = start_fake_hls_origin(args.delay, args.port, [c for c in args.down.split(',') if c])
+    print(f'Fake HLS origin listening on {url} (delay {args.delay}s), e.g. {url}/channel-1/index.m3u8')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,79 @@
+# burudani_backend/benchmarks/fake_redis.py
+#
+# In-process stand-in for the handful of Redis commands the rate limiter
+# uses (INCR, EXPIRE, GET, pipelines), so the shared backend can be
+# exercised without a Redis server.
+
+import threading
+import time
+
+class FakeRedis:
+    def __init__(self, clock=time.time):
+        self._data = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.commands = 0
+        self.round_trips = 0
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self._clock():
+            del self._data[key]
+            return None
+        return entry
+
+    def _incr(self, key):
+        entry = self._live(key)
+        value = int(entry[0]) + 1 if entry else 1
+        self._data[key] = (str(value).encode(), entry[1] if entry else None)
+        return value
+
+    def _expire(self, key, seconds):
+        entry = self._live(key)
+        if entry is None:
+            return False
+        self._data[key] = (entry[0], self._clock() + seconds)
+        return True
+
+    def _get(self, key):
+        entry = self._live(key)
+        return entry[0] if entry else None
+
+    def _run(self, commands):
+        with self._lock:
+            self.commands += len(commands)
+            self.round_trips += 1
+            return [getattr(self, f'_{name}')(*args) for name, args in commands]
+
+    def incr(self, key):
+        return self._run([('incr', (key,))])[0]
+
+    def expire(self, key, seconds):
+        return self._run([('expire', (key, seconds))])[0]
+
+    def get(self, key):
+        return self._run([('get', (key,))])[0]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self._commands = []
+
+    def incr(self, key):
+        self._commands.append(('incr', (key,)))
+        return self
+
+    def expire(self, key, seconds):
+        self._commands.append(('expire', (key, seconds)))
+        return self
+
+    def get(self, key):
+        self._commands.append(('get', (key,)))
+        return self
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        return self.client._run(commands)
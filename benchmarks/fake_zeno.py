@@ -0,0 +1,102 @@
+# burudani_backend/benchmarks/fake_zeno.py
+#
+# Local stand-in for the ZenoPay API. Point the app at it with
+# ZENO_BASE_URL=http://127.0.0.1:<port>.
+#
+#   python benchmarks/fake_zeno.py [--port 8765] [--delay 2.0] [--status COMPLETED]
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+class FakeZenoHandler(BaseHTTPRequestHandler):
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (read timeout) before we answered
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(self.server.delay)
+        self.server.calls['initiate'] += 1
+        if urlparse(self.path).path != '/api/payments/mobile_money_tanzania':
+            return self._send(404, {'status': 'error', 'message': 'Not found'})
+        self.server.orders[payload.get('order_id')] = 'PENDING'
+        self._send(200, {
+            'status': 'success',
+            'resultcode': '000',
+            'message': 'Request in progress. You will receive a callback shortly',
+            'order_id': payload.get('order_id'),
+        })
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        time.sleep(self.server.delay)
+        self.server.calls['status'] += 1
+        if url.path != '/api/payments/order-status':
+            return self._send(404, {'status': 'error', 'message': 'Not found'})
+        order_id = parse_qs(url.query).get('order_id', [None])[0]
+        self.server.polls[order_id] += 1
+        if order_id in self.server.garbled:
+            # A proxy error page in front of the gateway, still with a 200
+            body = b'<html><body>Bad gateway</body></html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            return self.wfile.write(body)
+        status = self.server.orders.get(order_id, self.server.default_status)
+        self._send(200, {
+            'reference': f'ref-{order_id}',
+            'resultcode': '000',
+            'result': 'SUCCESS',
+            'message': 'Order fetch successful',
+            'data': [{
+                'order_id': order_id,
+                'payment_status': status,
+                'transid': f'tx-{order_id}',
+                'channel': 'MPESA-TZ',
+                'reference': f'ref-{order_id}',
+            }],
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_zeno(delay=0.0, port=0, default_status='COMPLETED'):
+    """Start the fake gateway in a daemon thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeZenoHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.default_status = default_status
+    server.orders = {}
+    server.garbled = set()  # order_ids answered with an HTML page instead of JSON
+    server.calls = {'initiate': 0, 'status': 0}
+    server.polls = Counter()  # order_id -> order-status requests
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0)
+    parser.add_argument('--status', default='COMPLETED')
+    args = parser.parse_args()
+    server, url = start_fake_zeno(args.delay, args.port, args.status)
+    print(f'Fake Zeno listening on {url} (delay {args.delay}s)')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
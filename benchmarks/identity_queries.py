@@ -0,0 +1,79 @@
+# burudani_backend/benchmarks/identity_queries.py
+#
+# Counts users-table queries on authenticated requests. After the first
+# request warms the identity cache, profile/payment/history requests should
+# not touch the users table at all, even while other users register and log
+# in; a profile update must be visible on the very next request, and a user
+# looked up before their row was committed must not stay "missing".
+#
+#   python benchmarks/identity_queries.py [--requests 50]
+
+import argparse
+import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import decode_token
+from common import app, db, login, quiet
+from src.models.user import User
+from src.services.identity import load_user
+from src.services.query_counter import QueryCounter
+
+ENDPOINTS = ['/api/user/profile', '/api/user/history', '/api/payments/user']
+
+def user_queries(counter):
+    return sum(1 for sql in counter.statements if 'FROM users' in sql)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    headers = login(client)
+    with app.app_context():
+        claims = decode_token(headers['Authorization'].split()[1])
+    print(f"access token claims: role={claims['role']} premium={claims['premium']} cv={claims['cv']}")
+
+    for url in ENDPOINTS:
+        with QueryCounter() as counter, quiet():
+            for _ in range(args.requests):
+                response = client.get(url, headers=headers)
+                assert response.status_code == 200, (url, response.status_code)
+        print(f'{url:22} {args.requests} requests: {user_queries(counter)} users-table queries, {counter.count} total')
+
+    # Other users' rows changing must not evict this user's cached identity
+    with quiet():
+        for i in range(5):
+            email = f'bench-{uuid.uuid4().hex[:8]}@burudani.com'
+            client.post('/api/register', json={'username': email.split('@')[0], 'email': email,
+                                               'password': 'password123', 'full_name': 'Bench User'})
+            login(client, email, 'password123')
+    with QueryCounter() as counter, quiet():
+        for _ in range(args.requests):
+            assert client.get('/api/user/profile', headers=headers).status_code == 200
+    print(f'after 5 other users register and log in: {user_queries(counter)} users-table queries in {args.requests} requests')
+    assert user_queries(counter) == 0
+
+    with quiet():
+        client.put('/api/user/profile', headers=headers, json={'phone_number': '255700000001'})
+    with QueryCounter() as counter, quiet():
+        profile = client.get('/api/user/profile', headers=headers).get_json()
+    print(f"after profile update: phone_number={profile['phone_number']}, {user_queries(counter)} users-table query to reload")
+    assert profile['phone_number'] == '255700000001'
+
+    # A lookup racing the user's own commit (or a lagging replica) finds nothing; that is not cached
+    user_id = str(uuid.uuid4())
+    with app.test_request_context():
+        missing = load_user(user_id)
+        # Committed without this worker's identity bump, as when the bump landed before a replica caught up
+        db.session.execute(User.__table__.insert().values(id=user_id, email=f'bench-{user_id[:8]}@burudani.com'))
+        db.session.commit()
+        found = load_user(user_id)
+    print(f'user looked up before its commit: {missing}, right after: {found and found.email}')
+    assert missing is None and found is not None
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+# burudani_backend/benchmarks/json_encoding.py
+#
+# Encoding time of a 100-item content page (full detail view) under each
+# JSON provider.
+#
+#   python benchmarks/json_encoding.py
+
+from common import app, seed_catalog, timed
+from src.services.catalog import content_query
+from src.services.json_provider import StdlibJSONProvider, OrjsonJSONProvider, orjson
+
+PAGE_SIZE = 100
+REPEAT = 200
+
+def run():
+    seed_catalog(PAGE_SIZE)
+    with app.app_context():
+        page = {'content': [content.to_dict() for content in content_query().limit(PAGE_SIZE)]}
+
+    providers = [StdlibJSONProvider(app)]
+    if orjson is not None:
+        providers.append(OrjsonJSONProvider(app))
+    else:
+        print('orjson is not installed; only the stdlib provider is measured')
+
+    baseline = None
+    for provider in providers:
+        with app.test_request_context():
+            body, seconds = timed(lambda: provider.response(page).get_data(), repeat=REPEAT)
+        baseline = baseline or seconds
+        print(f'{type(provider).__name__:20} {seconds * 1e6:9.1f} us/page {len(body):>8} bytes  {baseline / seconds:5.1f}x')
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,84 @@
+# burudani_backend/benchmarks/login_rate_limit.py
+#
+# A credential-stuffing burst against POST /api/login: wrong passwords for
+# one real account, first from a single IP, then rotating across many IPs.
+# Reports how many attempts reached bcrypt and the wall time of the burst
+# with the throttle off, with the per-worker memory backend and with the
+# shared backend (against the in-process FakeRedis).
+#
+#   python benchmarks/login_rate_limit.py [--attempts 120] [--rounds 10]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import app, db, quiet
+from fake_redis import FakeRedis
+from src.models.user import User
+from src.services import passwords
+from src.services.rate_limit import DEFAULT_RULES, create_rate_limiter
+
+VICTIM = 'bench-victim@burudani.com'
+ROUTER = '10.0.0.1'
+RULES = {'login_ip': '30/60', 'login_email': '10/300', 'register_ip': '10/3600'}
+
+def burst(attempts):
+    """Half the attempts from one IP, half from a rotating pool of IPs; returns status counts"""
+    client = app.test_client()
+    statuses = {}
+    with quiet():
+        for i in range(attempts):
+            ip = '203.0.113.7' if i < attempts // 2 else f'198.51.100.{i % 250}'
+            # Every request arrives through the same router, as in production
+            response = client.post('/api/login', json={'email': VICTIM, 'password': f'guess-{i}'},
+                                   headers={'X-Forwarded-For': ip}, environ_base={'REMOTE_ADDR': ROUTER})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return statuses
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--attempts', type=int, default=120)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    original_hasher = passwords.hasher
+    original_limiter = app.extensions['rate_limiter']
+    passwords.hasher = passwords.PasswordHasher(rounds=args.rounds, max_workers=1)
+    try:
+        with app.app_context():
+            user = User.query.filter_by(email=VICTIM).first() or User(email=VICTIM)
+            user.set_password('correct-horse')
+            db.session.add(user)
+            db.session.commit()
+
+        print(f'{args.attempts} wrong-password attempts on one account, bcrypt cost {args.rounds}')
+        print(f'rules: {RULES}')
+        print(f"{'limiter':<10} {'401':>5} {'429':>5} {'bcrypt':>7} {'seconds':>8} {'round trips':>12}")
+        fake = FakeRedis()
+        setups = [
+            ('off', create_rate_limiter('memory', rules={name: '1000000/60' for name in DEFAULT_RULES})),
+            ('memory', create_rate_limiter('memory', rules=RULES)),
+            ('redis', create_rate_limiter('redis', client=fake, rules=RULES)),
+        ]
+        for label, limiter in setups:
+            app.extensions['rate_limiter'] = limiter
+            verifies = passwords.hasher.stats()['verifies']
+            start = time.perf_counter()
+            statuses = burst(args.attempts)
+            elapsed = time.perf_counter() - start
+            checks = passwords.hasher.stats()['verifies'] - verifies
+            trips = fake.round_trips if label == 'redis' else '-'
+            print(f'{label:<10} {statuses.get(401, 0):>5} {statuses.get(429, 0):>5} {checks:>7} {elapsed:>8.2f} {trips:>12}')
+            if label != 'off':
+                stats = limiter.stats()
+                assert stats['bcrypt_checks_avoided'] == statuses.get(429, 0), stats
+        print(f'metrics: {setups[-1][1].stats()}')
+    finally:
+        passwords.hasher = original_hasher
+        app.extensions['rate_limiter'] = original_limiter
+
+if __name__ == '__main__':
+    main()
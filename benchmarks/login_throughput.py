@@ -0,0 +1,94 @@
+# burudani_backend/benchmarks/login_throughput.py
+#
+# Logins/sec for one web worker at different bcrypt costs and hashing pool
+# sizes, driving POST /api/login from a gthread-sized set of client threads.
+# Also shows a legacy werkzeug (pbkdf2) hash being upgraded to bcrypt on the
+# first successful login.
+#
+#   python benchmarks/login_throughput.py [--logins 48] [--clients 8]
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from werkzeug.security import generate_password_hash
+from common import app, db, quiet
+from src.models.user import User
+from src.services import passwords
+
+PASSWORD = 'bench-password'
+
+def make_user(email, password_hash):
+    with app.app_context():
+        user = User.query.filter_by(email=email).first() or User(email=email)
+        user.password_hash = password_hash
+        db.session.add(user)
+        db.session.commit()
+
+def stored_hash(email):
+    with app.app_context():
+        return User.query.filter_by(email=email).first().password_hash
+
+def run_logins(email, logins, clients):
+    """Issue `logins` logins from `clients` threads; returns logins/sec"""
+    remaining = iter(range(logins))
+    lock = threading.Lock()
+    failures = []
+
+    def client_loop():
+        client = app.test_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            response = client.post('/api/login', json={'email': email, 'password': PASSWORD})
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    start = time.perf_counter()
+    with quiet():
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    if failures:
+        raise SystemExit(f'{len(failures)} logins failed: {set(failures)}')
+    return logins / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=48)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f'{os.cpu_count()} CPU(s), {args.clients} client threads, {args.logins} logins per run')
+    print(f"{'rounds':>6} {'pool':>4} {'logins/s':>9} {'ms/login':>9}")
+    email = 'bench-login@burudani.com'
+    original = passwords.hasher
+    try:
+        for rounds in (12, 10):
+            for threads in (1, 2, 4):
+                passwords.hasher = passwords.PasswordHasher(rounds=rounds, max_workers=threads)
+                make_user(email, passwords.hash_password(PASSWORD))
+                rate = run_logins(email, args.logins, args.clients)
+                print(f'{rounds:>6} {threads:>4} {rate:>9.1f} {1000 / rate:>9.1f}')
+
+        passwords.hasher = original
+        legacy_email = 'bench-legacy@burudani.com'
+        make_user(legacy_email, generate_password_hash(PASSWORD))
+        before = stored_hash(legacy_email)
+        run_logins(legacy_email, 1, 1)
+        after = stored_hash(legacy_email)
+        print(f'legacy hash before login: {before.split("$")[0]}, after: bcrypt cost {after.split("$")[2]}')
+        assert passwords.verify_password(PASSWORD, after) and not passwords.needs_rehash(after)
+    finally:
+        passwords.hasher = original
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# burudani_backend/benchmarks/manifest_proxy.py
+#
+# Load test for the HLS manifest proxy: a crowd of viewers tune in to the
+# same live channels and keep polling their media playlist, first straight
+# from a local fake origin and then through GET /api/stream/manifest.
+# Reports playlist requests, upstream (origin) requests and viewer-side
+# latency for both, and checks that each viewer's playlist carries their
+# own token, that expired tokens are only accepted on child playlists within
+# the leeway, and that a master redirected to another CDN host still serves
+# its child playlists.
+#
+#   python benchmarks/manifest_proxy.py [--viewers 100] [--channels 2] [--duration 6] [--poll 1.0]
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+os.environ.setdefault('STREAM_PROXY_ENABLED', '1')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from common import app, db, seed_catalog, login, quiet
+from fake_hls_origin import start_fake_hls_origin
+from src.models.content import Content, Stream
+
+def first_variant(playlist):
+    return next(line for line in playlist.splitlines() if line and not line.startswith('#'))
+
+def direct_viewer(master_url, deadline, poll, latencies):
+    session = requests.Session()
+    start = time.perf_counter()
+    master = session.get(master_url).text
+    latencies.append((time.perf_counter() - start) * 1000)
+    media_url = urljoin(master_url, first_variant(master))
+    while time.time() < deadline:
+        start = time.perf_counter()
+        assert session.get(media_url).status_code == 200
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(poll)
+
+def proxied_viewer(manifest_url, deadline, poll, latencies):
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.get(manifest_url)
+    latencies.append((time.perf_counter() - start) * 1000)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    media_url = urljoin(manifest_url, first_variant(response.get_data(as_text=True)))
+    while time.time() < deadline:
+        start = time.perf_counter()
+        response = client.get(media_url)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        time.sleep(poll)
+
+def crowd(viewer, urls, args):
+    """Run one thread per viewer until the deadline; returns request latencies in ms"""
+    latencies = []
+    deadline = time.time() + args.duration
+    threads = []
+    for i in range(args.viewers):
+        url = urls[i % len(urls)]  # viewer i watches channel i % channels
+        # Viewers tune in spread over one poll interval, as a real audience does
+        threads.append(threading.Timer(random.uniform(0, args.poll), viewer, (url, deadline, args.poll, latencies)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies)
+
+def report(label, latencies, origin_requests):
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    print(f'{label:<8} {len(latencies):>9} {origin_requests:>8} {statistics.median(latencies):>7.1f} {p95:>7.1f}')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--viewers', type=int, default=100)
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=6.0)
+    parser.add_argument('--poll', type=float, default=1.0)
+    parser.add_argument('--delay', type=float, default=0.05)
+    args = parser.parse_args()
+
+    seed_catalog(20)
+    server, origin = start_fake_hls_origin(args.delay)
+    with app.app_context():
+        streams = (Stream.query.join(Content).filter(Stream.channel_id.isnot(None), Content.is_premium.is_(False))
+                   .order_by(Stream.created_at).limit(args.channels).all())
+        for stream in streams:
+            stream.stream_url = f'{origin}/{stream.channel_id}/index.m3u8'
+        db.session.commit()
+        channels = [(stream.channel_id, stream.stream_url) for stream in streams]
+
+    # A logged-in player is handed the proxied URL by /stream/link
+    client = app.test_client()
+    with quiet():
+        link = client.post('/api/stream/link', headers=login(client), json={'channel_id': channels[0][0]}).get_json()
+    print(f"/stream/link manifest_url: {link['manifest_url'][:72]}...")
+
+    proxy = app.extensions['manifest_proxy']
+    issuer = app.extensions['drm_tokens']
+    viewers = [str(uuid.uuid4()) for _ in range(args.viewers)]
+    manifest_urls = []
+    for i, viewer in enumerate(viewers):
+        channel_id = channels[i % len(channels)][0]
+        manifest_urls.append(f"/api/stream/manifest/{channel_id}/index.m3u8?token={issuer.issue(viewer, channel_id)['token']}")
+
+    print(f'{args.viewers} viewers on {len(channels)} live channels for {args.duration:.0f}s, polling every '
+          f'{args.poll}s; origin delay {args.delay * 1000:.0f} ms, proxy refresh {proxy.refresh_interval}s')
+    print(f"{'path':<8} {'playlists':>9} {'origin':>8} {'p50 ms':>7} {'p95 ms':>7}")
+    before = sum(server.paths.values())
+    latencies = crowd(direct_viewer, [url for _, url in channels], args)
+    report('direct', latencies, sum(server.paths.values()) - before)
+    before = sum(server.paths.values())
+    latencies = crowd(proxied_viewer, manifest_urls, args)
+    report('proxy', latencies, sum(server.paths.values()) - before)
+    print(f'proxy stats: {proxy.stats()}')
+
+    # Same playlist, each viewer's own token on every segment
+    bodies = []
+    for manifest_url in manifest_urls[:len(channels) * 2:len(channels)]:
+        master = client.get(manifest_url).get_data(as_text=True)
+        bodies.append(client.get(urljoin(manifest_url, first_variant(master))).get_data(as_text=True))
+    segments = [[line for line in body.splitlines() if line.endswith('.ts') or '.ts?' in line] for body in bodies]
+    owners = [issuer.verify(parse_qs(urlsplit(lines[0]).query)['token'][0])[0] for lines in segments]
+    assert owners == [viewers[0], viewers[len(channels)]] and bodies[0] != bodies[1]
+    assert [urlsplit(a)._replace(query='') for a in segments[0]] == [urlsplit(b)._replace(query='') for b in segments[1]]
+    print(f'per-user rewrite: 2 viewers, same {len(segments[0])} segment URLs, each carrying its own token')
+
+    # A token from an earlier window: fine on a child playlist within the leeway, never on the master
+    channel_id = channels[0][0]
+    master_url = manifest_urls[0]
+    child = urljoin(master_url, first_variant(client.get(master_url).get_data(as_text=True)))
+    window = int(time.time() // issuer.window)
+    stale = issuer._build(viewers[0], channel_id, window - 2)['token']  # expired `grace` seconds ago
+    expired = issuer._build(viewers[0], channel_id, window - 2 - (proxy.token_leeway // issuer.window + 1))['token']
+    swap = lambda url, token: url.replace(parse_qs(urlsplit(url).query)['token'][0], token)
+    statuses = [client.get(swap(master_url, stale)).status_code, client.get(swap(child, stale)).status_code,
+                client.get(swap(child, expired)).status_code]
+    print(f'expired tokens (leeway {proxy.token_leeway}s): master {statuses[0]}, child within leeway {statuses[1]}, '
+          f'child past leeway {statuses[2]}')
+    assert statuses == [401, 200, 401], statuses
+
+    # The channel's origin redirects its master to another CDN host, where the child playlists live
+    cdn, cdn_url = start_fake_hls_origin(args.delay)
+    server.moved[channel_id] = cdn_url
+    proxy.manifests.clear()
+    master = client.get(master_url).get_data(as_text=True)
+    response = client.get(urljoin(master_url, first_variant(master)))
+    assert response.status_code == 200, response.get_json()
+    print(f'master redirected to another host: child playlist {response.status_code}, '
+          f'{sum(cdn.paths.values())} requests on the new host')
+
+if __name__ == '__main__':
+    main()
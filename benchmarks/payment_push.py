@@ -0,0 +1,109 @@
+# burudani_backend/benchmarks/payment_push.py
+#
+# Checkout confirmation: clients polling /payments/status every second versus
+# one long-poll on /payments/status/<id>/wait. Payments settle through the
+# webhook at random times; we count status requests and measure how long
+# each client takes to see the final status. Finally, opens more /events
+# streams than PAYMENT_EVENTS_MAX_STREAMS to check the overflow gets a 503
+# pointing at /wait and that closing a stream frees its slot.
+#
+#   python benchmarks/payment_push.py [--payments 50] [--poll-interval 1.0]
+
+import argparse
+import random
+import statistics
+import threading
+import time
+import uuid
+
+from common import app, db, quiet
+from src.models.payment import Payment, ACTIVE_PAYMENT_STATUSES
+from src.routes.payments import PAYMENT_EVENTS_MAX_STREAMS
+from src.services.zeno_client import ZENO_API_KEY
+
+def create_payments(count):
+    order_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with app.app_context():
+        db.session.add_all(Payment(
+            order_id=order_id, amount=1000, buyer_phone='0744000000',
+            buyer_email='bench@burudani.com', buyer_name='Bench', payment_status='INITIATED',
+        ) for order_id in order_ids)
+        db.session.commit()
+    return order_ids
+
+def run(mode, count, poll_interval, max_settle):
+    client = app.test_client()
+    order_ids = create_payments(count)
+    settle_after = {order_id: random.uniform(0.2, max_settle) for order_id in order_ids}
+    settled_at = {}
+    requests_made = []
+    latencies = []
+    start = time.monotonic()
+
+    def settle(order_id):
+        time.sleep(settle_after[order_id])
+        settled_at[order_id] = time.monotonic()
+        client.post('/api/payments/webhook', headers={'x-api-key': ZENO_API_KEY},
+                    json={'order_id': order_id, 'payment_status': 'COMPLETED'})
+
+    def watch(order_id):
+        made = 0
+        while True:
+            made += 1
+            if mode == 'poll':
+                payment = client.get(f'/api/payments/status/{order_id}').get_json()['payment']
+            else:
+                payment = client.get(f'/api/payments/status/{order_id}/wait?timeout=10').get_json()['payment']
+            if payment['payment_status'] not in ACTIVE_PAYMENT_STATUSES:
+                break
+            if mode == 'poll':
+                time.sleep(poll_interval)
+        latencies.append(time.monotonic() - settled_at[order_id])
+        requests_made.append(made)
+
+    threads = [threading.Thread(target=watch, args=(o,)) for o in order_ids]
+    threads += [threading.Thread(target=settle, args=(o,)) for o in order_ids]
+    with quiet():
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    print(f'{mode:10} status requests {sum(requests_made):5}  '
+          f'confirmation latency p50 {statistics.median(latencies) * 1000:7.1f}ms '
+          f'max {max(latencies) * 1000:7.1f}ms  (wall {time.monotonic() - start:.1f}s)')
+
+def check_stream_cap():
+    client = app.test_client()
+    order_ids = create_payments(PAYMENT_EVENTS_MAX_STREAMS + 1)
+    with quiet():
+        streams = [client.get(f'/api/payments/status/{o}/events', buffered=False)
+                   for o in order_ids[:PAYMENT_EVENTS_MAX_STREAMS]]
+        assert all(s.status_code == 200 for s in streams), [s.status_code for s in streams]
+        overflow = client.get(f'/api/payments/status/{order_ids[-1]}/events')
+        assert overflow.status_code == 503, overflow.status_code
+        assert overflow.headers.get('Retry-After')
+        assert overflow.get_json()['wait_url'].endswith(f'/{order_ids[-1]}/wait')
+        streams.pop().close()
+        reopened = client.get(f'/api/payments/status/{order_ids[-1]}/events', buffered=False)
+        assert reopened.status_code == 200, reopened.status_code
+        # One thread holds every stream's request context here, so close them newest first
+        for stream in [reopened] + streams[::-1]:
+            stream.close()
+    print(f'event streams capped at {PAYMENT_EVENTS_MAX_STREAMS}: overflow got 503 + Retry-After, '
+          f'closed stream freed its slot')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--payments', type=int, default=50)
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--max-settle', type=float, default=8.0)
+    args = parser.parse_args()
+    random.seed(3)
+    print(f'{args.payments} payments settling within {args.max_settle:g}s')
+    run('poll', args.payments, args.poll_interval, args.max_settle)
+    run('long-poll', args.payments, args.poll_interval, args.max_settle)
+    check_stream_cap()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# burudani_backend/benchmarks/playback_start.py
+#
+# Playback-start latency with subscription entitlements enforced: POST
+# /api/stream/validate and /api/stream/link on premium content for a
+# subscriber (cold and warm entitlement cache), on free content, and for a
+# non-subscriber (403). Finishes by completing a payment and checking the
+# next playback start sees the new entitlement while other users' cached
+# entitlements stay warm.
+#
+#   python benchmarks/playback_start.py [--requests 300]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import app, db, seed_catalog, login, quiet
+from src.models.content import Content
+from src.models.payment import Payment
+from src.models.user import User
+from src.services.entitlements import entitlement_cache
+from src.services.query_counter import QueryCounter
+
+def make_user(email, password):
+    with app.app_context():
+        user = User.query.filter_by(email=email).first()
+        if not user:
+            user = User(email=email)
+            user.set_password(password)
+            db.session.add(user)
+            db.session.commit()
+        return user.id
+
+def add_payment(user_id, amount, status='COMPLETED'):
+    with app.app_context():
+        db.session.add(Payment(
+            order_id=str(uuid.uuid4()), user_id=user_id, amount=amount, payment_status=status,
+            buyer_phone='255700000000', buyer_email='bench@burudani.com', buyer_name='bench',
+            updated_at=datetime.utcnow(),
+        ))
+        db.session.commit()
+
+def measure(client, headers, url, content_id, requests):
+    """(status, p50 ms, p95 ms, queries per request)"""
+    latencies = []
+    with QueryCounter() as counter, quiet():
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.post(url, headers=headers, json={'content_id': content_id})
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return response.status_code, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], counter.count / requests
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    seed_catalog(200)
+    with app.app_context():
+        premium_id = Content.query.filter_by(is_premium=True).first().id
+        free_id = Content.query.filter_by(is_premium=False).first().id
+    subscriber_id = make_user('bench-subscriber@burudani.com', 'subscriber123')
+    make_user('bench-free@burudani.com', 'free12345')
+    add_payment(subscriber_id, 15000)
+
+    client = app.test_client()
+    subscriber = login(client, 'bench-subscriber@burudani.com', 'subscriber123')
+    free_user = login(client, 'bench-free@burudani.com', 'free12345')
+
+    print(f"{'endpoint':22} {'case':24} {'status':>6} {'p50 ms':>7} {'p95 ms':>7} {'queries':>8}")
+    for url in ('/api/stream/validate', '/api/stream/link'):
+        entitlement_cache.clear()
+        cases = [
+            ('subscriber, cold', subscriber, premium_id, 1),
+            ('subscriber, warm', subscriber, premium_id, args.requests),
+            ('free content', free_user, free_id, args.requests),
+            ('no subscription', free_user, premium_id, args.requests),
+        ]
+        for label, headers, content_id, requests in cases:
+            status, p50, p95, queries = measure(client, headers, url, content_id, requests)
+            print(f'{url:22} {label:24} {status:>6} {p50:>7.2f} {p95:>7.2f} {queries:>8.2f}')
+
+    with app.app_context():
+        free_id_user = User.query.filter_by(email='bench-free@burudani.com').first().id
+    misses = entitlement_cache.misses
+    add_payment(free_id_user, 5000)
+    with quiet():
+        # Only the paying user's entitlement is re-read; the subscriber's stays cached
+        client.post('/api/stream/validate', headers=subscriber, json={'content_id': premium_id})
+        status = client.post('/api/stream/validate', headers=free_user, json={'content_id': premium_id}).status_code
+    print(f'entitlement cache misses from that payment: {entitlement_cache.misses - misses}')
+    assert entitlement_cache.misses - misses == 1
+    print(f'after the free user pays for a weekly plan: validate -> {status}')
+    assert status == 200
+    print(f'entitlement cache: {entitlement_cache.stats()}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# burudani_backend/benchmarks/pool_concurrency.py
+#
+# Runs the app under gunicorn (gthread, one worker, many threads) with a
+# deliberately small connection pool, drives every blueprint concurrently and
+# checks /api/metrics: one engine, peak checked-out connections within
+# pool_size + max_overflow, and no failed requests.
+#
+#   python benchmarks/pool_concurrency.py [--threads 16] [--clients 32] [--requests 40]
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import app, seed_catalog, login
+from src.models.db import db
+from src.models.user import User
+from src.models.content import Content
+from src.models.payment import Payment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POOL_SIZE, MAX_OVERFLOW = 3, 2
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_gunicorn(port, threads):
+    env = dict(os.environ, DB_POOL_SIZE=str(POOL_SIZE), DB_MAX_OVERFLOW=str(MAX_OVERFLOW))
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', '--worker-class', 'gthread', '--workers', '1',
+        '--threads', str(threads), '--bind', f'127.0.0.1:{port}', 'src.main:app',
+    ], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            if requests.get(f'{base}/api/health', timeout=1).ok:
+                return process, base
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit('gunicorn did not start')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=40)
+    args = parser.parse_args()
+
+    # Every model is registered on the one MetaData / engine
+    assert User.metadata is Content.metadata is Payment.metadata is db.metadata
+
+    seed_catalog(300)
+    headers = login(app.test_client())
+    with app.app_context():
+        content_ids = [row[0] for row in db.session.query(Content.id).limit(50)]
+
+    process, base = start_gunicorn(free_port(), args.threads)
+    statuses = Counter()
+    try:
+        def client(n):
+            session = requests.Session()
+            session.headers.update(headers)
+            for i in range(args.requests):
+                content_id = content_ids[(n + i) % len(content_ids)]
+                calls = [
+                    ('GET', f'/api/content?page={i % 10 + 1}&per_page=20', None),   # content
+                    ('GET', '/api/user/history', None),                              # user
+                    ('POST', '/api/user/history', {'content_id': content_id, 'watched_duration': i}),
+                    ('POST', '/api/stream/validate', {'content_id': content_id}),   # streaming
+                    ('GET', '/api/payments/user', None),                             # payments
+                    ('GET', '/api/content/search?query=Benchmark', None),
+                ]
+                method, path, body = calls[i % len(calls)]
+                statuses[session.request(method, base + path, json=body, timeout=30).status_code] += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            list(pool.map(client, range(args.clients)))
+        elapsed = time.perf_counter() - start
+        stats = requests.get(f'{base}/api/metrics', headers=headers, timeout=5).json()['database']
+    finally:
+        process.terminate()
+        process.wait()
+
+    total = sum(statuses.values())
+    print(f'{total} requests from {args.clients} clients over {args.threads} gunicorn threads in {elapsed:.1f}s')
+    print(f'  statuses {dict(statuses)}')
+    print(f'  pool: {stats}')
+    ok = (stats['engines'] == 1 and stats['peak_checked_out'] <= POOL_SIZE + MAX_OVERFLOW
+          and all(status < 500 for status in statuses))
+    print('OK' if ok else 'FAIL')
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,35 @@
+# burudani_backend/benchmarks/projection_payload.py
+#
+# Payload size and serialization cost of a 100-item content page per view.
+#
+#   python benchmarks/projection_payload.py
+
+import itertools
+
+from common import app, seed_catalog, login, timed
+from src.services.catalog import content_query
+from src.services.projection import CONTENT_VIEWS
+
+PAGE_SIZE = 100
+
+def run():
+    seed_catalog(500)
+    client = app.test_client()
+    headers = login(client)
+    print(f"{'view':8} {'bytes/page':>11} {'bytes/item':>11} {'load+serialize':>15} {'HTTP request':>13}")
+    for view, fields in CONTENT_VIEWS.items():
+        with app.app_context():
+            def serialize():
+                rows = content_query(fields=fields).limit(PAGE_SIZE).all()
+                return app.json.dumps([content.to_dict(fields) for content in rows])
+            _, serialize_seconds = timed(serialize, repeat=30)
+
+        # A distinct query string per call keeps the snapshot cache out of the measurement
+        url = f'/api/content?per_page={PAGE_SIZE}&view={view}&pagination=cursor&n='
+        counter = itertools.count()
+        response, request_seconds = timed(lambda: client.get(f'{url}{next(counter)}', headers=headers), repeat=10)
+        size = len(response.get_data())
+        print(f'{view:8} {size:>11} {size // PAGE_SIZE:>11} {serialize_seconds * 1000:>12.2f} ms {request_seconds * 1000:>10.2f} ms')
+
+if __name__ == '__main__':
+    run()
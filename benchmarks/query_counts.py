@@ -0,0 +1,61 @@
+# burudani_backend/benchmarks/query_counts.py
+#
+# Asserts that the number of SQL round trips per content endpoint does not
+# grow with the page size (no N+1 on Content.categories / Content.streams).
+# CATALOG_LOADING_STRATEGY=lazy turns eager loading off to show the N+1
+# baseline (the catalog endpoints then FAIL).
+#
+#   python benchmarks/query_counts.py
+
+from common import app, seed_catalog, login, quiet
+from src.models.content import Content, Category
+from src.services.query_counter import QueryCounter
+from src.services.search import get_search_backend
+
+ENDPOINTS = [
+    ('GET', '/api/content?per_page={n}'),
+    ('GET', '/api/content/featured'),
+    ('GET', '/api/content/trending'),
+    ('GET', '/api/content/search?query=Benchmark'),
+    ('GET', '/api/categories/{category_id}/content'),
+    ('GET', '/api/content/{content_id}'),
+    ('GET', '/api/user/history'),
+    ('GET', '/api/user/favorites'),
+    ('POST', '/api/stream/link'),
+    ('POST', '/api/stream/validate'),
+]
+
+def count_queries(client, headers, method, url, body=None):
+    with QueryCounter() as counter, quiet():
+        response = client.open(url, method=method, headers=headers, json=body)
+    assert response.status_code < 400, f'{method} {url} -> {response.status_code}: {response.get_data(as_text=True)}'
+    return counter.count
+
+def run(sizes=(20, 200)):
+    client = app.test_client()
+    results = {}
+    with app.app_context(), quiet():
+        get_search_backend()  # build the search index up front, not inside the first counted request
+    for size in sizes:
+        seed_catalog(size)
+        headers = login(client)
+        with app.app_context():
+            content_id = Content.query.first().id
+            category_id = Category.query.first().id
+        for content in (content_id,):
+            client.post('/api/user/history', headers=headers, json={'content_id': content})
+            client.post('/api/user/favorites', headers=headers, json={'content_id': content})
+        for method, template in ENDPOINTS:
+            url = template.format(n=size, content_id=content_id, category_id=category_id)
+            body = {'content_id': content_id} if method == 'POST' else None
+            results.setdefault(template, []).append(count_queries(client, headers, method, url, body))
+
+    failures = 0
+    for template, counts in results.items():
+        flat = len(set(counts)) == 1
+        failures += not flat
+        print(f"{'OK  ' if flat else 'FAIL'} {template:45} queries per request by catalog size {sizes}: {counts}")
+    return failures
+
+if __name__ == '__main__':
+    raise SystemExit(1 if run() else 0)
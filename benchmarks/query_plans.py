@@ -0,0 +1,64 @@
+# burudani_backend/benchmarks/query_plans.py
+#
+# Shows the query plan of each hot endpoint query before and after the
+# declared indexes are built by src/services/migrations.py.
+#
+#   python benchmarks/query_plans.py
+
+from sqlalchemy import text
+from sqlalchemy.schema import DropIndex
+
+from common import app, seed_catalog
+from src.models.db import db
+from src.models.content import Content, Stream, Category, UserWatchHistory, UserFavorites, content_categories
+from src.models.payment import Payment
+from src.services.migrations import declared_indexes, migrate_indexes
+
+USER_ID = 'bench-user'
+
+def hot_queries():
+    return {
+        'GET /content?type=': Content.query.filter(Content.type == 'movie')
+            .order_by(Content.created_at.desc(), Content.id.desc()).limit(20),
+        'GET /content/featured': Content.query.filter(Content.is_featured == True).order_by(Content.created_at.desc()),
+        'GET /content/trending': Content.query.filter(Content.is_trending == True).order_by(Content.created_at.desc()),
+        'GET /categories/<id>/content': Content.query.join(content_categories)
+            .filter(content_categories.c.category_id == 'bench-category'),
+        'POST /user/history lookup': UserWatchHistory.query.filter_by(user_id=USER_ID, content_id='bench-content'),
+        'GET /user/history': UserWatchHistory.query.filter_by(user_id=USER_ID)
+            .order_by(UserWatchHistory.last_watched_at.desc()),
+        'GET /user/favorites': UserFavorites.query.filter_by(user_id=USER_ID).order_by(UserFavorites.created_at.desc()),
+        'content.streams load': Stream.query.filter(Stream.content_id.in_(['a', 'b'])),
+        'POST /stream/link by channel': Stream.query.filter_by(channel_id='channel-1'),
+        'GET /payments/user': Payment.query.filter_by(user_id=USER_ID).order_by(Payment.created_at.desc()),
+    }
+
+def explain(conn, query):
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    if db.engine.dialect.name == 'postgresql':
+        rows = conn.execute(text(f'EXPLAIN {sql}'))
+        return ' | '.join(row[0].strip() for row in rows if 'Scan' in row[0])
+    rows = conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'))
+    return ' | '.join(row[-1] for row in rows)
+
+def show_plans(label):
+    print(f'--- {label} ---')
+    with db.engine.connect() as conn:
+        for name, query in hot_queries().items():
+            print(f'{name:32} {explain(conn, query)}')
+
+def run():
+    seed_catalog(500)
+    with app.app_context():
+        metadatas = [db.metadata]
+        with db.engine.begin() as conn:
+            for index in declared_indexes(metadatas):
+                conn.execute(DropIndex(index, if_exists=True))
+        show_plans('without declared indexes')
+        migrate_indexes(db.engine, metadatas, log=lambda message: None)
+        with db.engine.begin() as conn:
+            conn.execute(text('ANALYZE'))
+        show_plans('after migrate_indexes')
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,105 @@
+# burudani_backend/benchmarks/reconciler_run.py
+#
+# Runs the payment reconciler against the local fake Zeno gateway on a
+# virtual clock and compares its outbound order-status calls with clients
+# polling /payments/status every 2s (the old per-request Zeno lookup). The
+# oldest order gets an HTML error page instead of JSON and must not hold up
+# the rest, and a status the webhook consumer committed after the reconciler
+# read the row must not be overwritten.
+#
+#   python benchmarks/reconciler_run.py [--payments 200] [--minutes 10]
+
+import argparse
+import random
+import uuid
+
+from fake_zeno import start_fake_zeno
+from common import app, db, quiet
+from sqlalchemy.orm.attributes import set_committed_value
+from src.models.payment import Payment
+from src.services.reconciler import PaymentReconciler, ACTIVE_STATUSES, apply_order_status
+from src.services.zeno_client import ZenoClient
+
+CLIENT_POLL_INTERVAL = 2
+TICK = 5
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--payments', type=int, default=200)
+    parser.add_argument('--minutes', type=float, default=10)
+    args = parser.parse_args()
+    duration = args.minutes * 60
+
+    gateway, gateway_url = start_fake_zeno(default_status='PENDING')
+    client = ZenoClient(
+        initiate_url=f'{gateway_url}/api/payments/mobile_money_tanzania',
+        status_url=f'{gateway_url}/api/payments/order-status',
+    )
+
+    # Each payment settles at a random time; a fifth of them are never confirmed
+    random.seed(7)
+    settles_at = {}
+    order_ids = []
+    with app.app_context():
+        for i in range(args.payments):
+            order_id = str(uuid.uuid4())
+            db.session.add(Payment(
+                order_id=order_id, amount=1000, buyer_phone='0744000000',
+                buyer_email='bench@burudani.com', buyer_name='Bench', payment_status='INITIATED',
+            ))
+            if i % 5:
+                settles_at[order_id] = (random.uniform(10, 180), random.choice(['COMPLETED', 'FAILED']))
+            gateway.orders[order_id] = 'PENDING'
+            order_ids.append(order_id)
+        db.session.commit()
+    gateway.garbled.add(order_ids[0])  # never confirmed (i % 5 == 0) and first in created_at order
+
+    now = [0.0]
+    reconciler = PaymentReconciler(app, client=client, clock=lambda: now[0], expiry=duration + 60)
+    with quiet():
+        while now[0] <= duration:
+            for order_id, (at, status) in settles_at.items():
+                if at <= now[0] and gateway.orders[order_id] == 'PENDING':
+                    gateway.orders[order_id] = status
+            reconciler.run_once()
+            now[0] += TICK
+
+    with app.app_context():
+        statuses = {}
+        for payment in Payment.query.filter(Payment.order_id.in_(list(gateway.orders))):
+            statuses[payment.payment_status] = statuses.get(payment.payment_status, 0) + 1
+        pending = Payment.query.filter(Payment.payment_status.in_(ACTIVE_STATUSES)).count()
+
+    # Old behaviour: every client polls every 2s until its payment settles (or the window ends)
+    legacy_calls = sum(
+        int(settles_at.get(order_id, (duration, None))[0] // CLIENT_POLL_INTERVAL) + 1
+        for order_id in gateway.orders
+    )
+    after_terminal = sum(
+        max(0, gateway.polls[order_id] - (int(at // TICK) + 1))
+        for order_id, (at, _) in settles_at.items()
+    )
+    print(f'{args.payments} payments over {args.minutes:g} virtual minutes')
+    print(f'  final statuses:             {statuses} ({pending} still active)')
+    print(f'  client-driven Zeno calls:   {legacy_calls}')
+    print(f'  reconciler Zeno calls:      {gateway.calls["status"]} in {reconciler.runs} runs')
+    print(f'  max calls for one order:    {max(gateway.polls.values())}')
+    print(f'  calls after terminal state: {after_terminal} (upper bound)')
+    print(f'  non-JSON order:             {gateway.polls[order_ids[0]]} calls, backed off like any error')
+    assert pending == args.payments - len(settles_at), pending
+
+    # The webhook consumer completes an order after the reconciler read it as INITIATED
+    with app.app_context():
+        order_id = next(o for o in order_ids[1:] if o not in settles_at)
+        Payment.query.filter_by(order_id=order_id).update({'payment_status': 'COMPLETED'})
+        db.session.commit()
+        payment = Payment.query.filter_by(order_id=order_id).first()
+        set_committed_value(payment, 'payment_status', 'INITIATED')
+        applied = apply_order_status(payment, {'payment_status': 'FAILED'})
+        db.session.commit()
+        final = Payment.query.filter_by(order_id=order_id).first().payment_status
+    print(f'  stale read vs webhook:      applied={applied}, row stays {final}')
+    assert not applied and final == 'COMPLETED'
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# burudani_backend/benchmarks/replica_routing.py
+#
+# Primary/replica routing against two local SQLite files. The replica is a
+# backup copy of the primary refreshed by sync_replica(), so replication lag
+# is whatever we leave between syncs. Shows where each request's statements
+# run, read-your-writes after a write (the last_write_at cookie is honoured
+# by a second app instance too), stream index reloads after an edit and
+# fallback while the replica is down.
+#
+#   python benchmarks/replica_routing.py
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+_dir = tempfile.mkdtemp(prefix='burudani-replica-')
+PRIMARY = os.path.join(_dir, 'primary.db')
+REPLICA_DIR = os.path.join(_dir, 'replica')
+REPLICA = os.path.join(REPLICA_DIR, 'replica.db')
+os.makedirs(REPLICA_DIR)
+os.environ['DATABASE_URL'] = f'sqlite:///{PRIMARY}'
+os.environ['DATABASE_REPLICA_URLS'] = f'sqlite:///{REPLICA}'
+os.environ['READ_YOUR_WRITES_SECONDS'] = '1'
+os.environ['REPLICA_HEALTH_INTERVAL'] = '0.5'
+
+from sqlalchemy import event
+
+from common import app, seed_catalog, login, quiet
+from src.models.db import db
+from src.models.content import Content, Stream
+from src.models.user import User
+
+with app.app_context():
+    primary_engine = db.engine
+    replica_engine = db.engines['replica_0']
+replicas = app.extensions['db_replicas']
+executed = []
+
+@event.listens_for(primary_engine, 'before_cursor_execute')
+def _on_primary(*args):
+    executed.append('primary')
+
+@event.listens_for(replica_engine, 'before_cursor_execute')
+def _on_replica(*args):
+    executed.append('replica')
+
+def sync_replica():
+    """'Replicate' by copying the primary into the replica file"""
+    source, target = sqlite3.connect(PRIMARY), sqlite3.connect(REPLICA)
+    source.backup(target)
+    source.close()
+    target.close()
+
+def call(client, method, url, headers, body=None):
+    executed.clear()
+    with quiet():
+        response = client.open(url, method=method, headers=headers, json=body)
+    where = sorted(set(executed)) or ['-']
+    return response, '+'.join(where)
+
+def favorites_count(response):
+    return len(response.get_json())
+
+def main():
+    seed_catalog(100)
+    with app.app_context():
+        if not User.query.filter_by(email='viewer@burudani.com').first():
+            viewer = User(email='viewer@burudani.com', phone_number='0700000001')
+            with quiet():
+                viewer.set_password('viewer123')
+            db.session.add(viewer)
+            db.session.commit()
+        content_ids = [row[0] for row in db.session.query(Content.id).limit(3)]
+    # Separate cookie jars: the read-your-writes pin belongs to the client that wrote
+    client, admin_client = app.test_client(), app.test_client()
+    admin = login(admin_client)
+    viewer = login(client, 'viewer@burudani.com', 'viewer123')
+    sync_replica()
+
+    print('routing')
+    for method, url, body in [('GET', '/api/content?per_page=20&page=2', None),
+                              ('GET', '/api/user/history', None),
+                              ('POST', '/api/stream/validate', {'content_id': content_ids[0]}),
+                              ('GET', '/api/payments/user', None),
+                              ('GET', '/api/payments/status/bench-order', None),
+                              ('POST', '/api/user/history', {'content_id': content_ids[0], 'watched_duration': 30})]:
+        response, where = call(client, method, url, viewer, body)
+        print(f'  {method:5} {url:36} {response.status_code}  statements on {where}')
+
+    time.sleep(1.1)  # let the viewer's history write leave its read-your-writes window
+
+    print('read-your-writes (replica not synced after the write)')
+    response, where = call(admin_client, 'POST', '/api/user/favorites', admin, {'content_id': content_ids[1]})
+    print(f'  admin adds a favorite                     {response.status_code}  on {where}')
+    response, where = call(admin_client, 'GET', '/api/user/favorites', admin)
+    print(f'  admin lists favorites right away          {favorites_count(response)} favorites  on {where}')
+    response, where = call(client, 'GET', '/api/user/favorites', viewer)
+    print(f'  viewer lists favorites                    {favorites_count(response)} favorites  on {where}')
+    # What another worker sees: nothing but the request, cookie included
+    cookie = admin_client.get_cookie('last_write_at')
+    other_worker = app.test_client()
+    other_worker.set_cookie('last_write_at', cookie.value)
+    response, where = call(other_worker, 'GET', '/api/user/favorites', admin)
+    print(f'  another worker, same cookie               {favorites_count(response)} favorites  on {where}')
+    other_worker.set_cookie('last_write_at', cookie.value[:-2] + 'xx')
+    response, where = call(other_worker, 'GET', '/api/user/favorites', admin)
+    print(f'  another worker, forged cookie             {favorites_count(response)} favorites  on {where}')
+    time.sleep(1.1)
+    response, where = call(admin_client, 'GET', '/api/user/favorites', admin)
+    print(f'  admin after the window (replica stale)    {favorites_count(response)} favorites  on {where}')
+    sync_replica()
+    response, where = call(admin_client, 'GET', '/api/user/favorites', admin)
+    print(f'  admin after the replica caught up         {favorites_count(response)} favorites  on {where}')
+
+    print('stream index after a stream edit (replica not synced)')
+    with app.app_context():
+        stream = Stream.query.join(Content).filter(Content.is_premium.is_(False)).first()
+        stream_content_id = stream.content_id
+    response, where = call(client, 'POST', '/api/stream/link', viewer, {'content_id': stream_content_id})
+    old_url = response.get_json()['streamURLAndroid']
+    with app.app_context():
+        stream = db.session.get(Stream, stream.id)
+        stream.stream_url = old_url.replace('index.m3u8', 'index-edited.m3u8')
+        db.session.commit()
+    response, where = call(client, 'POST', '/api/stream/link', viewer, {'content_id': stream_content_id})
+    edited = response.get_json()['streamURLAndroid'].endswith('index-edited.m3u8')
+    print(f'  next /stream/link serves the edit         {edited}  (index reload on {where})')
+    sync_replica()
+
+    print('replica outage')
+    shutil.move(REPLICA_DIR, REPLICA_DIR + '.down')
+    replica_engine.dispose()
+    for page, label in ((3, 'first request after outage (retried)'), (4, 'next request')):
+        response, where = call(client, 'GET', f'/api/content?per_page=20&page={page}', viewer)
+        print(f'  {label:40} {response.status_code}  on {where}')
+    shutil.move(REPLICA_DIR + '.down', REPLICA_DIR)
+    time.sleep(0.6)
+    response, where = call(client, 'GET', '/api/content?per_page=20&page=5', viewer)
+    print(f'  {"after recovery + health interval":40} {response.status_code}  on {where}')
+    print(f'  replica stats {replicas.stats()}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# burudani_backend/benchmarks/search_latency.py
+#
+# Measures /api/content/search latency as the catalog grows, against the
+# configured search backend (SEARCH_BACKEND=auto|sqlite|postgres|memory).
+#
+#   python benchmarks/search_latency.py [size ...]    e.g. 500 5000 50000 200000
+
+import random
+import sys
+import uuid
+from datetime import datetime
+
+from common import app, login, timed
+from src.models.user import db
+from src.models.content import Content
+
+WORDS = ['simba', 'derby', 'taifa', 'bongo', 'comedy', 'drama', 'live', 'news', 'kids', 'music',
+         'league', 'final', 'season', 'episode', 'classic', 'action', 'tamthilia', 'sauti', 'habari', 'michezo']
+
+def grow_catalog(size):
+    with app.app_context():
+        existing = Content.query.count()
+        rng = random.Random(existing)
+        now = datetime.utcnow()
+        rows = [{
+            'id': str(uuid.uuid4()),
+            'title': f"{' '.join(rng.sample(WORDS, 3))} title{i}",
+            'description': ' '.join(rng.choices(WORDS, k=12)),
+            'type': 'movie',
+            'created_at': now,
+            'updated_at': now,
+        } for i in range(existing, size)]
+        for start in range(0, len(rows), 5000):
+            db.session.execute(Content.__table__.insert(), rows[start:start + 5000])
+        db.session.commit()
+
+def run(sizes):
+    client = app.test_client()
+    headers = login(client)
+    queries = {
+        'selective': 'title42',
+        'common word': 'derby',
+        'prefix': 'tamth',
+    }
+    print(f"{'catalog':>9} " + ' '.join(f'{name:>14}' for name in queries))
+    for size in sizes:
+        grow_catalog(size)
+        client.get('/api/content/search?query=warmup&per_page=20', headers=headers)
+        timings = []
+        for query in queries.values():
+            url = f'/api/content/search?query={query}&per_page=20'
+            _, seconds = timed(lambda: client.get(url, headers=headers), repeat=20)
+            timings.append(seconds * 1000)
+        print(f'{size:>9} ' + ' '.join(f'{ms:>11.2f} ms' for ms in timings))
+
+if __name__ == '__main__':
+    run([int(size) for size in sys.argv[1:]] or [500, 5000, 50000])
@@ -0,0 +1,97 @@
+# burudani_backend/benchmarks/stream_probe.py
+#
+# Stream health probing against a local fake HLS origin: every stream in
+# the catalog points at it, some channels are down, broken or too slow to
+# answer, and some send a long playlist in small chunks. Compares a probe
+# run one stream at a time with the bounded concurrent run (checking the
+# chunked playlists are read to the end), then checks that /api/stream/link fails over to a backup
+# stream when the primary is down, answers 503 when every stream is down,
+# and does so without extra SQL.
+#
+#   python benchmarks/stream_probe.py [--streams 200] [--delay 0.02] [--concurrency 50]
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import app, db, seed_catalog, login, quiet
+from fake_hls_origin import start_fake_hls_origin, LONG_LADDER
+from src.models.content import Stream
+from src.services.query_counter import QueryCounter
+from src.services.stream_health import StreamProber
+
+def link(client, headers, content_id):
+    with QueryCounter() as counter, quiet():
+        response = client.post('/api/stream/link', headers=headers, json={'content_id': content_id})
+    return response, counter.count
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--streams', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=1.0)
+    args = parser.parse_args()
+
+    seed_catalog(args.streams)
+    with app.app_context():
+        streams = Stream.query.filter(Stream.channel_id.isnot(None)).order_by(Stream.created_at).all()
+        channels = [s.channel_id for s in streams]
+        down = set(channels[3::10])
+        broken = set(channels[7::25])
+        slow = {channel: args.timeout * 1.5 for channel in channels[11::50]}
+        trickle = set(channels[5::40])
+    server, url = start_fake_hls_origin(args.delay, down=down, broken=broken, slow=slow, trickle=trickle)
+    with app.app_context():
+        for stream in Stream.query:
+            stream.stream_url = f'{url}/{stream.channel_id or stream.id}/index.m3u8'
+        db.session.commit()
+        total = Stream.query.count()
+
+    cache = app.extensions['stream_health']
+    expected_down = len(down) + len(broken) + len(slow)
+    print(f'{total} streams, {expected_down} unhealthy ({len(down)} 404, {len(broken)} 500, {len(slow)} slower than '
+          f'the {args.timeout}s timeout), origin delay {args.delay * 1000:.0f} ms')
+    for concurrency in (1, args.concurrency):
+        prober = StreamProber(app, cache, concurrency=concurrency, timeout=args.timeout)
+        with quiet():
+            result = prober.run_once()
+        print(f'  concurrency {concurrency:>3}: {result["seconds"]:>6.2f}s, {result["down"]} down')
+        assert result['probed'] == total and result['down'] == expected_down, result
+    healthy = next(s for s in streams if s.channel_id not in down | broken | set(slow))
+    print(f"  recorded: {cache.get(healthy.id)['variants']} variants, max bandwidth {cache.get(healthy.id)['max_bandwidth']}")
+    chunked = [cache.get(s.id)['variants'] for s in streams if s.channel_id in trickle]
+    assert chunked and all(variants == len(LONG_LADDER) for variants in chunked), chunked
+    print(f'  chunked playlists: {len(chunked)} read to the end ({len(LONG_LADDER)} variants each)')
+
+    # A content whose primary stream is down, with a healthy backup stream
+    primary = next(s for s in streams if s.channel_id in down)
+    with app.app_context():
+        db.session.add(Stream(content_id=primary.content_id, stream_url=f'{url}/{primary.channel_id}-backup/index.m3u8',
+                              stream_type='hls'))
+        db.session.commit()
+    prober.run_once()
+    client = app.test_client()
+    headers = login(client)
+    link(client, headers, primary.content_id)  # fill the stream index
+    response, queries = link(client, headers, primary.content_id)
+    assert response.status_code == 200 and response.get_json()['streamURLAndroid'].endswith('-backup/index.m3u8')
+    print(f'primary down, backup healthy: {response.status_code} backup URL, {queries} queries')
+
+    server.down.add(f'{primary.channel_id}-backup')
+    prober.run_once()
+    response, queries = link(client, headers, primary.content_id)
+    assert response.status_code == 503, response.get_json()
+    print(f'every stream down: {response.status_code} {response.get_json()["error"]!r}, {queries} queries')
+
+    server.down.clear()
+    prober.run_once()
+    response, queries = link(client, headers, primary.content_id)
+    assert response.status_code == 200 and not response.get_json()['streamURLAndroid'].endswith('-backup/index.m3u8')
+    print(f'primary recovered: {response.status_code} primary URL, {queries} queries')
+    print(f'stream health: {cache.stats()}')
+
+if __name__ == '__main__':
+    main()
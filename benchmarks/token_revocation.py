@@ -0,0 +1,77 @@
+# burudani_backend/benchmarks/token_revocation.py
+#
+# Revoked-token blocklist: cost of a check with a large blocklist, no extra
+# SQL on authenticated requests, logout rejecting both tokens, another
+# worker picking the revocation up on its next sync, and expired entries
+# being evicted.
+#
+#   python benchmarks/token_revocation.py [--revoked 100000]
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import app, quiet
+from src.services.query_counter import QueryCounter
+from src.services.revocation import RevocationList
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--revoked', type=int, default=100000)
+    parser.add_argument('--checks', type=int, default=200000)
+    args = parser.parse_args()
+
+    now = time.time()
+    blocklist = RevocationList(app, interval=0)
+    for i in range(args.revoked):
+        blocklist._add(str(uuid.uuid4()), now + 60 + i % 3600)
+    probe = str(uuid.uuid4())
+    start = time.perf_counter()
+    for _ in range(args.checks):
+        blocklist.is_revoked(probe)
+    elapsed = time.perf_counter() - start
+    print(f'{args.revoked} revoked jtis in memory: {elapsed / args.checks * 1e6:.2f} us per blocklist check')
+
+    client = app.test_client()
+    with quiet():
+        tokens = client.post('/api/login', json={'email': 'admin@burudani.com', 'password': 'admin123'}).get_json()
+    access = {'Authorization': f"Bearer {tokens['access_token']}"}
+    refresh = {'Authorization': f"Bearer {tokens['refresh_token']}"}
+
+    with quiet():
+        client.get('/api/user/profile', headers=access)
+    with QueryCounter() as counter, quiet():
+        for _ in range(20):
+            assert client.get('/api/user/profile', headers=access).status_code == 200
+    print(f'20 authenticated requests after warm-up: {counter.count} SQL statements')
+
+    other_worker = RevocationList(app, interval=0)
+    other_worker.sync()
+    with quiet():
+        response = client.post('/api/logout', headers=access, json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200, response.get_json()
+    with quiet():
+        profile_status = client.get('/api/user/profile', headers=access).status_code
+        refresh_status = client.post('/api/refresh', headers=refresh).status_code
+    print(f'after logout: profile -> {profile_status}, refresh -> {refresh_status}')
+    assert profile_status == 401 and refresh_status == 401
+
+    pulled = other_worker.sync()
+    print(f'other worker sync pulled {pulled} revocations, blocklist size {len(other_worker)}')
+    assert len(other_worker) == 2
+
+    clock = [now]
+    expiring = RevocationList(app, interval=0, clock=lambda: clock[0])
+    for i in range(1000):
+        expiring._add(f'jti-{i}', now + 1 + i)
+    clock[0] = now + 500
+    expiring.is_revoked('jti-999')
+    print(f'eviction: 1000 entries, 500 s later {len(expiring)} remain ({expiring.stats()["evicted"]} evicted)')
+    assert len(expiring) == 500
+
+if __name__ == '__main__':
+    main()
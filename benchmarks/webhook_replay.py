@@ -0,0 +1,107 @@
+# burudani_backend/benchmarks/webhook_replay.py
+#
+# Replays a burst of Zeno webhooks, with duplicates and out-of-order stale
+# statuses, against /api/payments/webhook. Measures the request fast path
+# (statements and DB time per webhook), then drains the consumer and checks
+# that every payment ended in its final status.
+#
+#   python benchmarks/webhook_replay.py [--payments 1000] [--duplicates 2]
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from common import app, db, quiet
+from src.models.payment import Payment
+from src.services.query_counter import QueryCounter
+from src.services.zeno_client import ZENO_API_KEY
+
+class DBTimer:
+    """Wall time spent inside cursor.execute on this process"""
+
+    def __init__(self):
+        self.total = 0.0
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['query_start'] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += time.perf_counter() - conn.info.pop('query_start')
+
+    def __enter__(self):
+        event.listen(Engine, 'before_cursor_execute', self._before)
+        event.listen(Engine, 'after_cursor_execute', self._after)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'before_cursor_execute', self._before)
+        event.remove(Engine, 'after_cursor_execute', self._after)
+
+def build_webhooks(order_ids, duplicates):
+    """Final status per order plus a shuffled stream of webhooks including retries and stale statuses"""
+    final = {order_id: random.choice(['COMPLETED', 'COMPLETED', 'COMPLETED', 'FAILED']) for order_id in order_ids}
+    webhooks = []
+    for order_id, status in final.items():
+        reference = f'ref-{order_id[:8]}'
+        webhooks += [{'order_id': order_id, 'payment_status': status, 'reference': reference}] * random.randint(1, duplicates + 1)
+        if random.random() < 0.3:
+            webhooks.append({'order_id': order_id, 'payment_status': 'PENDING', 'reference': reference})
+    random.shuffle(webhooks)
+    # Stale statuses delivered after the final one are regressions the consumer must reject
+    return final, webhooks
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--payments', type=int, default=1000)
+    parser.add_argument('--duplicates', type=int, default=2)
+    args = parser.parse_args()
+    random.seed(11)
+
+    order_ids = [str(uuid.uuid4()) for _ in range(args.payments)]
+    with app.app_context():
+        db.session.add_all(Payment(
+            order_id=order_id, amount=1000, buyer_phone='0744000000',
+            buyer_email='bench@burudani.com', buyer_name='Bench', payment_status='INITIATED',
+        ) for order_id in order_ids)
+        db.session.commit()
+    final, webhooks = build_webhooks(order_ids, args.duplicates)
+
+    queue = app.extensions['payment_webhooks']
+    queue.stop()  # hold the consumer so the fast path is measured on its own
+    client = app.test_client()
+    headers = {'x-api-key': ZENO_API_KEY}
+    latencies = []
+    duplicates = 0
+
+    with quiet(), QueryCounter() as counter, DBTimer() as db_time:
+        for webhook in webhooks:
+            start = time.perf_counter()
+            response = client.post('/api/payments/webhook', headers=headers, json=webhook)
+            latencies.append(time.perf_counter() - start)
+            duplicates += response.get_json()['duplicate']
+    latencies.sort()
+
+    print(f'{len(webhooks)} webhooks for {args.payments} payments ({duplicates} duplicates)')
+    print(f'  fast path: {counter.count / len(webhooks):.1f} statements, '
+          f'{db_time.total / len(webhooks) * 1000:.3f}ms DB time per webhook; '
+          f'request p50 {statistics.median(latencies) * 1000:.2f}ms p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms')
+
+    start = time.perf_counter()
+    with quiet(), QueryCounter() as counter:
+        handled = queue.drain()
+    elapsed = time.perf_counter() - start
+    print(f'  consumer:  {handled} events in {elapsed * 1000:.0f}ms ({handled / elapsed:.0f}/s), '
+          f'{counter.count} statements; outcomes {queue.stats()["outcomes"]}')
+
+    with app.app_context():
+        statuses = dict(db.session.query(Payment.order_id, Payment.payment_status).filter(Payment.order_id.in_(order_ids)))
+    wrong = sum(statuses[order_id] != status for order_id, status in final.items())
+    print(f'  payments not in their final status: {wrong}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# burudani_backend/benchmarks/zapping.py
+#
+# Live-TV zapping: a viewer flips through channels with POST
+# /api/stream/link {channel_id}. Reports latency and SQL statements per
+# request on the first pass over the channels (index cold) and on later
+# passes (index warm), then checks that a stream edit in this worker and a
+# catalog change from another worker are both picked up.
+#
+#   python benchmarks/zapping.py [--channels 50] [--passes 5]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import app, db, seed_catalog, login, quiet
+from src.models.content import Stream
+from src.services.catalog import version_store
+from src.services.query_counter import QueryCounter
+from src.services.stream_index import stream_index
+
+def zap(client, headers, channels):
+    """(p50 ms, p95 ms, statements per request) for one pass over the channels"""
+    latencies = []
+    with QueryCounter() as counter, quiet():
+        for channel_id in channels:
+            start = time.perf_counter()
+            response = client.post('/api/stream/link', headers=headers, json={'channel_id': channel_id})
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.get_json()
+    latencies.sort()
+    return statistics.median(latencies), latencies[max(int(len(latencies) * 0.95) - 1, 0)], counter.count / len(channels)
+
+def link_url(client, headers, channel_id):
+    with quiet():
+        return client.post('/api/stream/link', headers=headers, json={'channel_id': channel_id}).get_json()['streamURLAndroid']
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--channels', type=int, default=50)
+    parser.add_argument('--passes', type=int, default=5)
+    args = parser.parse_args()
+
+    seed_catalog(max(args.channels, 200))
+    with app.app_context():
+        channels = [s.channel_id for s in Stream.query.filter(Stream.channel_id.isnot(None)).limit(args.channels)]
+    client = app.test_client()
+    headers = login(client)
+
+    print(f"{'pass':>6} {'p50 ms':>7} {'p95 ms':>7} {'queries':>8}")
+    for i in range(args.passes):
+        p50, p95, queries = zap(client, headers, channels)
+        print(f"{'cold' if i == 0 else 'warm':>6} {p50:>7.2f} {p95:>7.2f} {queries:>8.2f}")
+
+    channel_id = channels[0]
+    with app.app_context():
+        stream = Stream.query.filter_by(channel_id=channel_id).first()
+        stream.stream_url = stream.stream_url.replace('index.m3u8', 'index-v2.m3u8')
+        db.session.commit()
+    assert link_url(client, headers, channel_id).endswith('index-v2.m3u8')
+    _, _, queries = zap(client, headers, channels)
+    print(f'after a stream edit in this worker: new URL served, {queries:.2f} queries/request over the next pass')
+
+    version_store.bump('catalog')  # as another worker's catalog commit would
+    _, _, queries = zap(client, headers, channels)
+    print(f'after another worker changed the catalog: {queries:.2f} queries/request (index refilled)')
+    print(f'stream index: {stream_index.stats()}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# burudani_backend/benchmarks/zeno_breaker.py
+#
+# Circuit breaker checks for the Zeno client, with a scripted session and a
+# fake clock: the breaker opens after consecutive failures, lets one trial
+# through after the reset timeout, and closes or re-opens on its outcome,
+# whatever exception the trial ends with (broken chunked body, redirect
+# loop, bad content encoding, or something unexpected).
+#
+#   python benchmarks/zeno_breaker.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from src.services.zeno_client import CircuitBreaker, GatewayError, CircuitOpenError, ZenoClient
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = '{}'
+
+class ScriptedSession:
+    """Raises or answers from a list of outcomes, one per request"""
+
+    def __init__(self):
+        self.outcomes = []
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return FakeResponse(outcome)
+
+def make_client():
+    clock = FakeClock()
+    client = ZenoClient(initiate_url='http://zeno.test/initiate', status_url='http://zeno.test/status',
+                        max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock))
+    client.session = ScriptedSession()
+    return client, clock
+
+def trip(client, clock):
+    """Open the breaker, then move past the reset timeout so it is half-open"""
+    client.session.outcomes = [requests.ConnectionError('down'), requests.ConnectionError('down')]
+    for _ in range(2):
+        try:
+            client.order_status('order-1')
+        except GatewayError:
+            pass
+    assert client.breaker.state == CircuitBreaker.OPEN, client.breaker.state
+    clock.now += 31
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+
+def check_trial(error):
+    client, clock = make_client()
+    trip(client, clock)
+    client.session.outcomes = [error]
+    try:
+        client.order_status('order-1')
+    except (GatewayError, RuntimeError):
+        pass
+    # The failed trial re-opened the breaker; it must not stay stuck in half-open
+    assert client.breaker.state == CircuitBreaker.OPEN, client.breaker.state
+    clock.now += 31
+    client.session.outcomes = [200]
+    assert client.order_status('order-1').ok
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    print(f'  trial ending in {error.__class__.__name__:<24} re-opened, next trial closed the breaker')
+
+def main():
+    client, clock = make_client()
+    trip(client, clock)
+    calls = client.session.calls
+    client.session.outcomes = [200]
+    assert client.breaker.allow() and not client.breaker.allow()  # one trial at a time
+    client.breaker.record_failure()
+    try:
+        client.order_status('order-1')
+        raise AssertionError('expected the circuit to be open')
+    except CircuitOpenError:
+        pass
+    assert client.session.calls == calls
+    print('  open breaker short-circuits without a request; one half-open trial at a time')
+
+    for error in (requests.exceptions.ChunkedEncodingError('Connection broken: IncompleteRead'),
+                  requests.exceptions.ContentDecodingError('bad gzip'),
+                  requests.exceptions.TooManyRedirects('Exceeded 30 redirects'),
+                  RuntimeError('unexpected')):
+        check_trial(error)
+
+    client, clock = make_client()
+    trip(client, clock)
+    client.session.outcomes = [requests.exceptions.ChunkedEncodingError('broken')]
+    try:
+        client.initiate({'order_id': 'order-2'})
+    except GatewayError as e:
+        print(f'  non-connection errors surface as GatewayError: {e}')
+
+if __name__ == '__main__':
+    main()
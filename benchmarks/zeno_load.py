@@ -0,0 +1,79 @@
+# burudani_backend/benchmarks/zeno_load.py
+#
+# Worker availability while the payment gateway is slow. A fixed pool of
+# threads stands in for gunicorn's sync workers; a burst of payment
+# initiations is followed by health checks, and we measure how long the
+# health checks wait for a free worker. The last scenario shrinks the async
+# hand-off backlog below the burst size to show the excess being refused.
+#
+#   python benchmarks/zeno_load.py [--delay 2.0] [--workers 4]
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_zeno import start_fake_zeno
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--delay', type=float, default=2.0)
+parser.add_argument('--workers', type=int, default=4)
+parser.add_argument('--payments', type=int, default=8)
+parser.add_argument('--probes', type=int, default=20)
+args = parser.parse_args()
+
+gateway, gateway_url = start_fake_zeno(delay=args.delay)
+os.environ['ZENO_BASE_URL'] = gateway_url
+
+from common import app, quiet
+from src.routes import payments
+from src.services import zeno_client
+from src.services.zeno_client import ZenoClient, CircuitBreaker
+
+def scenario(name, read_timeout, use_async):
+    zeno_client._default_client = ZenoClient(
+        initiate_url=f'{gateway_url}/api/payments/mobile_money_tanzania',
+        status_url=f'{gateway_url}/api/payments/order-status',
+        read_timeout=read_timeout, breaker=CircuitBreaker()
+    )
+    client = app.test_client()
+    statuses = Counter()
+
+    def initiate():
+        start = time.perf_counter()
+        response = client.post('/api/payments/initiate', json={
+            'amount': 1000, 'buyer_phone': '0744000000', 'async': use_async,
+        })
+        statuses[response.status_code] += 1
+        return time.perf_counter() - start
+
+    def probe(submitted_at):
+        client.get('/api/health')
+        return time.perf_counter() - submitted_at
+
+    # redirect_stdout is process-wide, so silence the app's prints around the whole burst
+    with quiet(), ThreadPoolExecutor(max_workers=args.workers) as workers:
+        payments = [workers.submit(initiate) for _ in range(args.payments)]
+        probes = [workers.submit(probe, time.perf_counter()) for _ in range(args.probes)]
+        payment_times = [future.result() for future in payments]
+        probe_times = [future.result() for future in probes]
+
+    print(f'{name:36} initiate p50 {statistics.median(payment_times):6.2f}s  '
+          f'health wait p50 {statistics.median(probe_times):6.2f}s max {max(probe_times):6.2f}s  '
+          f'statuses {dict(statuses)}')
+
+if __name__ == '__main__':
+    print(f'gateway delay {args.delay}s, {args.workers} workers, {args.payments} initiations, {args.probes} health checks')
+    scenario('sync, read timeout >= gateway delay', args.delay + 5, False)
+    scenario('sync, tight read timeout (1s)', 1.0, False)
+    scenario('async hand-off', args.delay + 5, True)
+    # A backlog smaller than the burst: the excess is refused with 503 instead of queueing in memory
+    with quiet():
+        time.sleep(args.delay + 0.5)  # the previous hand-offs release their slots before the swap
+    payments.gateway_slots = threading.BoundedSemaphore(args.payments // 2)
+    scenario(f'async hand-off, {args.payments // 2} slots', args.delay + 5, True)
+    with quiet():
+        time.sleep(args.delay + 0.5)  # let background initiations finish before exit
@@ -0,0 +1,26 @@
+# burudani_backend/migrate_indexes.py
+#
+# Builds the indexes declared on the models that are missing from the
+# database pointed to by DATABASE_URL (Postgres: CREATE INDEX CONCURRENTLY),
+# then the full-text search index used by /api/content/search.
+#
+#   python migrate_indexes.py             # create missing indexes
+#   python migrate_indexes.py --dry-run   # only list them
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import app, db
+from src.services.migrations import migrate_indexes
+from src.services.search import build_search_index
+
+def main():
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        migrate_indexes(db.engine, [db.metadata], concurrently=True, dry_run=dry_run)
+        build_search_index(db.engine, dry_run=dry_run)
+
+if __name__ == '__main__':
+    main()
@@ -7,19 +7,46 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from src.models.user import db, User # Import User model as well
+from flask_jwt_extended import JWTManager, jwt_required, get_jwt
+from werkzeug.middleware.proxy_fix import ProxyFix
+from src.models.db import db, init_db
+from src.models.user import User # Import User model as well
 from src.models.content import Content, Stream, Category, UserWatchHistory, UserFavorites
+from src.models.payment import Payment, PaymentWebhookEvent
+from src.models.token import RevokedToken
+from src.models.stream_health import StreamHealth
 from src.routes.user import user_bp
 from src.routes.auth import auth_bp
 from src.routes.content import content_bp
 from src.routes.streaming import streaming_bp
 from src.routes.payments import payments_bp
+from src.services.cache import CACHE_VERSION_BACKEND
+from src.services.catalog import catalog_cache, register_catalog_invalidation
+from src.services.entitlements import entitlement_cache, register_entitlement_invalidation
+from src.services.stream_index import stream_index, register_stream_index_invalidation
+from src.services.snapshots import snapshot_cache
+from src.services.json_provider import create_json_provider
+from src.services.watch_progress import init_watch_progress
+from src.services.replicas import DATABASE_REPLICA_URLS, READ_YOUR_WRITES_SECONDS, init_replicas
+from src.services.reconciler import init_reconciler
+from src.services.notifier import init_notifier
+from src.services.webhooks import init_webhooks
+from src.services.passwords import hasher as password_hasher
+from src.services.rate_limit import init_rate_limiter
+from src.services.identity import init_identity
+from src.services.revocation import init_revocation
+from src.services.drm import init_drm
+from src.services.manifest_proxy import init_manifest_proxy
+from src.services.stream_health import STREAM_HEALTH_REFRESH_INTERVAL, init_stream_health
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 app.config['JWT_SECRET_KEY'] = 'jwt-secret-string-change-in-production'
 
+# JSON encoding: orjson when installed ('auto'), or force 'orjson' / 'stdlib'
+app.config['JSON_PROVIDER'] = os.environ.get('JSON_PROVIDER', 'auto')
+app.json = create_json_provider(app)
+
 # Enable CORS for all routes
 CORS(app, origins="*")
 
@@ -36,9 +63,53 @@ app.register_blueprint(payments_bp, url_prefix='/api')
 # Database configuration
 # Use DATABASE_URL environment variable for production (Render), fallback to SQLite for local
 DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}")
-app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+app.config['WATCH_PROGRESS_FLUSH_INTERVAL'] = float(os.environ.get('WATCH_PROGRESS_FLUSH_INTERVAL', 0))
+# Payment reconciliation normally runs as the separate `worker` process (worker.py)
+app.config['PAYMENT_RECONCILER_IN_PROCESS'] = os.environ.get('PAYMENT_RECONCILER_IN_PROCESS', '').lower() in ('1', 'true', 'yes')
+# Payment status push channel: 'auto' (Postgres LISTEN/NOTIFY when on Postgres), 'postgres' or 'memory'
+app.config['PAYMENT_NOTIFIER'] = os.environ.get('PAYMENT_NOTIFIER', 'auto')
+# Webhook consumer poll interval in seconds; 0 applies webhooks inline in the request
+app.config['WEBHOOK_CONSUMER_INTERVAL'] = float(os.environ.get('WEBHOOK_CONSUMER_INTERVAL', 1))
+# Seconds a client stays on the primary after a write (signed last_write_at cookie, signed with SECRET_KEY)
+app.config['READ_YOUR_WRITES_SECONDS'] = READ_YOUR_WRITES_SECONDS
+# Seconds between blocklist syncs from revoked_tokens; 0 loads it once at startup
+app.config['TOKEN_REVOCATION_SYNC_INTERVAL'] = float(os.environ.get('TOKEN_REVOCATION_SYNC_INTERVAL', 5))
+# Login/register throttling: 'memory' (per worker) or 'redis' (shared via REDIS_URL)
+app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+# Cache versions (catalog, identity:<user>, entitlements:<user>) are also bumped by the `worker`
+# process (reconciler, webhook consumer): 'redis' when REDIS_URL is set, else 'file', which only
+# reaches processes on the same host. Set CACHE_VERSION_SHARED_HOST=1 if web and worker do share one
+app.config['CACHE_VERSION_BACKEND'] = CACHE_VERSION_BACKEND
+app.config['CACHE_VERSION_SHARED_HOST'] = os.environ.get('CACHE_VERSION_SHARED_HOST', '').lower() in ('1', 'true', 'yes')
+if (app.config['CACHE_VERSION_BACKEND'] == 'file' and not app.config['CACHE_VERSION_SHARED_HOST']
+        and not DATABASE_URL.startswith('sqlite')):
+    raise RuntimeError('CACHE_VERSION_BACKEND=file cannot reach a worker on another host: set REDIS_URL '
+                       '(or CACHE_VERSION_BACKEND=redis), or CACHE_VERSION_SHARED_HOST=1 if they share one')
+# Reverse proxies in front of the app (the PaaS router: 1). request.remote_addr, which the per-IP
+# limits key on, is taken from that many X-Forwarded-For hops; without it
+# every client shares the router's address. 0 when clients connect directly (X-Forwarded-For is then ignored)
+app.config['TRUSTED_PROXY_HOPS'] = int(os.environ.get('TRUSTED_PROXY_HOPS', 1))
+if app.config['TRUSTED_PROXY_HOPS'] > 0:
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+# Stream probing normally runs in the `worker` process; web workers reload its results
+app.config['STREAM_PROBER_IN_PROCESS'] = os.environ.get('STREAM_PROBER_IN_PROCESS', '').lower() in ('1', 'true', 'yes')
+app.config['STREAM_HEALTH_REFRESH_INTERVAL'] = STREAM_HEALTH_REFRESH_INTERVAL
+# Serve live playlists through /api/stream/manifest (cached, per-user rewritten) instead of straight from origin
+app.config['STREAM_PROXY_ENABLED'] = os.environ.get('STREAM_PROXY_ENABLED', '').lower() in ('1', 'true', 'yes')
+# One engine for every model and blueprint; pool sizing and timeouts come from DB_* env vars (src/models/db.py).
+# GET traffic goes to DATABASE_REPLICA_URLS when set (src/services/replicas.py)
+init_db(app, DATABASE_URL, DATABASE_REPLICA_URLS)
+init_replicas(app, db)
+
+# Invalidate cached catalog responses whenever catalog rows are committed
+register_catalog_invalidation()
+
+# Keep the playback-start index in step with this worker's catalog commits (after the catalog hook)
+register_stream_index_invalidation()
+
+# Drop cached subscription entitlements whenever a user's payment completes
+register_entitlement_invalidation()
 
 # Function to create or update admin user (remains from previous debug)
 def create_admin_user_on_startup():
@@ -64,6 +135,36 @@ with app.app_context():
     db.create_all() # Create all database tables
     create_admin_user_on_startup() # Ensure admin user exists
 
+# Cached JWT user loader; tokens carry role / premium / claims-version claims
+init_identity(app, jwt)
+
+# Logout / revoked-token blocklist, mirrored in memory from revoked_tokens
+init_revocation(app, jwt)
+
+# HMAC-signed DRM playback tokens, cached per (user, channel, window)
+init_drm(app)
+
+# Stream liveness for /stream/link failover (and the optional in-process prober)
+init_stream_health(app)
+
+# Optional HLS manifest proxy with single-flight upstream fetches
+init_manifest_proxy(app)
+
+# Per-IP / per-email throttling of the auth endpoints
+init_rate_limiter(app)
+
+# Optional write-behind buffer for playback heartbeats
+init_watch_progress(app)
+
+# Fan-out of payment status changes to long-poll / SSE clients
+init_notifier(app, db)
+
+# Queue-backed webhook ingestion and its consumer thread
+init_webhooks(app)
+
+# Optional in-process payment reconciler (development / single-process deployments)
+init_reconciler(app)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -84,6 +185,33 @@ def serve(path):
 def health_check():
     return {'status': 'healthy', 'message': 'Burudani Backend API is running'}, 200
 
+# Pool, cache and gateway internals; admins only (CORS is open to every origin)
+@app.route('/api/metrics', methods=['GET'])
+@jwt_required()
+def metrics():
+    if get_jwt().get('role') != 'admin':
+        return {'error': 'Admin access required'}, 403
+    return {
+        'catalog_cache': catalog_cache.stats(),
+        'catalog_snapshots': snapshot_cache.stats(),
+        'watch_progress': app.extensions['watch_progress'].stats() if 'watch_progress' in app.extensions else None,
+        'payment_reconciler': app.extensions['payment_reconciler'].stats() if 'payment_reconciler' in app.extensions else None,
+        'payment_notifier': app.extensions['payment_notifier'].stats(),
+        'payment_webhooks': app.extensions['payment_webhooks'].stats(),
+        'database': app.extensions['db_pool'].stats(),
+        'replicas': app.extensions['db_replicas'].stats() if 'db_replicas' in app.extensions else None,
+        'passwords': password_hasher.stats(),
+        'rate_limiter': app.extensions['rate_limiter'].stats(),
+        'identity_cache': app.extensions['identity_cache'].stats(),
+        'entitlements': entitlement_cache.stats(),
+        'drm_tokens': app.extensions['drm_tokens'].stats(),
+        'stream_index': stream_index.stats(),
+        'stream_health': app.extensions['stream_health'].stats(),
+        'stream_prober': app.extensions['stream_prober'].stats() if 'stream_prober' in app.extensions else None,
+        'manifest_proxy': app.extensions['manifest_proxy'].stats() if 'manifest_proxy' in app.extensions else None,
+        'token_revocation': app.extensions['token_revocation'].stats()
+    }, 200
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
 
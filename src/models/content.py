@@ -1,8 +1,6 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import uuid
-
-db = SQLAlchemy()
+from src.models.db import db
 
 class Content(db.Model):
     __tablename__ = 'content'
@@ -25,36 +23,54 @@ class Content(db.Model):
     streams = db.relationship('Stream', backref='content', lazy=True, cascade='all, delete-orphan')
     categories = db.relationship('Category', secondary='content_categories', back_populates='content')
     
+    __table_args__ = (
+        # Keyset pagination (newest first) for /content and /categories/<id>/content
+        db.Index('ix_content_created_at_id', 'created_at', 'id'),
+        db.Index('ix_content_type_created_at_id', 'type', 'created_at', 'id'),
+        # Partial indexes: only the handful of flagged rows are indexed
+        db.Index('ix_content_featured', 'created_at',
+                 postgresql_where=db.text('is_featured'), sqlite_where=db.text('is_featured = 1')),
+        db.Index('ix_content_trending', 'created_at',
+                 postgresql_where=db.text('is_trending'), sqlite_where=db.text('is_trending = 1')),
+    )
+    
     def __repr__(self):
         return f'<Content {self.title}>'
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'type': self.type,
-            'thumbnail_url': self.thumbnail_url,
-            'cover_image_url': self.cover_image_url,
-            'release_date': self.release_date.isoformat() if self.release_date else None,
-            'duration': self.duration,
-            'is_premium': self.is_premium,
-            'is_featured': self.is_featured,
-            'is_trending': self.is_trending,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'categories': [category.to_dict() for category in self.categories],
-            'streams': [stream.to_dict() for stream in self.streams]
-        }
+    def to_dict(self, fields=None):
+        """Serialize the content; `fields` limits the output (and the attributes touched) to those keys"""
+        return {field: CONTENT_FIELDS[field](self) for field in (fields or CONTENT_FIELDS)}
+
+# Serializer per Content field, in response order. Projections only call the
+# ones they need, so unloaded columns and relationships are never touched.
+CONTENT_FIELDS = {
+    'id': lambda c: c.id,
+    'title': lambda c: c.title,
+    'description': lambda c: c.description,
+    'type': lambda c: c.type,
+    'thumbnail_url': lambda c: c.thumbnail_url,
+    'cover_image_url': lambda c: c.cover_image_url,
+    'release_date': lambda c: c.release_date,
+    'duration': lambda c: c.duration,
+    'is_premium': lambda c: c.is_premium,
+    'is_featured': lambda c: c.is_featured,
+    'is_trending': lambda c: c.is_trending,
+    'created_at': lambda c: c.created_at,
+    'updated_at': lambda c: c.updated_at,
+    'categories': lambda c: [category.to_dict() for category in c.categories],
+    'streams': lambda c: [stream.to_dict() for stream in c.streams],
+}
+
+CONTENT_RELATIONSHIPS = ('categories', 'streams')
 
 class Stream(db.Model):
     __tablename__ = 'streams'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    content_id = db.Column(db.String(36), db.ForeignKey('content.id'), nullable=False)
+    content_id = db.Column(db.String(36), db.ForeignKey('content.id'), nullable=False, index=True)
     stream_url = db.Column(db.Text, nullable=False)
     stream_type = db.Column(db.String(50), nullable=False)  # 'normal', 'hls', 'drm'
-    channel_id = db.Column(db.String(255))
+    channel_id = db.Column(db.String(255), index=True)
     drm_license_url = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -70,8 +86,8 @@ class Stream(db.Model):
             'stream_type': self.stream_type,
             'channel_id': self.channel_id,
             'drm_license_url': self.drm_license_url,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Category(db.Model):
@@ -94,8 +110,8 @@ class Category(db.Model):
             'id': self.id,
             'name': self.name,
             'description': self.description,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 # Junction table for many-to-many relationship between Content and Category
@@ -103,7 +119,9 @@ content_categories = db.Table('content_categories',
     db.Column('content_id', db.String(36), db.ForeignKey('content.id'), primary_key=True),
     db.Column('category_id', db.String(36), db.ForeignKey('categories.id'), primary_key=True),
     db.Column('created_at', db.DateTime, default=datetime.utcnow),
-    db.Column('updated_at', db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    db.Column('updated_at', db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow),
+    # The primary key leads with content_id; category listings need category_id first
+    db.Index('ix_content_categories_category_id', 'category_id', 'content_id')
 )
 
 class UserWatchHistory(db.Model):
@@ -117,6 +135,15 @@ class UserWatchHistory(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # One entry per (user, content); also the conflict target for progress upserts
+        # (rows created before it existed are deduplicated first, keeping the latest last_watched_at)
+        db.Index('uq_user_watch_history_user_content', 'user_id', 'content_id', unique=True,
+                 info={'dedupe_keep': 'last_watched_at'}),
+        # Keyset pagination for /user/history (most recently watched first)
+        db.Index('ix_user_watch_history_user_last_watched', 'user_id', 'last_watched_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<UserWatchHistory {self.user_id}:{self.content_id}>'
     
@@ -126,9 +153,9 @@ class UserWatchHistory(db.Model):
             'user_id': self.user_id,
             'content_id': self.content_id,
             'watched_duration': self.watched_duration,
-            'last_watched_at': self.last_watched_at.isoformat(),
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'last_watched_at': self.last_watched_at,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class UserFavorites(db.Model):
@@ -141,7 +168,11 @@ class UserFavorites(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Ensure unique user-content combination
-    __table_args__ = (db.UniqueConstraint('user_id', 'content_id', name='unique_user_content_favorite'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'content_id', name='unique_user_content_favorite'),
+        # Keyset pagination for /user/favorites
+        db.Index('ix_user_favorites_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     def __repr__(self):
         return f'<UserFavorites {self.user_id}:{self.content_id}>'
@@ -151,7 +182,7 @@ class UserFavorites(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'content_id': self.content_id,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
@@ -0,0 +1,126 @@
+# burudani_backend/src/models/db.py
+#
+# The one SQLAlchemy instance shared by every model and blueprint, and the
+# engine configuration for it. Pool sizing and timeouts come from the
+# environment so each deployment can tune them:
+#
+#   DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT   connection pool
+#   DB_POOL_RECYCLE                                 seconds before a connection is replaced
+#   DB_STATEMENT_TIMEOUT_MS                         Postgres statement_timeout (0 = off)
+#   SQLITE_BUSY_TIMEOUT_MS                          SQLite lock wait for local runs
+#
+# The pool is per process, so gunicorn's --threads (WEB_THREADS in the
+# Procfile) should not exceed DB_POOL_SIZE + DB_MAX_OVERFLOW: extra threads
+# only queue for a connection until DB_POOL_TIMEOUT. Scale out with
+# --workers (WEB_CONCURRENCY) instead, keeping workers * (pool + overflow)
+# under the database's connection limit.
+#
+# Read replicas (DATABASE_REPLICA_URLS) are registered as binds named
+# replica_<n>; RoutingSession sends a request's reads to the replica picked
+# by src/services/replicas.py and everything else to the primary.
+
+import os
+import threading
+from flask import g, has_request_context
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+class RoutingSession(Session):
+    """Session that reads from the request's replica engine, if one was chosen"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            replica = g.get('db_replica')
+            if replica is not None and not getattr(clause, 'is_dml', False):
+                return replica
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def engine_options(database_url):
+    """SQLALCHEMY_ENGINE_OPTIONS for the given URL"""
+    url = make_url(database_url)
+    options = {'pool_pre_ping': True, 'pool_recycle': DB_POOL_RECYCLE}
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # In-memory SQLite lives in a single connection; pool sizing does not apply
+            return options
+        options['connect_args'] = {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}
+    elif url.get_backend_name() == 'postgresql' and DB_STATEMENT_TIMEOUT_MS:
+        options['connect_args'] = {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'}
+    options.update({
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+    })
+    return options
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while the watch-progress/webhook threads write
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    cursor.close()
+
+class PoolMonitor:
+    """Checked-out connection counts for the engine, including the high-water mark"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.checked_out = 0
+        self.peak = 0
+        self.checkouts = 0
+        self._lock = threading.Lock()
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.peak = max(self.peak, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self):
+        pool = self.engine.pool
+        with self._lock:
+            return {
+                'engines': len(db.engines),
+                'pool': pool.__class__.__name__,
+                'pool_size': pool.size() if hasattr(pool, 'size') else None,
+                'max_overflow': getattr(pool, '_max_overflow', None),
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak,
+                'checkouts': self.checkouts,
+            }
+
+def init_db(app, database_url, replica_urls=()):
+    """Configure the primary (and any replica) engines and register them with Flask-SQLAlchemy"""
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url)
+    app.config['SQLALCHEMY_BINDS'] = {
+        f'{REPLICA_BIND_PREFIX}{i}': {'url': url, **engine_options(url)} for i, url in enumerate(replica_urls)
+    }
+    db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_pragmas)
+        app.extensions['db_pool'] = PoolMonitor(db.engine)
+    return db
@@ -1,40 +1,58 @@
 # burudani_backend/src/models/payment.py
 
 from datetime import datetime
-from uuid import uuid4
-from sqlalchemy.schema import ForeignKey
-from sqlalchemy import Integer, String, Float, DateTime, Boolean # Import types
-from .user import db # Import db from user model, assuming it's the main db instance
+from src.models.db import db
+
+# Statuses still waiting on the customer / gateway; everything else is terminal
+ACTIVE_PAYMENT_STATUSES = ('PENDING', 'INITIATED')
+
+# Allowed status changes. COMPLETED, FAILED and CANCELLED are final; EXPIRED is
+# our own timeout, so a late confirmation from Zeno still wins over it.
+PAYMENT_TRANSITIONS = {
+    'PENDING': {'INITIATED', 'COMPLETED', 'FAILED', 'CANCELLED', 'EXPIRED'},
+    'INITIATED': {'COMPLETED', 'FAILED', 'CANCELLED', 'EXPIRED'},
+    'EXPIRED': {'COMPLETED', 'FAILED', 'CANCELLED'},
+}
+
+def can_transition(current, new):
+    """True if a payment may move from `current` to `new` (rejects regressions like COMPLETED -> PENDING)"""
+    return new in PAYMENT_TRANSITIONS.get(current, ())
 
 class Payment(db.Model):
     __tablename__ = 'payments'
 
-    id = db.Column(db.Integer, primary_key=True) # SERIAL NOT NULL corresponds to Integer in SQLAlchemy
+    id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.String(100), unique=True, nullable=False)
-    
-    # FIX: Change user_id type to String to match User.id type
-    user_id = db.Column(db.String(36), ForeignKey('users.id'), nullable=False)
-    
+
+    # Matches User.id; null for guest payments
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
+
     amount = db.Column(db.Float, nullable=False)
-    currency = db.Column(db.String(3), default='TZS') # Default currency
+    currency = db.Column(db.String(3), default='TZS')
     payment_status = db.Column(db.String(20), default='PENDING') # PENDING, INITIATED, COMPLETED, FAILED, CANCELLED, EXPIRED
-    payment_method = db.Column(db.String(20), default='MOBILE_MONEY') # MOBILE_MONEY, CARD, PIN
-    
+    payment_method = db.Column(db.String(20), default='ZENO_USSD')
+
     # Buyer info from payment request
     buyer_phone = db.Column(db.String(15), nullable=False)
     buyer_email = db.Column(db.String(100), nullable=False)
     buyer_name = db.Column(db.String(100), nullable=False)
-    
+
     # ZenoPay specific fields
-    transaction_id = db.Column(db.String(100)) # ZenoPay's transid
-    reference = db.Column(db.String(100))      # ZenoPay's reference
-    channel = db.Column(db.String(20))         # e.g., MPESA-TZ, TIGO-TZ
-    
+    transaction_id = db.Column(db.String(100), nullable=True) # ZenoPay's transid
+    reference = db.Column(db.String(100), nullable=True)      # ZenoPay's reference
+    channel = db.Column(db.String(20), nullable=True)         # e.g., MPESA-TZ, TIGO-TZ
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    # Relationship to User (optional, for easier querying from Payment side)
-    user = db.relationship('User', backref='payments', lazy=True) # 'User' is class name from user.py
+    user = db.relationship('User', backref=db.backref('payments', lazy=True))
+
+    __table_args__ = (
+        # Keyset pagination for /payments/user
+        db.Index('ix_payments_user_created', 'user_id', 'created_at', 'id'),
+        # Reconciler scan of in-flight payments
+        db.Index('ix_payments_status_created', 'payment_status', 'created_at'),
+    )
 
     def __repr__(self):
         return f"<Payment {self.order_id} - {self.payment_status}>"
@@ -54,6 +72,26 @@ class Payment(db.Model):
             'transaction_id': self.transaction_id,
             'reference': self.reference,
             'channel': self.channel,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+class PaymentWebhookEvent(db.Model):
+    """A received Zeno webhook; applied to its payment by the webhook consumer"""
+    __tablename__ = 'payment_webhook_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(64), unique=True, nullable=False)
+    order_id = db.Column(db.String(100), nullable=False)
+    payment_status = db.Column(db.String(20), nullable=False)
+    reference = db.Column(db.String(100), nullable=True)
+    payload = db.Column(db.Text, nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    outcome = db.Column(db.String(20), nullable=True)  # applied, noop, rejected, unknown_order
+
+    __table_args__ = (
+        # Consumer queue: only unprocessed events are indexed
+        db.Index('ix_payment_webhook_events_pending', 'id',
+                 postgresql_where=db.text('processed_at IS NULL'), sqlite_where=db.text('processed_at IS NULL')),
+    )
@@ -0,0 +1,32 @@
+# burudani_backend/src/models/stream_health.py
+
+from datetime import datetime
+from src.models.db import db
+
+class StreamHealth(db.Model):
+    """Last probe result for a Stream's manifest, written by the stream prober"""
+    __tablename__ = 'stream_health'
+
+    stream_id = db.Column(db.String(36), db.ForeignKey('streams.id', ondelete='CASCADE'), primary_key=True)
+    healthy = db.Column(db.Boolean, nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)  # null when the origin did not answer
+    latency_ms = db.Column(db.Integer, nullable=True)
+    variants = db.Column(db.Integer, nullable=True)  # HLS master playlist variant count
+    max_bandwidth = db.Column(db.Integer, nullable=True)  # highest BANDWIDTH advertised, bits/s
+    error = db.Column(db.String(255), nullable=True)
+    checked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<StreamHealth {self.stream_id} {'up' if self.healthy else 'down'}>"
+
+    def to_dict(self):
+        return {
+            'stream_id': self.stream_id,
+            'healthy': self.healthy,
+            'status_code': self.status_code,
+            'latency_ms': self.latency_ms,
+            'variants': self.variants,
+            'max_bandwidth': self.max_bandwidth,
+            'error': self.error,
+            'checked_at': self.checked_at
+        }
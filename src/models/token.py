@@ -0,0 +1,24 @@
+# burudani_backend/src/models/token.py
+
+from datetime import datetime
+from src.models.db import db
+
+class RevokedToken(db.Model):
+    """A JWT revoked before its expiry (logout); rows past expires_at can be deleted"""
+    __tablename__ = 'revoked_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    token_type = db.Column(db.String(10), nullable=False)  # access, refresh
+    user_id = db.Column(db.String(36), nullable=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # Incremental blocklist sync and expiry purge
+        db.Index('ix_revoked_tokens_revoked_at', 'revoked_at'),
+        db.Index('ix_revoked_tokens_expires_at', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti} ({self.token_type})>'
@@ -1,11 +1,11 @@
 # burudani_backend/src/models/user.py
 
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import uuid
-import bcrypt
+from src.models.db import db
+from src.services.passwords import hash_password, verify_password, needs_rehash
 
-db = SQLAlchemy()
+ADMIN_EMAILS = {'admin@burudani.com'}
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -21,41 +21,20 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.email}>'
 
+    @property
+    def role(self):
+        return 'admin' if self.email in ADMIN_EMAILS else 'user'
+
     def set_password(self, password):
-        # Debug prints for set_password
-        print(f"DEBUG (set_password): Input password type: {type(password)}, value: '{password}'")
-        encoded_password = password.encode('utf-8')
-        print(f"DEBUG (set_password): Encoded password type: {type(encoded_password)}, value: '{encoded_password}'")
-        hashed_bytes = bcrypt.hashpw(encoded_password, bcrypt.gensalt())
-        print(f"DEBUG (set_password): Hashed bytes type: {type(hashed_bytes)}, value: '{hashed_bytes}'")
-        self.password_hash = hashed_bytes.decode('utf-8')
-        print(f"DEBUG (set_password): Stored password_hash type: {type(self.password_hash)}, value: '{self.password_hash[:20]}...'") # Print first 20 chars
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        # Debug prints for check_password
-        print(f"DEBUG (check_password): Input password type: {type(password)}, value: '{password}'")
-        print(f"DEBUG (check_password): Stored password_hash type: {type(self.password_hash)}, value: '{self.password_hash[:20]}...'") # Print first 20 chars
-
-        if not self.password_hash:
-            print("DEBUG (check_password): No password_hash stored for user.")
-            return False
-        
-        # Ensure both are bytes for bcrypt.checkpw
-        encoded_input_password = password.encode('utf-8')
-        encoded_stored_hash = self.password_hash.encode('utf-8')
-
-        print(f"DEBUG (check_password): Encoded input password: '{encoded_input_password}'")
-        print(f"DEBUG (check_password): Encoded stored hash: '{encoded_stored_hash}'")
-
-        try:
-            result = bcrypt.checkpw(encoded_input_password, encoded_stored_hash)
-            print(f"DEBUG (check_password): bcrypt.checkpw result: {result}")
-            return result
-        except ValueError as e:
-            print(f"DEBUG (check_password): ValueError during bcrypt.checkpw: {e}")
-            print("DEBUG (check_password): This often means the stored hash is malformed or not a bcrypt hash.")
+        """Verify the password; legacy hashes are upgraded in place (the caller commits)"""
+        if not verify_password(password, self.password_hash):
             return False
-
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
 
     def to_dict(self):
         return {
@@ -63,8 +42,8 @@ class User(db.Model):
             'email': self.email,
             'phone_number': self.phone_number,
             'google_id': self.google_id,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'is_admin': self.email == 'admin@burudani.com', # Added this back for frontend
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'is_admin': self.role == 'admin', # Added this back for frontend
             'username': self.email.split('@')[0] # Added this back for frontend
         }
\ No newline at end of file
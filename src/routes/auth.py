@@ -1,6 +1,8 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt, decode_token
 from src.models.user import User, db
+from src.services.identity import identity_claims
+from src.services.rate_limit import too_many_requests
 import re
 
 auth_bp = Blueprint('auth', __name__)
@@ -29,6 +31,10 @@ def register():
         if not password or len(password) < 6:
             return jsonify({'error': 'Password must be at least 6 characters long'}), 400
         
+        decision = current_app.extensions['rate_limiter'].check(('register_ip', request.remote_addr))
+        if not decision.allowed:
+            return too_many_requests(decision)
+        
         # Check if user already exists
         existing_user = User.query.filter_by(email=email).first()
         if existing_user:
@@ -60,42 +66,35 @@ def login():
     try:
         data = request.get_json()
 
-        print(f"--- Login Attempt ---") # Debug print
-        print(f"Received data: {data}") # Debug print
-
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
         email = data.get('email', '').strip().lower()
         password = data.get('password', '')
 
-        print(f"Attempting login for email: {email}") # Debug print
-        print(f"Received password: {password}") # Debug print
-
         if not email or not password:
             return jsonify({'error': 'Email and password are required'}), 400
 
+        # Throttle before the user lookup and bcrypt check
+        decision = current_app.extensions['rate_limiter'].check(('login_ip', request.remote_addr), ('login_email', email))
+        if not decision.allowed:
+            return too_many_requests(decision)
+
         # Find user
         user = User.query.filter_by(email=email).first()
 
         if not user:
-            print(f"User with email {email} not found in DB.") # Debug print
             return jsonify({'error': 'Invalid email or password'}), 401
         
-        print(f"User found: {user.email}") # Debug print
-        # Note: Do NOT print the full password hash or actual password in production!
-        # This is for debugging only.
-        print(f"Stored password hash (first 10 chars): {user.password_hash[:10]}...") # Debug print
-        
-        # This is the critical line: check_password
+        # Runs on the bcrypt pool; a legacy werkzeug hash is replaced with bcrypt on success
         if not user.check_password(password):
-            print(f"Password check failed for user {user.email}.") # Debug print
             return jsonify({'error': 'Invalid email or password'}), 401
         
-        print(f"Password check successful for user {user.email}!") # Debug print
+        if db.session.is_modified(user):
+            db.session.commit()
         
         # Create tokens
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=identity_claims(user))
         refresh_token = create_refresh_token(identity=user.id)
         
         return jsonify({
@@ -139,7 +138,7 @@ def google_login():
             db.session.commit()
         
         # Create tokens
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=identity_claims(user))
         refresh_token = create_refresh_token(identity=user.id)
         
         return jsonify({
@@ -157,7 +156,11 @@ def google_login():
 def refresh():
     try:
         current_user_id = get_jwt_identity()
-        new_token = create_access_token(identity=current_user_id)
+        # Claims are re-read from the database so refreshed tokens pick up role/premium changes
+        user = User.query.get(current_user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        new_token = create_access_token(identity=current_user_id, additional_claims=identity_claims(user))
         
         return jsonify({
             'access_token': new_token
@@ -166,6 +169,31 @@ def refresh():
     except Exception as e:
         return jsonify({'error': f'Token refresh failed: {str(e)}'}), 500
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Revoke the presented token, and the session's refresh token if the client sends it"""
+    try:
+        revocations = current_app.extensions['token_revocation']
+        revocations.revoke(get_jwt())
+        
+        data = request.get_json(silent=True) or {}
+        if data.get('refresh_token'):
+            try:
+                refresh_payload = decode_token(data['refresh_token'])
+            except Exception:
+                return jsonify({'error': 'Invalid refresh token'}), 400
+            if refresh_payload.get('sub') != get_jwt_identity():
+                return jsonify({'error': 'Refresh token belongs to another user'}), 403
+            revocations.revoke(refresh_payload)
+        
+        db.session.commit()
+        return jsonify({'message': 'Logged out successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Logout failed: {str(e)}'}), 500
+
 @auth_bp.route('/forgot-password', methods=['POST'])
 def forgot_password():
     try:
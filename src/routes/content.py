@@ -1,22 +1,37 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.content import Content, Stream, Category, UserWatchHistory, UserFavorites, db
+from src.services.catalog import content_query, cached_catalog
+from src.services.pagination import encode_cursor, decode_cursor, wants_cursor, wants_total, keyset_paginate, page_size
+from src.services.search import search_content_ids, MAX_UNPAGINATED_RESULTS
+from src.services.snapshots import catalog_snapshot, FIELD_ARGS, PAGE_ARGS
+from src.services.projection import requested_fields
 from sqlalchemy import or_, and_
 
 content_bp = Blueprint('content', __name__)
 
 @content_bp.route('/content', methods=['GET'])
 @jwt_required()
+@catalog_snapshot('type', 'category_id', 'page', *PAGE_ARGS, *FIELD_ARGS)
 def get_content():
     try:
         # Get query parameters
         content_type = request.args.get('type')
         category_id = request.args.get('category_id')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
+        
+        try:
+            page = max(1, int(request.args.get('page', 1)))
+        except ValueError:
+            return jsonify({'error': 'page must be an integer'}), 400
+        
+        try:
+            per_page = page_size(request.args)
+            fields = requested_fields(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Build query
-        query = Content.query
+        query = content_query(fields=fields)
         
         if content_type:
             query = query.filter(Content.type == content_type)
@@ -24,6 +39,24 @@ def get_content():
         if category_id:
             query = query.join(Content.categories).filter(Category.id == category_id)
         
+        # Keyset mode: newest first, no COUNT(*) unless the client asks for it
+        if wants_cursor(request.args):
+            try:
+                items, next_cursor = keyset_paginate(
+                    query, Content.created_at, Content.id, request.args.get('cursor'), per_page
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            response = {
+                'content': [content.to_dict(fields) for content in items],
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if wants_total(request.args):
+                response['total'] = query.order_by(None).count()
+            return jsonify(response), 200
+        
         # Paginate results
         content_list = query.paginate(
             page=page, 
@@ -32,7 +65,7 @@ def get_content():
         )
         
         return jsonify({
-            'content': [content.to_dict() for content in content_list.items],
+            'content': [content.to_dict(fields) for content in content_list.items],
             'total': content_list.total,
             'pages': content_list.pages,
             'current_page': page,
@@ -44,30 +77,54 @@ def get_content():
 
 @content_bp.route('/content/<content_id>', methods=['GET'])
 @jwt_required()
+@catalog_snapshot(*FIELD_ARGS)
 def get_content_by_id(content_id):
     try:
-        content = Content.query.get_or_404(content_id)
-        return jsonify(content.to_dict()), 200
+        fields = requested_fields(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        content = content_query('joined', fields).get_or_404(content_id)
+        return jsonify(content.to_dict(fields)), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch content: {str(e)}'}), 500
 
 @content_bp.route('/content/featured', methods=['GET'])
 @jwt_required()
+@catalog_snapshot(*FIELD_ARGS)
 def get_featured_content():
     try:
-        featured_content = Content.query.filter(Content.is_featured == True).all()
-        return jsonify([content.to_dict() for content in featured_content]), 200
+        fields = requested_fields(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        featured_content = cached_catalog(('featured', fields), lambda: [
+            content.to_dict(fields)
+            for content in content_query(fields=fields).filter(Content.is_featured == True).order_by(Content.created_at.desc())
+        ])
+        return jsonify(featured_content), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch featured content: {str(e)}'}), 500
 
 @content_bp.route('/content/trending', methods=['GET'])
 @jwt_required()
+@catalog_snapshot(*FIELD_ARGS)
 def get_trending_content():
     try:
-        trending_content = Content.query.filter(Content.is_trending == True).all()
-        return jsonify([content.to_dict() for content in trending_content]), 200
+        fields = requested_fields(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        trending_content = cached_catalog(('trending', fields), lambda: [
+            content.to_dict(fields)
+            for content in content_query(fields=fields).filter(Content.is_trending == True).order_by(Content.created_at.desc())
+        ])
+        return jsonify(trending_content), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch trending content: {str(e)}'}), 500
@@ -81,39 +138,97 @@ def search_content():
         if not query_param:
             return jsonify({'error': 'Search query is required'}), 400
         
-        # Search in title and description
-        search_results = Content.query.filter(
-            or_(
-                Content.title.ilike(f'%{query_param}%'),
-                Content.description.ilike(f'%{query_param}%')
-            )
-        ).all()
+        try:
+            fields = requested_fields(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Clients that pass per_page or cursor get a paginated envelope, others the legacy list
+        cursor = request.args.get('cursor')
+        paginated = cursor is not None or 'per_page' in request.args
+        
+        try:
+            per_page = page_size(request.args) if paginated else MAX_UNPAGINATED_RESULTS
+            after = decode_cursor(cursor, 2) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Ranked ids from the full-text index, then one query for the rows themselves
+        ranked = search_content_ids(query_param, per_page + 1, after)
+        page_ids = ranked[:per_page]
+        rows = {
+            content.id: content
+            for content in content_query(fields=fields).filter(Content.id.in_([content_id for content_id, _ in page_ids]))
+        }
+        search_results = [rows[content_id].to_dict(fields) for content_id, _ in page_ids if content_id in rows]
+        
+        if not paginated:
+            return jsonify(search_results), 200
+        
+        next_cursor = None
+        if len(ranked) > per_page:
+            last_id, last_score = page_ids[-1]
+            next_cursor = encode_cursor(last_score, last_id)
         
-        return jsonify([content.to_dict() for content in search_results]), 200
+        return jsonify({
+            'content': search_results,
+            'next_cursor': next_cursor,
+            'per_page': per_page
+        }), 200
         
     except Exception as e:
         return jsonify({'error': f'Search failed: {str(e)}'}), 500
 
 @content_bp.route('/categories', methods=['GET'])
 @jwt_required()
+@catalog_snapshot()
 def get_categories():
     try:
-        categories = Category.query.all()
-        return jsonify([category.to_dict() for category in categories]), 200
+        categories = cached_catalog('categories', lambda: [
+            category.to_dict() for category in Category.query.all()
+        ])
+        return jsonify(categories), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch categories: {str(e)}'}), 500
 
 @content_bp.route('/categories/<category_id>/content', methods=['GET'])
 @jwt_required()
+@catalog_snapshot(*PAGE_ARGS, *FIELD_ARGS)
 def get_content_by_category(category_id):
     try:
         category = Category.query.get_or_404(category_id)
-        content_list = category.content
+        try:
+            fields = requested_fields(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = content_query(fields=fields).join(Content.categories).filter(Category.id == category_id)
+        
+        if wants_cursor(request.args):
+            try:
+                per_page = page_size(request.args)
+                content_list, next_cursor = keyset_paginate(
+                    query, Content.created_at, Content.id, request.args.get('cursor'), per_page
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            response = {
+                'category': category.to_dict(),
+                'content': [content.to_dict(fields) for content in content_list],
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if wants_total(request.args):
+                response['total'] = query.order_by(None).count()
+            return jsonify(response), 200
+        
+        content_list = query.all()
         
         return jsonify({
             'category': category.to_dict(),
-            'content': [content.to_dict() for content in content_list]
+            'content': [content.to_dict(fields) for content in content_list]
         }), 200
         
     except Exception as e:
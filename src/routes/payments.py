@@ -1,68 +1,55 @@
 # burudani_backend/src/routes/payments_fixed.py
 
+import hashlib
 import os
+import threading
+import time
 import uuid
-import requests
-from datetime import datetime
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
-from src.models.user import db, User
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request, current_user
+from src.models.user import db
+from src.models.payment import Payment, ACTIVE_PAYMENT_STATUSES
+from src.services.pagination import wants_cursor, wants_total, keyset_paginate, page_size
+from src.services.zeno_client import ZENO_API_KEY, GatewayError, CircuitOpenError, get_zeno_client
+from src.services.notifier import get_notifier, notify_payment
+from src.services.replicas import primary_reads
 
 payments_bp = Blueprint('payments', __name__)
 
-# Zeno API Configuration - Use environment variable for production
-ZENO_API_KEY = os.environ.get('ZENO_API_KEY', 'ELyri3n4iLR6nqwixrwkjefTBFuxHSWlbho-esVC4fHYrQeZ4fKlOXa91MVrPfjI3nAYvmZO842Nle37tsK3lw')
-ZENO_API_URL = "https://zenoapi.com/api/payments/mobile_money_tanzania"
-ZENO_ORDER_STATUS_URL = "https://zenoapi.com/api/payments/order-status"
+# Background threads for gateway calls handed off by /payments/initiate (async mode)
+ZENO_MAX_INFLIGHT = int(os.environ.get('ZENO_MAX_INFLIGHT', 8))
+# Hand-offs accepted at once (running plus waiting); beyond this async initiations get 503
+ZENO_MAX_QUEUED = int(os.environ.get('ZENO_MAX_QUEUED', ZENO_MAX_INFLIGHT * 4))
+gateway_executor = ThreadPoolExecutor(max_workers=ZENO_MAX_INFLIGHT, thread_name_prefix='zeno')
+# The executor's own work queue is unbounded; a slot is taken per hand-off and freed when it finishes
+gateway_slots = threading.BoundedSemaphore(ZENO_MAX_QUEUED)
 
-# Payment model (you might want to create a separate model file for this)
-class Payment(db.Model):
-    __tablename__ = 'payments'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.String(100), unique=True, nullable=False)
-    user_id = db.Column(db.String, db.ForeignKey('users.id'), nullable=True)  # Allow null for guest payments
-    amount = db.Column(db.Float, nullable=False)
-    currency = db.Column(db.String(3), default='TZS')
-    payment_status = db.Column(db.String(20), default='PENDING')
-    payment_method = db.Column(db.String(20), default='ZENO_USSD')
-    buyer_phone = db.Column(db.String(15), nullable=False)
-    buyer_email = db.Column(db.String(100), nullable=False)
-    buyer_name = db.Column(db.String(100), nullable=False)
-    transaction_id = db.Column(db.String(100), nullable=True)
-    reference = db.Column(db.String(100), nullable=True)
-    channel = db.Column(db.String(20), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Relationship
-    user = db.relationship('User', backref=db.backref('payments', lazy=True))
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'order_id': self.order_id,
-            'user_id': self.user_id,
-            'amount': self.amount,
-            'currency': self.currency,
-            'payment_status': self.payment_status,
-            'payment_method': self.payment_method,
-            'buyer_phone': self.buyer_phone,
-            'buyer_email': self.buyer_email,
-            'buyer_name': self.buyer_name,
-            'transaction_id': self.transaction_id,
-            'reference': self.reference,
-            'channel': self.channel,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+# Push channel limits: long-poll wait, SSE stream lifetime and keep-alive interval (seconds)
+PAYMENT_WAIT_TIMEOUT = float(os.environ.get('PAYMENT_WAIT_TIMEOUT', 25))
+PAYMENT_EVENTS_MAX_DURATION = float(os.environ.get('PAYMENT_EVENTS_MAX_DURATION', 300))
+PAYMENT_EVENTS_HEARTBEAT = float(os.environ.get('PAYMENT_EVENTS_HEARTBEAT', 15))
+# Each open SSE stream holds a worker thread for up to PAYMENT_EVENTS_MAX_DURATION; past this many
+# per worker, /events answers 503 and clients fall back to /wait (which frees the thread every 25 s)
+PAYMENT_EVENTS_MAX_STREAMS = int(os.environ.get('PAYMENT_EVENTS_MAX_STREAMS', 8))
+PAYMENT_EVENTS_RETRY_AFTER = int(os.environ.get('PAYMENT_EVENTS_RETRY_AFTER', 5))
+event_stream_slots = threading.BoundedSemaphore(PAYMENT_EVENTS_MAX_STREAMS)
+
+def webhook_idempotency_key(data, header=None):
+    """Zeno's event id when it sends one, else a digest of what the webhook asserts"""
+    if header:
+        return header[:64]
+    if data.get('event_id'):
+        return str(data['event_id'])[:64]
+    identity = f"{data['order_id']}|{data.get('payment_status')}|{data.get('reference') or ''}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
 
 def get_current_user():
     """Helper function to get current user, handling both authenticated and guest users"""
     try:
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        return User.query.get(user_id), user_id
+        # current_user is the identity loader's cached snapshot, not a User row
+        return current_user, get_jwt_identity()
     except:
         # No valid JWT token, treat as guest user
         return None, None
@@ -70,6 +57,7 @@ def get_current_user():
 @payments_bp.route('/payments/initiate', methods=['POST'])
 def initiate_payment():
     """Initiate a Zeno PUSH USSD payment - works for both authenticated and guest users"""
+    slot_held = False
     try:
         # Get current user if authenticated, otherwise proceed as guest
         user, current_user_id = get_current_user()
@@ -82,6 +70,12 @@ def initiate_payment():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
+        # Refuse async hand-offs up front (before a payment row exists) when the gateway backlog is full
+        if data.get('async'):
+            if not gateway_slots.acquire(blocking=False):
+                return jsonify({'success': False, 'error': 'Payment gateway is busy, please retry shortly'}), 503
+            slot_held = True
+        
         # Generate unique order ID
         order_id = str(uuid.uuid4())
         
@@ -117,44 +111,51 @@ def initiate_payment():
         db.session.add(payment)
         db.session.commit()
         
-        # Make request to Zeno API
-        headers = {
-            "x-api-key": ZENO_API_KEY,
-            "Content-Type": "application/json"
-        }
-        
-        print(f"Making Zeno API request with data: {payment_data}")
-        print(f"Using API key: {ZENO_API_KEY[:10]}...")
+        # Hand the gateway call to a background thread so the worker is free immediately;
+        # the client learns the outcome from /payments/status/<order_id>
+        if data.get('async'):
+            gateway_executor.submit(_initiate_in_background, current_app._get_current_object(), order_id, payment_data)
+            slot_held = False  # released by the background call
+            return jsonify({
+                'success': True,
+                'message': 'Payment initiation queued',
+                'order_id': order_id,
+                'payment': payment.to_dict()
+            }), 202
         
-        response = requests.post(
-            ZENO_API_URL,
-            headers=headers,
-            json=payment_data,
-            timeout=60
-        )
+        try:
+            response = get_zeno_client().initiate(payment_data)
+        except CircuitOpenError as e:
+            # Nothing was sent to Zeno, the payment cannot proceed
+            payment.payment_status = 'FAILED'
+            db.session.commit()
+            notify_payment(payment)
+            return jsonify({'success': False, 'error': str(e)}), 503
+        except GatewayError as e:
+            # Zeno may still have received the request; leave the payment PENDING
+            print(f"Zeno initiation for {order_id} did not complete: {str(e)}")
+            return jsonify({
+                'success': False,
+                'error': 'Payment gateway did not respond in time',
+                'order_id': order_id,
+                'payment': payment.to_dict()
+            }), 504
         
         print(f"Zeno API response status: {response.status_code}")
-        print(f"Zeno API response text: {response.text}")
         
-        if response.status_code == 200:
-            zeno_response = response.json()
-            
-            # Update payment record with Zeno response
-            payment.payment_status = 'INITIATED'
-            db.session.commit()
-            
+        _apply_initiation_response(payment, response)
+        db.session.commit()
+        notify_payment(payment)
+        
+        if response.ok:
             return jsonify({
                 'success': True,
                 'message': 'Payment initiated successfully',
                 'order_id': order_id,
-                'zeno_response': zeno_response,
+                'zeno_response': response.json(),
                 'payment': payment.to_dict()
             }), 200
         else:
-            # Update payment status to failed
-            payment.payment_status = 'FAILED'
-            db.session.commit()
-            
             return jsonify({
                 'success': False,
                 'error': 'Failed to initiate payment with Zeno',
@@ -163,68 +164,184 @@ def initiate_payment():
             }), 400
             
     except Exception as e:
+        if slot_held:
+            gateway_slots.release()
         db.session.rollback()
         print(f"Payment initiation error: {str(e)}")
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+def _apply_initiation_response(payment, response):
+    """Record the outcome of a Zeno initiation call on the payment"""
+    payment.payment_status = 'INITIATED' if response.ok else 'FAILED'
+
+def _initiate_in_background(app, order_id, payment_data):
+    """Run the Zeno initiation call off the request thread and store the outcome"""
+    with app.app_context():
+        try:
+            payment = Payment.query.filter_by(order_id=order_id).first()
+            try:
+                response = get_zeno_client().initiate(payment_data)
+            except CircuitOpenError:
+                payment.payment_status = 'FAILED'
+            except GatewayError as e:
+                print(f"Zeno initiation for {order_id} did not complete: {str(e)}")
+                return
+            else:
+                _apply_initiation_response(payment, response)
+            db.session.commit()
+            notify_payment(payment)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Background payment initiation error for {order_id}: {str(e)}")
+        finally:
+            db.session.remove()
+            gateway_slots.release()
+
+def find_payment(order_id, current_user_id):
+    """Payment visible to the caller: their own when authenticated, by order_id for guests"""
+    if current_user_id:
+        return Payment.query.filter_by(order_id=order_id, user_id=current_user_id).first()
+    # For guest users, find by order_id only
+    return Payment.query.filter_by(order_id=order_id).first()
+
 @payments_bp.route('/payments/status/<order_id>', methods=['GET'])
+@primary_reads
 def check_payment_status(order_id):
-    """Check payment status from both local database and Zeno API - works for both authenticated and guest users"""
+    """Check payment status from the local database - works for both authenticated and guest users"""
     try:
         user, current_user_id = get_current_user()
         
-        # Get payment from local database
-        if current_user_id:
-            payment = Payment.query.filter_by(order_id=order_id, user_id=current_user_id).first()
-        else:
-            # For guest users, find by order_id only
-            payment = Payment.query.filter_by(order_id=order_id).first()
-        
+        payment = find_payment(order_id, current_user_id)
         if not payment:
             return jsonify({'error': 'Payment not found'}), 404
         
-        # Check status from Zeno API
-        headers = {
-            "x-api-key": ZENO_API_KEY
-        }
-        
-        response = requests.get(
-            f"{ZENO_ORDER_STATUS_URL}?order_id={order_id}",
-            headers=headers,
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            zeno_response = response.json()
+        # Answered from the local row; the reconciler worker and the webhook keep it current
+        return jsonify({
+            'success': True,
+            'payment': payment.to_dict()
+        }), 200
             
-            # Update local payment record if status changed
-            if 'data' in zeno_response and zeno_response['data']:
-                payment_data = zeno_response['data'][0]
-                
-                if payment_data.get('payment_status') != payment.payment_status:
-                    payment.payment_status = payment_data.get('payment_status', payment.payment_status)
-                    payment.transaction_id = payment_data.get('transid')
-                    payment.reference = payment_data.get('reference')
-                    payment.channel = payment_data.get('channel')
-                    payment.updated_at = datetime.utcnow()
-                    db.session.commit()
+    except Exception as e:
+        print(f"Payment status check error: {str(e)}")
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@payments_bp.route('/payments/status/<order_id>/wait', methods=['GET'])
+@primary_reads
+def wait_for_payment_status(order_id):
+    """Long-poll: return as soon as the payment status differs from `since`, or after `timeout` seconds.
+
+    Without `since` it returns immediately for a terminal payment and
+    otherwise waits for the next status change.
+    """
+    try:
+        timeout = min(float(request.args.get('timeout', PAYMENT_WAIT_TIMEOUT)), PAYMENT_WAIT_TIMEOUT)
+    except ValueError:
+        return jsonify({'error': 'timeout must be a number'}), 400
+    
+    try:
+        user, current_user_id = get_current_user()
+        since = request.args.get('since')
+        
+        # Subscribe before reading the row so a change in between is not missed
+        with get_notifier().subscribe(order_id) as subscription:
+            payment = find_payment(order_id, current_user_id)
+            if not payment:
+                return jsonify({'error': 'Payment not found'}), 404
             
-            return jsonify({
-                'success': True,
-                'payment': payment.to_dict(),
-                'zeno_response': zeno_response
-            }), 200
-        else:
-            return jsonify({
-                'success': True,
-                'payment': payment.to_dict(),
-                'zeno_error': response.text
-            }), 200
+            status = payment.payment_status
+            if (since is not None and status != since) or (since is None and status not in ACTIVE_PAYMENT_STATUSES):
+                return jsonify({'success': True, 'changed': since is not None, 'payment': payment.to_dict()}), 200
             
+            # Give the connection back to the pool while we wait
+            db.session.close()
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                message = subscription.get(remaining) if remaining > 0 else None
+                if message is None or message['payment_status'] != status:
+                    break
+        
+        payment = find_payment(order_id, current_user_id).to_dict()
+        if message is not None and payment['payment_status'] == status:
+            # The notification is published after the commit; trust it over a row read too early
+            payment['payment_status'] = message['payment_status']
+        return jsonify({
+            'success': True,
+            'changed': payment['payment_status'] != status,
+            'payment': payment
+        }), 200
+        
     except Exception as e:
-        print(f"Payment status check error: {str(e)}")
+        print(f"Payment status wait error: {str(e)}")
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+@payments_bp.route('/payments/status/<order_id>/events', methods=['GET'])
+@primary_reads
+def payment_status_events(order_id):
+    """Server-Sent Events stream of status changes; closes once the payment is terminal"""
+    if not event_stream_slots.acquire(blocking=False):
+        response = jsonify({
+            'error': 'Too many open status streams, long-poll the wait URL instead',
+            'wait_url': url_for('payments.wait_for_payment_status', order_id=order_id)
+        })
+        response.headers['Retry-After'] = str(PAYMENT_EVENTS_RETRY_AFTER)
+        return response, 503
+    try:
+        user, current_user_id = get_current_user()
+        subscription = get_notifier().subscribe(order_id)
+        payment = find_payment(order_id, current_user_id)
+    except Exception:
+        event_stream_slots.release()
+        raise
+    if not payment:
+        subscription.close()
+        event_stream_slots.release()
+        return jsonify({'error': 'Payment not found'}), 404
+    initial = payment.to_dict()
+    db.session.close()
+    
+    def stream():
+        try:
+            status = initial['payment_status']
+            yield _sse('status', initial)
+            deadline = time.monotonic() + PAYMENT_EVENTS_MAX_DURATION
+            while status in ACTIVE_PAYMENT_STATUSES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                message = subscription.get(min(PAYMENT_EVENTS_HEARTBEAT, remaining))
+                if message is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                if message['payment_status'] == status:
+                    continue
+                payment = find_payment(order_id, current_user_id).to_dict()
+                db.session.close()
+                if payment['payment_status'] == status:
+                    # The notification is published after the commit; trust it over a row read too early
+                    payment['payment_status'] = message['payment_status']
+                status = payment['payment_status']
+                yield _sse('status', payment)
+        finally:
+            subscription.close()
+    
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs when the server closes the response, even if the client left before the stream started
+    released = threading.Event()
+    def release_slot():
+        if not released.is_set():
+            released.set()
+            event_stream_slots.release()
+    response.call_on_close(release_slot)
+    response.call_on_close(subscription.close)
+    return response
+
 @payments_bp.route('/payments/webhook', methods=['POST'])
 def payment_webhook():
     """Handle Zeno payment webhook notifications"""
@@ -236,38 +353,19 @@ def payment_webhook():
         
         data = request.get_json()
         
-        if not data or 'order_id' not in data:
+        if not data or 'order_id' not in data or not data.get('payment_status'):
             return jsonify({'error': 'Invalid webhook payload'}), 400
         
-        order_id = data['order_id']
-        payment_status = data.get('payment_status', 'UNKNOWN')
-        reference = data.get('reference')
-        metadata = data.get('metadata', {})
-        
-        # Find and update payment record
-        payment = Payment.query.filter_by(order_id=order_id).first()
+        # Record the event and return; the webhook consumer applies it to the payment.
+        # Retries and duplicates share an idempotency key and are acknowledged without a second write.
+        queue = current_app.extensions['payment_webhooks']
+        created = queue.record(data, webhook_idempotency_key(data, request.headers.get('Idempotency-Key')))
         
-        if payment:
-            payment.payment_status = payment_status
-            payment.reference = reference
-            payment.updated_at = datetime.utcnow()
-            
-            # Store metadata if needed
-            if metadata:
-                # You might want to add a metadata column to store this
-                pass
-            
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'Webhook processed successfully'
-            }), 200
-        else:
-            return jsonify({
-                'error': 'Payment not found',
-                'order_id': order_id
-            }), 404
+        return jsonify({
+            'success': True,
+            'message': 'Webhook accepted' if created else 'Duplicate webhook ignored',
+            'duplicate': not created
+        }), 200
             
     except Exception as e:
         return jsonify({'error': f'Webhook processing error: {str(e)}'}), 500
@@ -279,7 +377,28 @@ def get_user_payments():
     try:
         current_user_id = get_jwt_identity()
         
-        payments = Payment.query.filter_by(user_id=current_user_id).order_by(Payment.created_at.desc()).all()
+        query = Payment.query.filter_by(user_id=current_user_id)
+        
+        if wants_cursor(request.args):
+            try:
+                per_page = page_size(request.args)
+                payments, next_cursor = keyset_paginate(
+                    query, Payment.created_at, Payment.id, request.args.get('cursor'), per_page
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            response = {
+                'success': True,
+                'payments': [payment.to_dict() for payment in payments],
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if wants_total(request.args):
+                response['total'] = query.count()
+            return jsonify(response), 200
+        
+        payments = query.order_by(Payment.created_at.desc()).all()
         
         return jsonify({
             'success': True,
@@ -1,34 +1,40 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models.content import Content, Stream, db
-import hashlib
-import time
-import json
+from flask import Blueprint, current_app, jsonify, request, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from src.services.catalog import get_content
+from src.services.drm import InvalidDrmToken, get_drm_issuer
+from src.services.entitlements import get_entitlement
+from src.services.identity import load_user
+from src.services.manifest_proxy import UpstreamError
+from src.services.projection import requested_fields
+from src.services.replicas import replica_reads
+from src.services.stream_index import stream_index
+from urllib.parse import urljoin
 
 streaming_bp = Blueprint('streaming', __name__)
 
-def generate_mock_drm_token(stream_url, channel_id, user_id):
-    """Generate a mock DRM token based on the provided parameters"""
-    # Create a hash based on the input parameters and current time
-    token_data = f"{stream_url}:{channel_id}:{user_id}:{int(time.time() // 300)}"  # 5-minute window
-    token_hash = hashlib.sha256(token_data.encode()).hexdigest()
-    
-    # Create a mock token structure similar to what might be expected
-    mock_token = {
-        'token': f"nv-auth-{token_hash[:32]}",
-        'expires_at': int(time.time()) + 3600,  # 1 hour from now
-        'license_url': 'https://azy4sj9b.anycast.nagra.com/TENANTID/wvls/contentlicenseservice/v1/licenses',
-        'headers': {
-            'nv-authorizations': f"nv-auth-{token_hash[:32]}",
-            'Referer': 'app.burudanimax.com',
-            'User-Agent': 'BurudaniApp/1.0.0'
-        }
-    }
-    
-    return mock_token
+# Upper bound on ids accepted by /stream/links
+MAX_BATCH_LINKS = 100
+
+def has_premium_access(user_id):
+    """Admins and users with an active subscription may play premium content"""
+    return get_jwt().get('role') == 'admin' or get_entitlement(user_id).premium
+
+def premium_access_denied(is_premium, user_id):
+    """403 response for premium content without an active subscription, else None"""
+    if not is_premium or has_premium_access(user_id):
+        return None
+    return jsonify({
+        'valid': False,
+        'error': 'An active subscription is required for this content'
+    }), 403
+
+def manifest_url(channel_id, token):
+    """Proxied playlist URL for the channel (only when STREAM_PROXY_ENABLED)"""
+    return url_for('streaming.get_stream_manifest', channel_id=channel_id, token=token)
 
 @streaming_bp.route('/stream/link', methods=['POST'])
 @jwt_required()
+@replica_reads
 def get_stream_link():
     try:
         current_user_id = get_jwt_identity()
@@ -43,40 +49,181 @@ def get_stream_link():
         if not content_id and not channel_id:
             return jsonify({'error': 'content_id or channel_id is required'}), 400
         
-        # If channel_id is provided, try to find content by channel_id in streams
+        # Resolved from the in-memory stream index; no queries once an entry is warm
         if channel_id and not content_id:
-            stream = Stream.query.filter_by(channel_id=channel_id).first()
-            if stream:
-                content_id = stream.content_id
+            content_id = stream_index.content_for_channel(channel_id)
         
         if not content_id:
             return jsonify({'error': 'Content not found'}), 404
         
-        # Get content and its streams
-        content = Content.query.get(content_id)
-        if not content:
+        entry = stream_index.by_content(content_id)
+        if not entry:
             return jsonify({'error': 'Content not found'}), 404
         
-        # Get the primary stream (first one for now)
-        stream = Stream.query.filter_by(content_id=content_id).first()
-        if not stream:
+        denied = premium_access_denied(entry.is_premium, current_user_id)
+        if denied:
+            return denied
+        
+        if not entry.links:
             return jsonify({'error': 'No stream available for this content'}), 404
         
-        # Simulate the API response structure from the tutorial
-        response_data = {
-            'streamURLAndroid': stream.stream_url,
-            'stream_type': stream.stream_type,
-            'channel_id': stream.channel_id or content_id,
-            'content': content.to_dict()
-        }
+        # First stream the prober has not found down (in-memory health, no I/O)
+        link = entry.healthy_link(current_app.extensions['stream_health'].is_down)
+        if link is None:
+            return jsonify({'error': 'All streams for this content are currently unavailable'}), 503
         
-        return jsonify(response_data), 200
+        if 'manifest_proxy' in current_app.extensions:
+            token = get_drm_issuer().issue(current_user_id, link['channel_id'])['token']
+            link = {**link, 'manifest_url': manifest_url(link['channel_id'], token)}
+        
+        return jsonify(link), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to get stream link: {str(e)}'}), 500
 
+@streaming_bp.route('/stream/links', methods=['POST'])
+@jwt_required()
+@replica_reads
+def get_stream_links():
+    """Stream links with DRM token parameters for many channels/contents at once (channel-grid preload)"""
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        channel_ids = data.get('channel_ids') or []
+        content_ids = data.get('content_ids') or []
+        if not isinstance(channel_ids, list) or not isinstance(content_ids, list):
+            return jsonify({'error': 'channel_ids and content_ids must be lists'}), 400
+        
+        if not channel_ids and not content_ids:
+            return jsonify({'error': 'channel_ids or content_ids is required'}), 400
+        
+        if len(channel_ids) + len(content_ids) > MAX_BATCH_LINKS:
+            return jsonify({'error': f'At most {MAX_BATCH_LINKS} ids per request'}), 400
+        
+        channels, entries = stream_index.resolve_many(content_ids, channel_ids)
+        is_down = current_app.extensions['stream_health'].is_down
+        issuer = get_drm_issuer()
+        proxied = 'manifest_proxy' in current_app.extensions
+        premium_access = None
+        
+        links = []
+        requested = [('channel_id', channel_id, channels.get(channel_id)) for channel_id in channel_ids]
+        requested += [('content_id', content_id, content_id) for content_id in content_ids]
+        for key, requested_id, content_id in requested:
+            entry = entries.get(content_id) if content_id else None
+            if not entry:
+                links.append({key: requested_id, 'error': 'Content not found'})
+                continue
+            if not entry.links:
+                links.append({key: requested_id, 'error': 'No stream available for this content'})
+                continue
+            link = entry.healthy_link(is_down)
+            if link is None:
+                links.append({key: requested_id, 'error': 'All streams for this content are currently unavailable'})
+                continue
+            if entry.is_premium:
+                if premium_access is None:
+                    premium_access = has_premium_access(current_user_id)
+                if not premium_access:
+                    links.append({key: requested_id, 'error': 'An active subscription is required for this content'})
+                    continue
+            drm = issuer.issue(current_user_id, link['channel_id'])
+            item = {
+                key: requested_id,
+                **link,
+                'drm': {
+                    'token': drm['token'],
+                    'expires_at': drm['expires_at'],
+                    'license_url': drm['license_url']
+                }
+            }
+            if proxied:
+                item['manifest_url'] = manifest_url(link['channel_id'], drm['token'])
+            links.append(item)
+        
+        # Everything is resolved up front; only the serialization is streamed
+        dumps = current_app.json.dumps
+        def generate():
+            yield '{"links":['
+            for i, link in enumerate(links):
+                yield (',' if i else '') + dumps(link)
+            yield ']}'
+        
+        return current_app.response_class(generate(), mimetype='application/json')
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to get stream links: {str(e)}'}), 500
+
+@streaming_bp.route('/stream/manifest/<channel_id>/index.m3u8', methods=['GET'])
+@replica_reads
+def get_stream_manifest(channel_id):
+    """Channel playlist through the manifest proxy, rewritten with the viewer's DRM token.
+    
+    Authenticated by the DRM token in the query string (players cannot send a
+    bearer header to every playlist URL); child playlists are served by this
+    same route with the upstream URL in `u`.
+    """
+    proxy = current_app.extensions.get('manifest_proxy')
+    if proxy is None:
+        return jsonify({'error': 'Manifest proxy is not enabled'}), 404
+    
+    try:
+        issuer = get_drm_issuer()
+        upstream_url = request.args.get('u')
+        try:
+            # Only child playlists, which players keep polling, get the leeway
+            leeway = proxy.token_leeway if upstream_url else 0
+            user_id, token_channel_id, _ = issuer.verify(request.args.get('token', ''), leeway=leeway)
+        except InvalidDrmToken as e:
+            return jsonify({'error': str(e)}), 401
+        if token_channel_id != channel_id:
+            return jsonify({'error': 'Token is not valid for this channel'}), 403
+        
+        # channel_id is a stream's channel_id, or the content id for streams without one
+        entry = stream_index.by_content(stream_index.content_for_channel(channel_id) or channel_id)
+        if not entry or not entry.links:
+            return jsonify({'error': 'No stream available for this channel'}), 404
+        
+        if entry.is_premium and not get_entitlement(user_id).premium:
+            user = load_user(user_id)
+            if user is None or not user.is_admin:
+                return jsonify({'error': 'An active subscription is required for this content'}), 403
+        
+        if upstream_url:
+            # Child playlists only from the origins of this channel's own streams
+            origins = {urljoin(link['streamURLAndroid'], '/') for _, link in entry.links}
+            if urljoin(upstream_url, '/') not in origins:
+                # ... or wherever their masters redirected to (cached, so usually no upstream request)
+                origins = {proxy.origin(link['streamURLAndroid']) for _, link in entry.links}
+            if urljoin(upstream_url, '/') not in origins:
+                return jsonify({'error': 'Playlist is not part of this channel'}), 400
+        else:
+            link = entry.healthy_link(current_app.extensions['stream_health'].is_down)
+            if link is None:
+                return jsonify({'error': 'All streams for this content are currently unavailable'}), 503
+            upstream_url = link['streamURLAndroid']
+        
+        manifest = proxy.get(upstream_url)
+        # URIs carry a current token even when the player is still polling with an older one
+        token = issuer.issue(user_id, channel_id)['token']
+        return current_app.response_class(
+            manifest.render(token),
+            mimetype='application/vnd.apple.mpegurl',
+            headers={'Cache-Control': 'private, no-cache'}
+        )
+        
+    except UpstreamError as e:
+        return jsonify({'error': str(e)}), 502
+    except Exception as e:
+        return jsonify({'error': f'Failed to get stream manifest: {str(e)}'}), 500
+
 @streaming_bp.route('/stream/drm-token', methods=['POST'])
 @jwt_required()
+@replica_reads
 def get_drm_token():
     try:
         current_user_id = get_jwt_identity()
@@ -85,22 +232,25 @@ def get_drm_token():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        stream_url = data.get('stream_url')
+        # stream_url is still sent by older clients; the token is bound to the channel, not the URL
         content_id = data.get('content_id')
         channel_id = data.get('channel_id')
         
-        if not stream_url:
-            return jsonify({'error': 'stream_url is required'}), 400
-        
         if not content_id and not channel_id:
             return jsonify({'error': 'content_id or channel_id is required'}), 400
         
-        # Generate mock DRM token
-        drm_token_data = generate_mock_drm_token(
-            stream_url, 
-            channel_id or content_id, 
-            current_user_id
-        )
+        # Resolved the same way the manifest and license checks resolve the token's channel
+        token_channel_id = channel_id or content_id
+        entry = stream_index.by_content(stream_index.content_for_channel(token_channel_id) or token_channel_id)
+        if not entry:
+            return jsonify({'error': 'Content not found'}), 404
+        
+        denied = premium_access_denied(entry.is_premium, current_user_id)
+        if denied:
+            return denied
+        
+        # Signed token for the current window, reused by every request in it
+        drm_token_data = get_drm_issuer().issue(current_user_id, token_channel_id)
         
         # Simulate the API response structure from the tutorial
         response_data = {
@@ -117,8 +267,29 @@ def get_drm_token():
     except Exception as e:
         return jsonify({'error': f'Failed to get DRM token: {str(e)}'}), 500
 
+@streaming_bp.route('/stream/drm-token/verify', methods=['POST'])
+def verify_drm_token():
+    """Check a DRM token's signature and expiry (for the license proxy); no database access"""
+    data = request.get_json(silent=True) or {}
+    token = data.get('token') or request.headers.get('nv-authorizations')
+    if not token:
+        return jsonify({'error': 'token is required'}), 400
+    
+    try:
+        user_id, channel_id, expires_at = get_drm_issuer().verify(token)
+    except InvalidDrmToken as e:
+        return jsonify({'valid': False, 'error': str(e)}), 401
+    
+    return jsonify({
+        'valid': True,
+        'user_id': user_id,
+        'channel_id': channel_id,
+        'expires_at': expires_at
+    }), 200
+
 @streaming_bp.route('/stream/validate', methods=['POST'])
 @jwt_required()
+@replica_reads
 def validate_stream():
     """Validate if a user has access to a specific stream"""
     try:
@@ -133,20 +304,25 @@ def validate_stream():
         if not content_id:
             return jsonify({'error': 'content_id is required'}), 400
         
-        # Get content
-        content = Content.query.get(content_id)
+        try:
+            fields = requested_fields({**request.args.to_dict(), **data})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Get content (is_premium is needed for the access check whatever the projection)
+        load_fields = fields + ('is_premium',) if fields is not None else None
+        content = get_content(content_id, fields=load_fields)
         if not content:
             return jsonify({'error': 'Content not found'}), 404
         
-        # Check if content is premium (in a real app, you'd check user subscription)
-        if content.is_premium:
-            # For now, we'll allow access to premium content
-            # In a real implementation, you'd check user subscription status
-            pass
+        # Premium content needs an active subscription (one cached entitlement lookup)
+        denied = premium_access_denied(content.is_premium, current_user_id)
+        if denied:
+            return denied
         
         return jsonify({
             'valid': True,
-            'content': content.to_dict(),
+            'content': content.to_dict(fields),
             'message': 'Stream access granted'
         }), 200
         
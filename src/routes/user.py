@@ -1,21 +1,24 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, jsonify, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from src.models.user import User, db
 from src.models.content import Content, UserWatchHistory, UserFavorites
+from src.services.catalog import eager_options
+from src.services.pagination import wants_cursor, wants_total, keyset_paginate, page_size
+from src.services.projection import requested_fields
+from src.services.watch_progress import existing_content_ids, upsert_progress, parse_watched_duration
+from datetime import datetime
 
 user_bp = Blueprint('user', __name__)
 
+# Upper bound on events accepted by /user/history/batch
+MAX_PROGRESS_EVENTS = 500
+
 @user_bp.route('/user/profile', methods=['GET'])
 @jwt_required()
 def get_user_profile():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        return jsonify(user.to_dict()), 200
+        # Cached snapshot from the JWT user loader (src/services/identity.py)
+        return jsonify(current_user.to_dict()), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to get user profile: {str(e)}'}), 500
@@ -62,6 +65,11 @@ def update_user_profile():
 @user_bp.route('/user/history', methods=['GET'])
 @jwt_required()
 def get_user_history():
+    try:
+        fields = requested_fields(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         current_user_id = get_jwt_identity()
         
@@ -70,14 +78,34 @@ def get_user_history():
             Content, UserWatchHistory.content_id == Content.id
         ).filter(UserWatchHistory.user_id == current_user_id).order_by(
             UserWatchHistory.last_watched_at.desc()
-        )
+        ).options(*eager_options(fields=fields))
+        
+        next_cursor = None
+        if wants_cursor(request.args):
+            try:
+                per_page = page_size(request.args)
+                rows, next_cursor = keyset_paginate(
+                    history_query, UserWatchHistory.last_watched_at, UserWatchHistory.id,
+                    request.args.get('cursor'), per_page,
+                    key=lambda row: (row[0].last_watched_at, row[0].id)
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            rows = history_query.all()
         
         history_list = []
-        for history, content in history_query.all():
+        for history, content in rows:
             history_dict = history.to_dict()
-            history_dict['content'] = content.to_dict()
+            history_dict['content'] = content.to_dict(fields)
             history_list.append(history_dict)
         
+        if wants_cursor(request.args):
+            response = {'history': history_list, 'next_cursor': next_cursor, 'per_page': per_page}
+            if wants_total(request.args):
+                response['total'] = UserWatchHistory.query.filter_by(user_id=current_user_id).count()
+            return jsonify(response), 200
+        
         return jsonify(history_list), 200
         
     except Exception as e:
@@ -94,38 +122,82 @@ def add_to_history():
             return jsonify({'error': 'No data provided'}), 400
         
         content_id = data.get('content_id')
-        watched_duration = data.get('watched_duration', 0)
         
-        if not content_id:
+        if not content_id or not isinstance(content_id, str):
             return jsonify({'error': 'content_id is required'}), 400
         
+        try:
+            watched_duration = parse_watched_duration(data.get('watched_duration', 0))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # With write-behind enabled the heartbeat is coalesced in memory and flushed later
+        buffer = current_app.extensions.get('watch_progress')
+        if buffer:
+            buffer.add(current_user_id, content_id, watched_duration)
+            return jsonify({'message': 'Watch history updated successfully'}), 200
+        
         # Verify content exists
-        content = Content.query.get(content_id)
-        if not content:
+        if not existing_content_ids([content_id]):
             return jsonify({'error': 'Content not found'}), 404
         
-        # Check if history entry already exists
-        existing_history = UserWatchHistory.query.filter_by(
-            user_id=current_user_id,
-            content_id=content_id
-        ).first()
+        upsert_progress([(current_user_id, content_id, watched_duration, datetime.utcnow())])
+        db.session.commit()
         
-        if existing_history:
-            # Update existing entry
-            existing_history.watched_duration = watched_duration
-            existing_history.last_watched_at = db.func.now()
-        else:
-            # Create new history entry
-            history = UserWatchHistory(
-                user_id=current_user_id,
-                content_id=content_id,
-                watched_duration=watched_duration
-            )
-            db.session.add(history)
+        return jsonify({'message': 'Watch history updated successfully'}), 200
         
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to update watch history: {str(e)}'}), 500
+
+@user_bp.route('/user/history/batch', methods=['POST'])
+@jwt_required()
+def add_history_batch():
+    """Apply many watch-progress events at once (latest event per content wins)"""
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        events = data.get('events') if isinstance(data, dict) else None
+        if not isinstance(events, list) or not events:
+            return jsonify({'error': 'events must be a non-empty list'}), 400
+        
+        if len(events) > MAX_PROGRESS_EVENTS:
+            return jsonify({'error': f'At most {MAX_PROGRESS_EVENTS} events per batch'}), 400
+        
+        # Coalesce per content_id, keeping the last event
+        progress = {}
+        for event in events:
+            if not isinstance(event, dict) or not event.get('content_id') or not isinstance(event['content_id'], str):
+                return jsonify({'error': 'Each event requires a content_id'}), 400
+            try:
+                progress[event['content_id']] = parse_watched_duration(event.get('watched_duration', 0))
+            except ValueError as e:
+                return jsonify({'error': f"{event['content_id']}: {str(e)}"}), 400
+        
+        buffer = current_app.extensions.get('watch_progress')
+        if buffer:
+            for content_id, watched_duration in progress.items():
+                buffer.add(current_user_id, content_id, watched_duration)
+            return jsonify({
+                'message': 'Watch history queued',
+                'accepted': len(progress)
+            }), 202
+        
+        known = existing_content_ids(progress)
+        now = datetime.utcnow()
+        upsert_progress([
+            (current_user_id, content_id, watched_duration, now)
+            for content_id, watched_duration in progress.items()
+            if content_id in known
+        ])
         db.session.commit()
         
-        return jsonify({'message': 'Watch history updated successfully'}), 200
+        return jsonify({
+            'message': 'Watch history updated successfully',
+            'accepted': len(known),
+            'rejected': [content_id for content_id in progress if content_id not in known]
+        }), 200
         
     except Exception as e:
         db.session.rollback()
@@ -134,6 +206,11 @@ def add_to_history():
 @user_bp.route('/user/favorites', methods=['GET'])
 @jwt_required()
 def get_user_favorites():
+    try:
+        fields = requested_fields(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         current_user_id = get_jwt_identity()
         
@@ -142,14 +219,34 @@ def get_user_favorites():
             Content, UserFavorites.content_id == Content.id
         ).filter(UserFavorites.user_id == current_user_id).order_by(
             UserFavorites.created_at.desc()
-        )
+        ).options(*eager_options(fields=fields))
+        
+        next_cursor = None
+        if wants_cursor(request.args):
+            try:
+                per_page = page_size(request.args)
+                rows, next_cursor = keyset_paginate(
+                    favorites_query, UserFavorites.created_at, UserFavorites.id,
+                    request.args.get('cursor'), per_page,
+                    key=lambda row: (row[0].created_at, row[0].id)
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            rows = favorites_query.all()
         
         favorites_list = []
-        for favorite, content in favorites_query.all():
-            content_dict = content.to_dict()
-            content_dict['favorited_at'] = favorite.created_at.isoformat()
+        for favorite, content in rows:
+            content_dict = content.to_dict(fields)
+            content_dict['favorited_at'] = favorite.created_at
             favorites_list.append(content_dict)
         
+        if wants_cursor(request.args):
+            response = {'favorites': favorites_list, 'next_cursor': next_cursor, 'per_page': per_page}
+            if wants_total(request.args):
+                response['total'] = UserFavorites.query.filter_by(user_id=current_user_id).count()
+            return jsonify(response), 200
+        
         return jsonify(favorites_list), 200
         
     except Exception as e:
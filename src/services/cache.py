@@ -0,0 +1,189 @@
+# burudani_backend/src/services/cache.py
+
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # only needed for CACHE_VERSION_BACKEND=redis
+    redis = None
+
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+# 'file' (workers on one host), 'redis' (every process sharing REDIS_URL) or 'memory' (one process)
+CACHE_VERSION_BACKEND = os.environ.get('CACHE_VERSION_BACKEND') or ('redis' if os.environ.get('REDIS_URL') else 'file')
+
+class LRUCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    With `maxbytes` and `sizeof` (value -> size in bytes) the cache is also
+    bounded by the total size of its values; a value larger than maxbytes is
+    not stored at all.
+    """
+
+    def __init__(self, maxsize=256, ttl=60, clock=time.monotonic, maxbytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._sizeof = sizeof if maxbytes is not None else None
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return default
+
+    def _discard(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None and self._sizeof:
+            self.bytes -= self._sizeof(entry[1])
+        return entry
+
+    def set(self, key, value, ttl=None):
+        size = self._sizeof(value) if self._sizeof else 0
+        with self._lock:
+            self._discard(key)
+            if self._sizeof and size > self.maxbytes:
+                return
+            self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self._sizeof and self.bytes > self.maxbytes):
+                self._discard(next(iter(self._data)))
+                self.evictions += 1
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Return the cached value for key, building and storing it with factory() on a miss"""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+            if self._sizeof:
+                stats.update(bytes=self.bytes, maxbytes=self.maxbytes)
+            return stats
+
+class MemoryVersionStore:
+    """Version counters local to this process (single worker, tests)"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        return self._versions.get(name, 0)
+
+    def bump(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            return self._versions[name]
+
+class FileVersionStore:
+    """Version counters shared by every worker on the host via file mtimes.
+
+    Reading a version is a single stat() call, so gunicorn workers can check
+    it on every request; bumping it touches the file with a newer mtime.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.version')
+
+    def get(self, name):
+        try:
+            return os.stat(self._path(name)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def bump(self, name):
+        path = self._path(name)
+        version = max(time.time_ns(), self.get(name) + 1)
+        with open(path, 'a'):
+            os.utime(path, ns=(version, version))
+        return self.get(name)
+
+class RedisVersionStore:
+    """Version counters shared by every process and host using the same Redis.
+
+    A read is one GET. While Redis is unreachable reads return a value no
+    cache entry is keyed on, so lookups miss instead of serving stale data.
+    """
+
+    def __init__(self, client, prefix='burudani:version:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, name):
+        try:
+            return int(self.client.get(self.prefix + name) or 0)
+        except Exception as e:
+            print(f"Cache version read failed for {name}: {str(e)}")
+            return ('unavailable', time.monotonic_ns())
+
+    def bump(self, name):
+        try:
+            return self.client.incr(self.prefix + name)
+        except Exception as e:
+            print(f"Cache version bump failed for {name}: {str(e)}")
+            return None
+
+def create_version_store(backend=None, directory=None, client=None):
+    """Version store selected by CACHE_VERSION_BACKEND ('file', 'redis' or 'memory')"""
+    backend = backend or CACHE_VERSION_BACKEND
+    if backend == 'memory':
+        return MemoryVersionStore()
+    if backend == 'redis':
+        if client is None:
+            if redis is None:
+                raise RuntimeError('CACHE_VERSION_BACKEND=redis requires the redis package')
+            client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5)
+        return RedisVersionStore(client)
+    if backend == 'file':
+        directory = directory or os.environ.get(
+            'CATALOG_VERSION_DIR', os.path.join(tempfile.gettempdir(), 'burudani-cache-versions')
+        )
+        return FileVersionStore(directory)
+    raise ValueError(f'Unknown CACHE_VERSION_BACKEND: {backend}')
@@ -0,0 +1,82 @@
+# burudani_backend/src/services/catalog.py
+
+import os
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload, joinedload, subqueryload, lazyload, load_only
+from src.models.content import Content, Category, Stream, CONTENT_RELATIONSHIPS
+from src.services.cache import LRUCache, create_version_store
+
+# Loader used for the relationships walked by Content.to_dict().
+# selectin: one extra IN query per relationship (default, plays well with LIMIT/OFFSET)
+# joined:   single LEFT OUTER JOIN query (best for single-row lookups)
+# subquery: one extra query per relationship that re-runs the parent query
+# lazy:     no eager loading, one query per row and relationship (N+1 baseline for benchmarks)
+LOADING_STRATEGIES = {
+    'selectin': selectinload,
+    'joined': joinedload,
+    'subquery': subqueryload,
+    'lazy': lazyload,
+}
+
+DEFAULT_LOADING_STRATEGY = os.environ.get('CATALOG_LOADING_STRATEGY', 'selectin')
+if DEFAULT_LOADING_STRATEGY not in LOADING_STRATEGIES:
+    raise ValueError(f'Unknown CATALOG_LOADING_STRATEGY: {DEFAULT_LOADING_STRATEGY}')
+
+def eager_options(strategy=None, fields=None):
+    """Loader options for Content.to_dict(fields).
+
+    With no `fields` every column is loaded and categories/streams are fetched
+    up front. With a projection only the requested columns are SELECTed
+    (plus id/created_at, used for identity and keyset cursors) and only the
+    requested relationships are loaded.
+    """
+    loader = LOADING_STRATEGIES[strategy or DEFAULT_LOADING_STRATEGY]
+    if fields is None:
+        return (loader(Content.categories), loader(Content.streams))
+    columns = {'id', 'created_at'} | {field for field in fields if field not in CONTENT_RELATIONSHIPS}
+    options = [load_only(*(getattr(Content, column) for column in sorted(columns)))]
+    options.extend(loader(getattr(Content, name)) for name in CONTENT_RELATIONSHIPS if name in fields)
+    return tuple(options)
+
+def content_query(strategy=None, fields=None):
+    """Content query with relationships eagerly loaded for to_dict(fields)"""
+    return Content.query.options(*eager_options(strategy, fields))
+
+def get_content(content_id, strategy=None, fields=None):
+    """Fetch a single Content row with its relationships, or None"""
+    return content_query(strategy or 'joined', fields).filter(Content.id == content_id).first()
+
+# Read-mostly catalog responses are cached per worker and keyed by the shared
+# catalog version, which is bumped whenever Content/Category/Stream rows change.
+CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 300))
+CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', 512))
+
+catalog_cache = LRUCache(maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL)
+version_store = create_version_store()
+
+CATALOG_MODELS = (Content, Category, Stream)
+
+def catalog_version():
+    return version_store.get('catalog')
+
+def cached_catalog(name, builder):
+    """Cached result of builder() for the current catalog version"""
+    return catalog_cache.get_or_set((name, catalog_version()), builder)
+
+def _mark_catalog_changes(session, flush_context):
+    if any(isinstance(obj, CATALOG_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['catalog_changed'] = True
+
+def _bump_catalog_version(session):
+    if session.info.pop('catalog_changed', False):
+        version_store.bump('catalog')
+
+def _discard_catalog_changes(session):
+    session.info.pop('catalog_changed', None)
+
+def register_catalog_invalidation():
+    """Bump the catalog version after any commit that touched catalog rows"""
+    if not event.contains(Session, 'after_flush', _mark_catalog_changes):
+        event.listen(Session, 'after_flush', _mark_catalog_changes)
+        event.listen(Session, 'after_commit', _bump_catalog_version)
+        event.listen(Session, 'after_rollback', _discard_catalog_changes)
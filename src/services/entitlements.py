@@ -0,0 +1,106 @@
+# burudani_backend/src/services/entitlements.py
+#
+# Premium access derived from completed payments. Each COMPLETED payment
+# buys the plan its amount covers (SUBSCRIPTION_PLANS); consecutive payments
+# extend one another. A user's entitlement is materialized once and cached
+# per worker, keyed by the user's shared 'entitlements:<user id>' version,
+# which is bumped after any commit that completes one of their payments
+# (webhook consumer, reconciler or initiation path alike). Cached entries never outlive the
+# entitlement's own expiry.
+
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from src.models.db import db
+from src.models.payment import Payment
+from src.services.cache import LRUCache, create_version_store
+
+ENTITLEMENT_CACHE_SIZE = int(os.environ.get('ENTITLEMENT_CACHE_SIZE', 10000))
+ENTITLEMENT_CACHE_TTL = int(os.environ.get('ENTITLEMENT_CACHE_TTL', 300))
+
+def parse_plans(spec):
+    """'daily:1000:1,weekly:5000:7' -> [(name, minimum amount, days)], cheapest first"""
+    plans = []
+    for item in spec.split(','):
+        name, price, days = item.strip().split(':')
+        plans.append((name, float(price), int(days)))
+    return sorted(plans, key=lambda plan: plan[1])
+
+# name:minimum amount (TZS):days of access
+SUBSCRIPTION_PLANS = parse_plans(os.environ.get('SUBSCRIPTION_PLANS', 'daily:1000:1,weekly:5000:7,monthly:15000:30'))
+
+entitlement_cache = LRUCache(maxsize=ENTITLEMENT_CACHE_SIZE, ttl=ENTITLEMENT_CACHE_TTL)
+version_store = create_version_store()
+
+class Entitlement:
+    def __init__(self, plan=None, expires_at=None):
+        self.plan = plan
+        self.expires_at = expires_at
+
+    @property
+    def premium(self):
+        return self.expires_at is not None and self.expires_at > datetime.utcnow()
+
+    def to_dict(self):
+        return {'premium': self.premium, 'plan': self.plan, 'expires_at': self.expires_at}
+
+NO_ENTITLEMENT = Entitlement()
+
+def plan_for_amount(amount, plans=SUBSCRIPTION_PLANS):
+    """The most expensive plan the amount pays for, or None"""
+    covered = [plan for plan in plans if amount >= plan[1]]
+    return covered[-1] if covered else None
+
+def materialize_entitlement(user_id):
+    """Entitlement from the user's completed payments, oldest first"""
+    stmt = select(Payment.amount, Payment.updated_at).where(
+        Payment.user_id == user_id, Payment.payment_status == 'COMPLETED'
+    ).order_by(Payment.updated_at)
+    # Always the primary: a lagging replica would cache a just-paid user as not entitled
+    rows = db.session.execute(stmt, bind_arguments={'bind': db.engine}).all()
+    plan_name, expires_at = None, None
+    for amount, paid_at in rows:
+        plan = plan_for_amount(amount)
+        if plan is None or paid_at is None:
+            continue
+        # A payment made before the current period ends extends it instead of overlapping it
+        start = max(paid_at, expires_at) if expires_at else paid_at
+        plan_name, expires_at = plan[0], start + timedelta(days=plan[2])
+    return Entitlement(plan_name, expires_at) if expires_at else NO_ENTITLEMENT
+
+def entitlements_version(user_id):
+    return version_store.get(f'entitlements:{user_id}')
+
+def get_entitlement(user_id):
+    """The user's entitlement: one cache lookup, one query on a miss"""
+    if not user_id:
+        return NO_ENTITLEMENT
+    key = (user_id, entitlements_version(user_id))
+    entitlement = entitlement_cache.get(key)
+    if entitlement is None:
+        entitlement = materialize_entitlement(user_id)
+        ttl = ENTITLEMENT_CACHE_TTL
+        if entitlement.premium:
+            ttl = min(ttl, (entitlement.expires_at - datetime.utcnow()).total_seconds())
+        entitlement_cache.set(key, entitlement, ttl)
+    return entitlement
+
+def _mark_entitlement_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Payment) and obj.user_id and 'COMPLETED' in inspect(obj).attrs.payment_status.history.added:
+            session.info.setdefault('entitlements_changed', set()).add(obj.user_id)
+
+def _bump_entitlements_version(session):
+    for user_id in session.info.pop('entitlements_changed', ()):
+        version_store.bump(f'entitlements:{user_id}')
+
+def _discard_entitlement_changes(session):
+    session.info.pop('entitlements_changed', None)
+
+def register_entitlement_invalidation():
+    """Bump a user's entitlements version after any commit that completed one of their payments"""
+    if not event.contains(Session, 'after_flush', _mark_entitlement_changes):
+        event.listen(Session, 'after_flush', _mark_entitlement_changes)
+        event.listen(Session, 'after_commit', _bump_entitlements_version)
+        event.listen(Session, 'after_rollback', _discard_entitlement_changes)
@@ -0,0 +1,106 @@
+# burudani_backend/src/services/identity.py
+#
+# Who is making an authenticated request, without a users-table query per
+# request. Access tokens carry role, premium and cv (claims version, from
+# User.updated_at) claims; the JWT user loader keeps a per-worker LRU of user
+# snapshots keyed by (user id, cv, the user's identity version). A user's
+# identity version ('identity:<user id>') is bumped whenever their row changes
+# or one of their payments completes, so profile and subscription changes are
+# seen by every worker without evicting anyone else's snapshot. Snapshots are
+# read from the primary, only cached for users that exist, and never outlive
+# the premium entitlement they captured.
+
+import os
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from src.models.db import db
+from src.models.payment import Payment
+from src.models.user import User
+from src.services.cache import LRUCache, create_version_store
+from src.services.entitlements import get_entitlement
+from src.services.replicas import use_primary
+
+IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 10000))
+IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 300))
+
+identity_cache = LRUCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+version_store = create_version_store()
+
+class CurrentUser:
+    """Snapshot of a user as seen by request handlers (no live ORM state)"""
+
+    def __init__(self, user, premium):
+        self.id = user.id
+        self.email = user.email
+        self.role = user.role
+        self.premium = premium
+        self.cv = claims_version(user)
+        self._profile = user.to_dict()
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def to_dict(self):
+        return dict(self._profile)
+
+def claims_version(user):
+    """Changes whenever the user row does (updated_at in milliseconds)"""
+    return int(user.updated_at.timestamp() * 1000) if user.updated_at else 0
+
+def is_premium(user_id):
+    """True while the user has an active subscription entitlement"""
+    return get_entitlement(user_id).premium
+
+def identity_claims(user):
+    """Extra access-token claims for create_access_token(additional_claims=...)"""
+    return {'role': user.role, 'premium': is_premium(user.id), 'cv': claims_version(user)}
+
+def identity_version(user_id):
+    return version_store.get(f'identity:{user_id}')
+
+def load_user(user_id, cv=None):
+    """CurrentUser for user_id (None if it no longer exists), cached per claims and the user's identity version"""
+    key = (user_id, cv, identity_version(user_id))
+    current = identity_cache.get(key)
+    if current is None:
+        # A lagging replica (or a lookup racing the user's own commit) must not lock them out
+        with use_primary():
+            user = db.session.get(User, user_id)
+        if user is None:
+            return None  # not cached: the next request looks again
+        entitlement = get_entitlement(user_id)
+        current = CurrentUser(user, entitlement.premium)
+        ttl = IDENTITY_CACHE_TTL
+        if entitlement.premium:
+            ttl = min(ttl, (entitlement.expires_at - datetime.utcnow()).total_seconds())
+        identity_cache.set(key, current, ttl)
+    return current
+
+def _mark_identity_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id:
+            session.info.setdefault('identity_changed', set()).add(obj.id)
+        elif isinstance(obj, Payment) and obj.user_id and 'COMPLETED' in inspect(obj).attrs.payment_status.history.added:
+            session.info.setdefault('identity_changed', set()).add(obj.user_id)
+
+def _bump_identity_version(session):
+    for user_id in session.info.pop('identity_changed', ()):
+        version_store.bump(f'identity:{user_id}')
+
+def _discard_identity_changes(session):
+    session.info.pop('identity_changed', None)
+
+def init_identity(app, jwt):
+    """Register the cached JWT user loader and identity invalidation"""
+    @jwt.user_lookup_loader
+    def _user_lookup(jwt_header, jwt_data):
+        return load_user(jwt_data[app.config.get('JWT_IDENTITY_CLAIM', 'sub')], jwt_data.get('cv'))
+
+    if not event.contains(Session, 'after_flush', _mark_identity_changes):
+        event.listen(Session, 'after_flush', _mark_identity_changes)
+        event.listen(Session, 'after_commit', _bump_identity_version)
+        event.listen(Session, 'after_rollback', _discard_identity_changes)
+    app.extensions['identity_cache'] = identity_cache
+    return identity_cache
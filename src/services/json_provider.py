@@ -0,0 +1,62 @@
+# burudani_backend/src/services/json_provider.py
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional C encoder
+    orjson = None
+
+def _default(value):
+    """Types the model to_dict() methods hand back raw"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return DefaultJSONProvider.default(value)
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider, but datetimes are ISO 8601 (Flask defaults to HTTP dates)"""
+    default = staticmethod(_default)
+
+class OrjsonJSONProvider(StdlibJSONProvider):
+    """orjson-backed provider: datetime/date/UUID are encoded natively in C"""
+
+    def _options(self, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Callers asking for stdlib-specific behaviour (indent, separators, cls...) get the stdlib path
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=_default, option=self._options(pretty))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def create_json_provider(app, backend=None):
+    """JSON provider selected by JSON_PROVIDER ('auto' uses orjson when installed, or 'stdlib')"""
+    backend = backend or app.config.get('JSON_PROVIDER', 'auto')
+    if backend == 'orjson' or (backend == 'auto' and orjson is not None):
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+        return OrjsonJSONProvider(app)
+    return StdlibJSONProvider(app)
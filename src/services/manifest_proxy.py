@@ -0,0 +1,182 @@
+# burudani_backend/src/services/manifest_proxy.py
+#
+# Optional HLS manifest proxy (STREAM_PROXY_ENABLED). Each upstream playlist
+# is fetched at most once per MANIFEST_REFRESH_INTERVAL per worker: the
+# first request for a stale playlist fetches it and every concurrent request
+# for the same URL waits for that fetch (single-flight), so N viewers of a
+# live channel cost one upstream GET per interval. A fetched playlist is
+# compiled once into a template with relative URIs made absolute and child
+# playlists pointed back at the proxy; the per-user DRM token is the only
+# thing filled in per request.
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import quote, urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from src.services.cache import LRUCache
+from src.services.drm import DRM_TOKEN_GRACE
+
+MANIFEST_REFRESH_INTERVAL = float(os.environ.get('MANIFEST_REFRESH_INTERVAL', 2))
+MANIFEST_CACHE_SIZE = int(os.environ.get('MANIFEST_CACHE_SIZE', 2000))
+MANIFEST_FETCH_TIMEOUT = float(os.environ.get('MANIFEST_FETCH_TIMEOUT', 5))
+MANIFEST_POOL_SIZE = int(os.environ.get('MANIFEST_POOL_SIZE', 20))
+# Query parameter carrying the viewer's DRM token on segment and key URLs; empty leaves them untouched
+STREAM_PROXY_SEGMENT_TOKEN_PARAM = os.environ.get('STREAM_PROXY_SEGMENT_TOKEN_PARAM', 'token')
+# Players keep polling the media playlist URL they got from the master, so a child
+# playlist token is accepted this long after it expired (master fetches get none);
+# past that the player has to go back through /stream/link for a new manifest_url
+STREAM_PROXY_TOKEN_LEEWAY = int(os.environ.get('STREAM_PROXY_TOKEN_LEEWAY', DRM_TOKEN_GRACE))
+
+URI_ATTRIBUTE_RE = re.compile(r'URI="([^"]*)"')
+# Tags of a master playlist whose URI is itself a playlist (and so goes through the proxy)
+PLAYLIST_TAGS = ('#EXT-X-MEDIA:', '#EXT-X-I-FRAME-STREAM-INF:')
+
+class UpstreamError(Exception):
+    pass
+
+class Manifest:
+    """A compiled playlist: `chunks` joined by the viewer's token give the response body"""
+
+    def __init__(self, url, chunks, fetched_at, final_url=None):
+        self.url = url
+        self.chunks = chunks
+        self.fetched_at = fetched_at
+        self.final_url = final_url or url  # after redirects; child playlists are relative to it
+
+    def render(self, token):
+        # DRM tokens are URL-safe (base64url and dots), so they go in unquoted
+        return token.join(self.chunks)
+
+def compile_manifest(text, url, token_param=STREAM_PROXY_SEGMENT_TOKEN_PARAM):
+    """Split a playlist into the chunks between per-user token positions"""
+    master = '#EXT-X-STREAM-INF' in text
+    chunks = []
+    pieces = []
+
+    def add_uri(reference, playlist):
+        absolute = urljoin(url, reference)
+        if playlist:
+            # Relative to the proxy's own URL: same route, upstream playlist in `u`
+            pieces.append(f"index.m3u8?u={quote(absolute, safe='')}&token=")
+        elif token_param:
+            pieces.append(f"{absolute}{'&' if '?' in absolute else '?'}{token_param}=")
+        else:
+            pieces.append(absolute)
+            return
+        chunks.append(''.join(pieces))
+        pieces.clear()
+
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('#'):
+            position = 0
+            playlist = master and line.startswith(PLAYLIST_TAGS)
+            for match in URI_ATTRIBUTE_RE.finditer(line):
+                pieces.append(line[position:match.start(1)])
+                add_uri(match.group(1), playlist)
+                position = match.end(1)
+            pieces.append(line[position:])
+        elif line:
+            add_uri(line, master)
+        pieces.append('\n')
+    chunks.append(''.join(pieces))
+    return chunks
+
+class ManifestProxy:
+    """Per-worker cache of upstream playlists with single-flight refreshes"""
+
+    def __init__(self, refresh_interval=MANIFEST_REFRESH_INTERVAL, maxsize=MANIFEST_CACHE_SIZE,
+                 timeout=MANIFEST_FETCH_TIMEOUT, pool_size=MANIFEST_POOL_SIZE,
+                 token_param=STREAM_PROXY_SEGMENT_TOKEN_PARAM, token_leeway=STREAM_PROXY_TOKEN_LEEWAY):
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.token_param = token_param
+        self.token_leeway = token_leeway
+        # url -> Manifest, or the UpstreamError of the last fetch (failures are cached for an interval too)
+        self.manifests = LRUCache(maxsize=maxsize, ttl=refresh_interval)
+        self._inflight = {}  # url -> Future of the fetch in progress
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'User-Agent': 'BurudaniManifestProxy/1.0'})
+        self.fetches = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _fetch(self, url):
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            return UpstreamError(f'Upstream playlist unreachable: {e.__class__.__name__}')
+        if response.status_code != 200:
+            return UpstreamError(f'Upstream playlist returned HTTP {response.status_code}')
+        text = response.content.decode('utf-8', errors='replace').lstrip('\ufeff \r\n')
+        if not text.startswith('#EXTM3U'):
+            return UpstreamError('Upstream response is not an HLS playlist')
+        final_url = response.url or url
+        return Manifest(url, compile_manifest(text, final_url, self.token_param), time.time(), final_url)
+
+    def get(self, url):
+        """Compiled playlist for url, fetching it if stale; raises UpstreamError"""
+        manifest = self.manifests.get(url)
+        if manifest is None:
+            with self._lock:
+                future = self._inflight.get(url)
+                leader = future is None
+                if leader:
+                    # Re-check: a fetch may have finished since the lookup above
+                    manifest = self.manifests.get(url)
+                    if manifest is None:
+                        future = self._inflight[url] = Future()
+                else:
+                    self.coalesced += 1
+            if manifest is None and leader:
+                try:
+                    manifest = self._fetch(url)
+                    with self._lock:
+                        self.fetches += 1
+                        if isinstance(manifest, UpstreamError):
+                            self.errors += 1
+                    self.manifests.set(url, manifest)
+                    future.set_result(manifest)
+                except Exception as e:
+                    future.set_exception(e)
+                    raise
+                finally:
+                    with self._lock:
+                        self._inflight.pop(url, None)
+            elif manifest is None:
+                manifest = future.result(timeout=self.timeout * 2)
+        if isinstance(manifest, UpstreamError):
+            raise UpstreamError(str(manifest))
+        return manifest
+
+    def origin(self, url):
+        """Origin the playlist at url is actually served from (after redirects), or None if unreachable"""
+        try:
+            return urljoin(self.get(url).final_url, '/')
+        except UpstreamError:
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'refresh_interval': self.refresh_interval,
+                'upstream_fetches': self.fetches,
+                'upstream_errors': self.errors,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._inflight),
+                'cache': self.manifests.stats(),
+            }
+
+def init_manifest_proxy(app):
+    """Attach the manifest proxy when STREAM_PROXY_ENABLED is set"""
+    if app.config.get('STREAM_PROXY_ENABLED'):
+        app.extensions['manifest_proxy'] = ManifestProxy()
+    return app.extensions.get('manifest_proxy')
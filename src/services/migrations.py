@@ -0,0 +1,94 @@
+# burudani_backend/src/services/migrations.py
+#
+# db.create_all() only creates missing tables, so indexes declared on models
+# after a table already exists never reach the live database. This module
+# diffs the declared indexes against the database and builds the missing ones,
+# using CREATE INDEX CONCURRENTLY on Postgres so live tables are not locked.
+# Before a unique index is built, rows that would violate it are deleted,
+# keeping the newest per key (by the column in the index's info['dedupe_keep'],
+# then the primary key).
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+def declared_indexes(metadatas):
+    """All Index objects declared on the given MetaData collections, by table"""
+    indexes = []
+    for metadata in metadatas:
+        for table in metadata.tables.values():
+            indexes.extend(sorted(table.indexes, key=lambda index: index.name))
+    return indexes
+
+def invalid_postgres_indexes(conn):
+    """Names of indexes left INVALID by an interrupted CREATE INDEX CONCURRENTLY"""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    ))
+    return {row[0] for row in rows}
+
+def missing_indexes(engine, metadatas):
+    """Declared indexes that do not exist (or exist but are invalid) in the database"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    invalid = set()
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            invalid = invalid_postgres_indexes(conn)
+
+    missing = []
+    for index in declared_indexes(metadatas):
+        table_name = index.table.name
+        if table_name not in existing_tables:
+            continue  # create_all() will build the table together with its indexes
+        existing = {ix['name'] for ix in inspector.get_indexes(table_name)}
+        if index.name not in existing or index.name in invalid:
+            missing.append(index)
+    return missing
+
+def dedupe_for_unique_index(engine, index, dry_run=False):
+    """Delete rows sharing the unique index's key, keeping the newest one; returns the number of duplicates"""
+    table = index.table
+    key = ', '.join(f'"{column.name}"' for column in index.columns)
+    pk_column = f'"{list(table.primary_key.columns)[0].name}"'
+    keep = index.info.get('dedupe_keep')
+    order = (f'"{keep}" DESC, ' if keep else '') + f'{pk_column} DESC'
+    ranked = (f'SELECT {pk_column} FROM (SELECT {pk_column}, ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY {order}) AS rn '
+              f'FROM "{table.name}") ranked WHERE rn > 1')
+    with engine.begin() as conn:
+        if dry_run:
+            return conn.execute(text(f'SELECT COUNT(*) FROM ({ranked}) duplicates')).scalar()
+        return conn.execute(text(f'DELETE FROM "{table.name}" WHERE {pk_column} IN ({ranked})')).rowcount
+
+def build_index(engine, index, concurrently=True):
+    """Create one index; on Postgres without taking a write lock on the table"""
+    if engine.dialect.name == 'postgresql' and concurrently:
+        # CONCURRENTLY cannot run inside a transaction block
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+            if index.name in invalid_postgres_indexes(conn):
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+            index.dialect_options['postgresql']['concurrently'] = True
+            try:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+            finally:
+                index.dialect_options['postgresql']['concurrently'] = False
+    else:
+        with engine.begin() as conn:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+def migrate_indexes(engine, metadatas, concurrently=True, dry_run=False, log=print):
+    """Build every missing declared index, returning the names that were (or would be) created"""
+    created = []
+    for index in missing_indexes(engine, metadatas):
+        columns = ', '.join(str(expr) for expr in index.expressions)
+        if index.unique:
+            duplicates = dedupe_for_unique_index(engine, index, dry_run=dry_run)
+            if duplicates:
+                log(f"{'Would delete' if dry_run else 'Deleted'} {duplicates} duplicate {index.table.name} rows for {index.name}")
+        log(f"{'Would create' if dry_run else 'Creating'} {index.name} ON {index.table.name} ({columns})")
+        if not dry_run:
+            build_index(engine, index, concurrently=concurrently)
+        created.append(index.name)
+    if not created:
+        log('All declared indexes are present.')
+    return created
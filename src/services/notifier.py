@@ -0,0 +1,195 @@
+# burudani_backend/src/services/notifier.py
+#
+# Pub/sub for payment status changes, keyed by order_id. Long-poll and SSE
+# requests subscribe to an order; the webhook, the background initiation and
+# the reconciler publish after committing. InMemoryNotifier only fans out
+# inside one process; PostgresNotifier relays through LISTEN/NOTIFY so every
+# gunicorn worker (and the separate reconciler worker) sees every change.
+
+import json
+import os
+import select
+import threading
+import time
+from collections import deque
+from flask import current_app
+from sqlalchemy import text
+
+try:
+    import psycopg2
+except ImportError:  # only needed for the Postgres notifier
+    psycopg2 = None
+
+# 'auto' uses Postgres LISTEN/NOTIFY when the database is Postgres, else 'memory'
+PAYMENT_NOTIFIER = os.environ.get('PAYMENT_NOTIFIER', 'auto')
+NOTIFY_CHANNEL = 'payment_status'
+
+class Subscription:
+    """Messages published for one key, buffered until the subscriber reads them"""
+
+    def __init__(self, notifier, key):
+        self.notifier = notifier
+        self.key = key
+        self._messages = deque()
+        self._cond = threading.Condition()
+
+    def deliver(self, message):
+        with self._cond:
+            self._messages.append(message)
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Next message, or None if nothing arrives within `timeout` seconds"""
+        with self._cond:
+            if not self._messages:
+                self._cond.wait(timeout)
+            return self._messages.popleft() if self._messages else None
+
+    def close(self):
+        self.notifier.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class InMemoryNotifier:
+    """Single-process notifier; also the local fan-out used by PostgresNotifier"""
+
+    def __init__(self):
+        self._subscribers = {}  # key -> set of Subscription
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, key):
+        subscription = Subscription(self, key)
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.key]
+
+    def _dispatch(self, key, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        self.delivered += len(subscribers)
+
+    def publish(self, key, message):
+        self.published += 1
+        self._dispatch(key, message)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'keys': len(self._subscribers),
+                'subscribers': sum(len(s) for s in self._subscribers.values()),
+                'published': self.published,
+                'delivered': self.delivered,
+            }
+
+class PostgresNotifier(InMemoryNotifier):
+    """Cross-process notifier over Postgres LISTEN/NOTIFY.
+
+    One listener connection per process receives every notification on the
+    channel and fans it out to local subscribers, so the cost does not grow
+    with the number of waiting clients. The listener starts on first
+    subscribe, after gunicorn has forked the worker.
+    """
+
+    def __init__(self, engine, channel=NOTIFY_CHANNEL):
+        if psycopg2 is None:
+            raise RuntimeError('PostgresNotifier requires psycopg2')
+        super().__init__()
+        self.engine = engine
+        self.channel = channel
+        self._dsn = engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def subscribe(self, key):
+        self._ensure_listener()
+        return super().subscribe(key)
+
+    def publish(self, key, message):
+        # Delivered to every listening process, this one included
+        self.published += 1
+        payload = json.dumps({'key': key, 'message': message}, default=str)
+        with self.engine.connect() as conn:
+            conn.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': self.channel, 'payload': payload})
+            conn.commit()
+
+    def _ensure_listener(self):
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='payment-notify', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self._dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                conn.cursor().execute(f'LISTEN {self.channel}')
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        data = json.loads(notification.payload)
+                        self._dispatch(data['key'], data['message'])
+            except Exception as e:
+                # Waiters fall back to their timeout and re-read the row, so a gap only adds latency
+                print(f"Payment notifier listener error, reconnecting: {str(e)}")
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        stats = super().stats()
+        stats['backend'] = 'postgres'
+        return stats
+
+def create_notifier(engine, backend=PAYMENT_NOTIFIER):
+    if backend == 'postgres' or (backend == 'auto' and engine.dialect.name == 'postgresql'):
+        return PostgresNotifier(engine)
+    return InMemoryNotifier()
+
+def init_notifier(app, db):
+    """Attach the payment notifier selected by PAYMENT_NOTIFIER to the app"""
+    with app.app_context():
+        app.extensions['payment_notifier'] = create_notifier(db.engine, app.config.get('PAYMENT_NOTIFIER', PAYMENT_NOTIFIER))
+    return app.extensions['payment_notifier']
+
+def get_notifier():
+    return current_app.extensions['payment_notifier']
+
+def notify_payment(payment):
+    """Publish the current status of a payment; call after the change is committed"""
+    try:
+        get_notifier().publish(payment.order_id, {
+            'order_id': payment.order_id,
+            'payment_status': payment.payment_status,
+        })
+    except Exception as e:
+        # The row is already committed; waiters will pick it up on their timeout
+        print(f"Payment notification failed for {payment.order_id}: {str(e)}")
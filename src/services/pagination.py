@@ -0,0 +1,71 @@
+# burudani_backend/src/services/pagination.py
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import DateTime, tuple_
+
+MAX_PER_PAGE = 100
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+def encode_cursor(*values):
+    """Pack sort-key values into an opaque, URL-safe cursor string"""
+    raw = json.dumps(values, separators=(',', ':'), default=_json_default).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, size):
+    """Unpack a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+def wants_cursor(args):
+    """True when the client opted into keyset pagination (?cursor= or ?pagination=cursor)"""
+    return 'cursor' in args or args.get('pagination') == 'cursor'
+
+def page_size(args, default=20):
+    """per_page from the query string, clamped to 1..MAX_PER_PAGE; raises ValueError if not an integer"""
+    try:
+        per_page = int(args.get('per_page', default))
+    except (TypeError, ValueError):
+        raise ValueError('per_page must be an integer')
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+def wants_total(args):
+    return args.get('include_total', '').lower() in ('1', 'true', 'yes')
+
+def keyset_paginate(query, sort_column, id_column, cursor, per_page, key=None):
+    """Newest-first page of `query` ordered by (sort_column, id_column) without OFFSET or COUNT.
+
+    `key` extracts the (sort value, id) pair from a result row; it defaults to
+    reading the column attributes off the row, which works for single-entity queries.
+    Returns (rows, next_cursor) where next_cursor is None on the last page.
+    """
+    if per_page < 1:
+        raise ValueError('per_page must be at least 1')
+    if key is None:
+        key = lambda row: (getattr(row, sort_column.key), getattr(row, id_column.key))
+    if cursor:
+        sort_value, id_value = decode_cursor(cursor, 2)
+        if isinstance(sort_column.type, DateTime):
+            try:
+                sort_value = datetime.fromisoformat(sort_value)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, id_value))
+    rows = query.order_by(None).order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(*key(rows[-1]))
+    return rows, next_cursor
@@ -0,0 +1,85 @@
+# burudani_backend/src/services/passwords.py
+#
+# Password hashing off the request thread. bcrypt releases the GIL, so a
+# small pool lets one worker verify several logins at once, while the pool
+# bound keeps a login storm from starving every other request of CPU.
+# Legacy werkzeug hashes (pbkdf2:/scrypt:, written by src/mock_data.py and
+# setup_database.py) still verify and are replaced with bcrypt on login.
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from werkzeug.security import check_password_hash
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+PASSWORD_HASH_THREADS = int(os.environ.get('PASSWORD_HASH_THREADS', os.cpu_count() or 2))
+
+def _is_bcrypt(stored_hash):
+    return stored_hash.startswith(('$2a$', '$2b$', '$2y$'))
+
+def _bcrypt_rounds(stored_hash):
+    return int(stored_hash.split('$')[2])
+
+class PasswordHasher:
+    def __init__(self, rounds=BCRYPT_ROUNDS, max_workers=PASSWORD_HASH_THREADS):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+        self.hashes = 0
+        self.verifies = 0
+        self.legacy_verifies = 0
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    def _verify(self, password, stored_hash):
+        if _is_bcrypt(stored_hash):
+            try:
+                return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+            except ValueError:
+                return False  # malformed hash
+        self._count('legacy_verifies')
+        return check_password_hash(stored_hash, password)
+
+    def hash(self, password):
+        """bcrypt hash at the configured cost, computed on the hashing pool"""
+        self._count('hashes')
+        return self._executor.submit(self._hash, password).result()
+
+    def verify(self, password, stored_hash):
+        """Check a password against a bcrypt or legacy werkzeug hash, on the hashing pool"""
+        if not stored_hash or not password:
+            return False
+        self._count('verifies')
+        return self._executor.submit(self._verify, password, stored_hash).result()
+
+    def needs_rehash(self, stored_hash):
+        """True for legacy werkzeug hashes and bcrypt hashes at a different cost"""
+        return not _is_bcrypt(stored_hash) or _bcrypt_rounds(stored_hash) != self.rounds
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rounds': self.rounds,
+                'threads': self.max_workers,
+                'hashes': self.hashes,
+                'verifies': self.verifies,
+                'legacy_verifies': self.legacy_verifies,
+            }
+
+hasher = PasswordHasher()
+
+def hash_password(password):
+    return hasher.hash(password)
+
+def verify_password(password, stored_hash):
+    return hasher.verify(password, stored_hash)
+
+def needs_rehash(stored_hash):
+    return hasher.needs_rehash(stored_hash)
@@ -0,0 +1,31 @@
+# burudani_backend/src/services/projection.py
+
+from src.models.content import CONTENT_FIELDS
+
+# Named field sets for ?view=. 'detail' (None) is the full Content.to_dict().
+CONTENT_VIEWS = {
+    'card': ('id', 'title', 'thumbnail_url', 'type', 'is_premium', 'is_featured', 'is_trending'),
+    'detail': None,
+}
+
+def requested_fields(source):
+    """Content fields requested via `fields` (comma list or JSON array) or a named `view`.
+
+    Returns None for the full representation and raises ValueError for
+    unknown views or fields. `source` is request.args or a JSON body.
+    """
+    fields = source.get('fields')
+    view = source.get('view')
+    if fields:
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        names = tuple(dict.fromkeys(str(name).strip() for name in fields if str(name).strip()))
+        unknown = [name for name in names if name not in CONTENT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+        return names or None
+    if view:
+        if view not in CONTENT_VIEWS:
+            raise ValueError(f"Unknown view: {view}. Available views: {', '.join(CONTENT_VIEWS)}")
+        return CONTENT_VIEWS[view]
+    return None
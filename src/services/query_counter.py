@@ -0,0 +1,38 @@
+# burudani_backend/src/services/query_counter.py
+
+import threading
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryCounter:
+    """Records every SQL statement executed on the current thread while active"""
+
+    def __init__(self):
+        self.statements = []
+        self._thread_id = threading.get_ident()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(Engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'before_cursor_execute', self._on_execute)
+        return False
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail if the wrapped block issues more than `limit` SQL statements"""
+    with QueryCounter() as counter:
+        yield counter
+    if counter.count > limit:
+        listing = '\n'.join(f'  {i + 1}. {sql}' for i, sql in enumerate(counter.statements))
+        raise AssertionError(f'Expected at most {limit} queries, got {counter.count}:\n{listing}')
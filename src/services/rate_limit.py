@@ -0,0 +1,159 @@
+# burudani_backend/src/services/rate_limit.py
+#
+# Sliding-window rate limits for the auth blueprint. Every login attempt
+# costs a full bcrypt check, so over-limit attempts are rejected before the
+# user lookup or any hashing runs. The window is the usual two-bucket
+# approximation: the previous fixed window's count, weighted by how much of
+# it still overlaps the sliding window, plus the current window's count.
+#
+#   RATE_LIMIT_BACKEND         'memory' (per worker) or 'redis' (shared, REDIS_URL)
+#   LOGIN_RATE_LIMIT_PER_IP    attempts/seconds, e.g. '30/60'
+#   LOGIN_RATE_LIMIT_PER_EMAIL attempts/seconds for one account
+#   REGISTER_RATE_LIMIT_PER_IP attempts/seconds for sign-ups
+
+import math
+import os
+import threading
+import time
+from collections import Counter
+from flask import jsonify
+
+try:
+    import redis
+except ImportError:  # only needed for the shared backend
+    redis = None
+
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+DEFAULT_RULES = {
+    'login_ip': os.environ.get('LOGIN_RATE_LIMIT_PER_IP', '30/60'),
+    'login_email': os.environ.get('LOGIN_RATE_LIMIT_PER_EMAIL', '10/300'),
+    'register_ip': os.environ.get('REGISTER_RATE_LIMIT_PER_IP', '10/3600'),
+}
+
+def parse_rule(spec):
+    """'30/60' -> (30, 60.0): at most 30 hits in any 60 second window"""
+    limit, window = spec.split('/')
+    return int(limit), float(window)
+
+class MemoryRateLimitBackend:
+    """Window counters local to this process"""
+
+    def __init__(self):
+        self._counts = {}  # window length -> {(key, window index): hits}
+        self._pruned_at = {}  # window length -> window index of the last prune
+        self._lock = threading.Lock()
+
+    def hit(self, key, window_index, window):
+        """Count a hit in the current window; returns (current, previous) counts"""
+        with self._lock:
+            counts = self._counts.setdefault(window, {})
+            if self._pruned_at.get(window) != window_index:
+                # Windows older than the previous one no longer matter
+                counts = self._counts[window] = {k: v for k, v in counts.items() if k[1] >= window_index - 1}
+                self._pruned_at[window] = window_index
+            current = counts.get((key, window_index), 0) + 1
+            counts[(key, window_index)] = current
+            return current, counts.get((key, window_index - 1), 0)
+
+class RedisRateLimitBackend:
+    """Window counters shared by every worker through Redis (INCR + EXPIRE in one round trip)"""
+
+    def __init__(self, client, prefix='ratelimit'):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key, window_index, window):
+        current_key = f'{self.prefix}:{key}:{window_index}'
+        pipe = self.client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, int(math.ceil(window * 2)))
+        pipe.get(f'{self.prefix}:{key}:{window_index - 1}')
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+class RateLimitDecision:
+    def __init__(self, allowed, rule=None, retry_after=0):
+        self.allowed = allowed
+        self.rule = rule
+        self.retry_after = retry_after
+
+class RateLimiter:
+    """Named sliding-window rules checked against a counter backend"""
+
+    def __init__(self, backend, rules=None, clock=time.time):
+        self.backend = backend
+        self.rules = {name: parse_rule(spec) for name, spec in (rules or DEFAULT_RULES).items()}
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.allowed = Counter()
+        self.rejected = Counter()
+        self.backend_errors = 0
+
+    def _check(self, name, identity):
+        limit, window = self.rules[name]
+        now = self._clock()
+        window_index = int(now // window)
+        try:
+            current, previous = self.backend.hit(f'{name}:{identity}', window_index, window)
+        except Exception as e:
+            # Fail open: an unreachable limiter backend must not lock everyone out
+            with self._lock:
+                self.backend_errors += 1
+            print(f"Rate limiter backend error: {str(e)}")
+            return RateLimitDecision(True)
+        overlap = 1 - (now % window) / window
+        if previous * overlap + current <= limit:
+            return RateLimitDecision(True)
+        return RateLimitDecision(False, name, int(math.ceil(window - now % window)))
+
+    def check(self, *hits):
+        """Count (rule, identity) hits in order, stopping at the first rule over its limit"""
+        for name, identity in hits:
+            if not identity:
+                continue
+            decision = self._check(name, identity)
+            with self._lock:
+                if decision.allowed:
+                    self.allowed[name] += 1
+                else:
+                    self.rejected[name] += 1
+            if not decision.allowed:
+                return decision
+        return RateLimitDecision(True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.backend.__class__.__name__,
+                'rules': {name: f'{limit}/{window:g}' for name, (limit, window) in self.rules.items()},
+                'allowed': dict(self.allowed),
+                'rejected': dict(self.rejected),
+                # Each rejection skipped a user lookup and a bcrypt check or hash
+                'bcrypt_checks_avoided': sum(self.rejected.values()),
+                'backend_errors': self.backend_errors,
+            }
+
+def too_many_requests(decision):
+    response = jsonify({'error': 'Too many attempts, please try again later'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(decision.retry_after)
+    return response
+
+def create_rate_limiter(backend=RATE_LIMIT_BACKEND, client=None, rules=None):
+    if backend == 'redis':
+        if client is None:
+            if redis is None:
+                raise RuntimeError('RATE_LIMIT_BACKEND=redis requires the redis package')
+            client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5)
+        return RateLimiter(RedisRateLimitBackend(client), rules)
+    if backend == 'memory':
+        return RateLimiter(MemoryRateLimitBackend(), rules)
+    raise ValueError(f'Unknown RATE_LIMIT_BACKEND: {backend}')
+
+def init_rate_limiter(app, client=None):
+    """Attach the auth rate limiter selected by RATE_LIMIT_BACKEND to the app"""
+    limiter = create_rate_limiter(app.config.get('RATE_LIMIT_BACKEND', RATE_LIMIT_BACKEND), client)
+    app.extensions['rate_limiter'] = limiter
+    return limiter
@@ -0,0 +1,208 @@
+# burudani_backend/src/services/reconciler.py
+#
+# Background reconciliation of in-flight payments against Zeno. Clients poll
+# /payments/status/<order_id>, which answers from the local row; this worker
+# is the only thing that asks Zeno for order status.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from src.models.db import db
+from src.models.payment import Payment, ACTIVE_PAYMENT_STATUSES as ACTIVE_STATUSES, can_transition
+from src.services.notifier import notify_payment
+from src.services.zeno_client import GatewayError, get_zeno_client
+
+EXPIRED_STATUS = 'EXPIRED'
+
+RECONCILE_INTERVAL = float(os.environ.get('PAYMENT_RECONCILE_INTERVAL', 5))
+RECONCILE_BATCH_SIZE = int(os.environ.get('PAYMENT_RECONCILE_BATCH_SIZE', 100))
+RECONCILE_CONCURRENCY = int(os.environ.get('PAYMENT_RECONCILE_CONCURRENCY', 4))
+# Per-order backoff between Zeno checks: base * 2^attempts, capped
+RECONCILE_BACKOFF_BASE = float(os.environ.get('PAYMENT_RECONCILE_BACKOFF_BASE', 5))
+RECONCILE_BACKOFF_MAX = float(os.environ.get('PAYMENT_RECONCILE_BACKOFF_MAX', 300))
+# Payments still pending after this many seconds are marked EXPIRED and no longer polled
+PAYMENT_EXPIRY = float(os.environ.get('PAYMENT_EXPIRY_SECONDS', 1800))
+
+def apply_order_status(payment, order):
+    """Copy a Zeno order-status record onto the payment; returns True if it changed.
+
+    The transition is claimed with a conditional UPDATE (WHERE payment_status is
+    still the status the payment was read with), so a transition the webhook
+    consumer committed in the meantime is never overwritten. The attribute
+    changes below then flush under that row lock and fire the usual session
+    events (entitlement and identity invalidation).
+    """
+    status = order.get('payment_status')
+    seen = payment.payment_status
+    if not status or not can_transition(seen, status):
+        return False
+    claimed = db.session.execute(
+        update(Payment.__table__)
+        .where(Payment.__table__.c.id == payment.id, Payment.__table__.c.payment_status == seen)
+        .values(payment_status=status)
+    ).rowcount
+    if not claimed:
+        db.session.expire(payment)
+        return False
+    payment.payment_status = status
+    payment.transaction_id = order.get('transid') or payment.transaction_id
+    payment.reference = order.get('reference') or payment.reference
+    payment.channel = order.get('channel') or payment.channel
+    payment.updated_at = datetime.utcnow()
+    return True
+
+class PaymentReconciler:
+    """Polls Zeno for PENDING/INITIATED payments in batches with per-order backoff.
+
+    Backoff state lives in memory, so a restarted worker simply checks every
+    active payment once more before backing off again.
+    """
+
+    def __init__(self, app, client=None, interval=RECONCILE_INTERVAL, batch_size=RECONCILE_BATCH_SIZE,
+                 concurrency=RECONCILE_CONCURRENCY, backoff_base=RECONCILE_BACKOFF_BASE,
+                 backoff_max=RECONCILE_BACKOFF_MAX, expiry=PAYMENT_EXPIRY, clock=time.monotonic):
+        self.app = app
+        self.client = client
+        self.interval = interval
+        self.batch_size = batch_size
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.expiry = expiry
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='reconcile')
+        self._backoff = {}  # order_id -> (attempts, next check at)
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.checked = 0
+        self.updated = 0
+        self.expired = 0
+        self.errors = 0
+
+    def _due(self, order_id, now):
+        return self._backoff.get(order_id, (0, 0))[1] <= now
+
+    def _back_off(self, order_id, now):
+        attempts = self._backoff.get(order_id, (0, 0))[0]
+        delay = min(self.backoff_base * (2 ** attempts), self.backoff_max)
+        self._backoff[order_id] = (attempts + 1, now + delay)
+
+    def _fetch(self, order_id):
+        try:
+            response = (self.client or get_zeno_client()).order_status(order_id)
+        except GatewayError as e:
+            return order_id, None, str(e)
+        if not response.ok:
+            return order_id, None, f'Zeno returned {response.status_code}'
+        try:
+            data = response.json().get('data') or []
+            order = data[0] if data else None
+        except (ValueError, AttributeError, TypeError, KeyError):
+            # e.g. an HTML error page with a 200; back this order off like any other failure
+            return order_id, None, 'Zeno returned an unreadable order-status body'
+        if order is not None and not isinstance(order, dict):
+            return order_id, None, 'Zeno returned an unreadable order-status body'
+        return order_id, order, None
+
+    def expire_stale(self):
+        """Mark payments that stayed active past the expiry window as EXPIRED, in one UPDATE"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.expiry)
+        stale = [order_id for (order_id,) in db.session.query(Payment.order_id).filter(
+            Payment.payment_status.in_(ACTIVE_STATUSES), Payment.created_at < cutoff
+        )]
+        if not stale:
+            return 0
+        expired = Payment.query.filter(
+            Payment.order_id.in_(stale), Payment.payment_status.in_(ACTIVE_STATUSES)
+        ).update({'payment_status': EXPIRED_STATUS, 'updated_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        for payment in Payment.query.filter(Payment.order_id.in_(stale)):
+            notify_payment(payment)
+        return expired
+
+    def run_once(self):
+        """Check one batch of due payments against Zeno; returns counts for this run"""
+        result = {'checked': 0, 'updated': 0, 'expired': 0, 'errors': 0}
+        with self.app.app_context():
+            try:
+                result['expired'] = self.expire_stale()
+
+                now = self._clock()
+                active = [order_id for (order_id,) in db.session.query(Payment.order_id).filter(
+                    Payment.payment_status.in_(ACTIVE_STATUSES)
+                ).order_by(Payment.created_at)]
+                # Orders that left the active set (webhook, expiry) no longer need backoff state
+                active_set = set(active)
+                for order_id in [o for o in self._backoff if o not in active_set]:
+                    del self._backoff[order_id]
+
+                due = [order_id for order_id in active if self._due(order_id, now)][:self.batch_size]
+                if due:
+                    # Gateway calls run concurrently; all database writes stay on this thread
+                    orders = list(self._executor.map(self._fetch, due))
+                    payments = {p.order_id: p for p in Payment.query.filter(Payment.order_id.in_(due))}
+                    changed = []
+                    for order_id, order, error in orders:
+                        result['checked'] += 1
+                        payment = payments.get(order_id)
+                        if error:
+                            result['errors'] += 1
+                        if payment is not None and order is not None and apply_order_status(payment, order):
+                            changed.append(payment)
+                            result['updated'] += 1
+                        if payment is not None and payment.payment_status in ACTIVE_STATUSES:
+                            self._back_off(order_id, now)
+                        else:
+                            self._backoff.pop(order_id, None)
+                    db.session.commit()
+                    for payment in changed:
+                        notify_payment(payment)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Payment reconciliation run failed: {str(e)}")
+                result['errors'] += 1
+            finally:
+                db.session.remove()
+
+        self.runs += 1
+        for key, value in result.items():
+            setattr(self, key, getattr(self, key) + value)
+        return result
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name='payment-reconciler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'tracked': len(self._backoff),
+            'runs': self.runs,
+            'checked': self.checked,
+            'updated': self.updated,
+            'expired': self.expired,
+            'errors': self.errors,
+        }
+
+def init_reconciler(app):
+    """Run the reconciler inside the web process when PAYMENT_RECONCILER_IN_PROCESS is set.
+
+    Production runs it as the separate `worker` process instead, so that
+    several web workers do not each poll Zeno for the same orders.
+    """
+    if app.config.get('PAYMENT_RECONCILER_IN_PROCESS'):
+        reconciler = PaymentReconciler(app)
+        reconciler.start()
+        app.extensions['payment_reconciler'] = reconciler
+    return app.extensions.get('payment_reconciler')
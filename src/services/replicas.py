@@ -0,0 +1,185 @@
+# burudani_backend/src/services/replicas.py
+#
+# Read-replica routing. GET requests to the catalog, user, streaming and
+# payments blueprints (plus views marked @replica_reads) run their queries on
+# a healthy replica; views marked @primary_reads, everything else, every
+# flush/DML statement and all background threads use the primary. A client that committed a write is
+# pinned to the primary for READ_YOUR_WRITES_SECONDS so it sees its own
+# changes despite replication lag. The write time travels in a signed
+# last_write_at cookie, so the pin holds whichever worker or instance serves
+# the client's next request.
+
+import contextlib
+import itertools
+import math
+import os
+import threading
+import time
+from flask import g, has_request_context, request
+from itsdangerous import BadSignature, Signer
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from src.models.db import REPLICA_BIND_PREFIX
+
+# Comma-separated replica URLs; empty disables routing
+DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+READ_YOUR_WRITES_COOKIE = 'last_write_at'
+# How often a replica's health (and, on Postgres, its replay lag) is re-checked
+REPLICA_HEALTH_INTERVAL = float(os.environ.get('REPLICA_HEALTH_INTERVAL', 5))
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 10))
+
+READ_METHODS = ('GET', 'HEAD')
+READ_BLUEPRINTS = {'content', 'user', 'streaming', 'payments'}
+
+def replica_reads(view):
+    """Mark a non-GET view as read-only and idempotent; it may use a replica and is re-run on a replica failure"""
+    view.replica_reads = True
+    return view
+
+def primary_reads(view):
+    """Keep a GET view in a replica-routed blueprint on the primary (it must not see lagging rows)"""
+    view.primary_reads = True
+    return view
+
+@contextlib.contextmanager
+def use_primary():
+    """Run the enclosed queries on the primary even inside a replica-routed request"""
+    replica = g.pop('db_replica', None) if has_request_context() else None
+    try:
+        yield
+    finally:
+        if replica is not None:
+            g.db_replica = replica
+
+class ReplicaSet:
+    """Round-robin over replica engines, skipping any that failed a health check"""
+
+    def __init__(self, engines, health_interval=REPLICA_HEALTH_INTERVAL, max_lag=REPLICA_MAX_LAG_SECONDS,
+                 clock=time.monotonic):
+        self.engines = list(engines)
+        self.health_interval = health_interval
+        self.max_lag = max_lag
+        self._clock = clock
+        self._cycle = itertools.cycle(range(len(self.engines)))
+        self._healthy = {engine: True for engine in self.engines}
+        self._checked_at = {engine: clock() for engine in self.engines}
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.fallbacks = 0
+        for engine in self.engines:
+            event.listen(engine, 'handle_error', self._on_error)
+
+    def _on_error(self, context):
+        # Connection-level failures take the replica out until its next health check
+        if context.is_disconnect or context.connection is None:
+            self.mark_unhealthy(context.engine)
+            if has_request_context():
+                g.db_replica_failed = True
+
+    def mark_unhealthy(self, engine):
+        with self._lock:
+            self._healthy[engine] = False
+            self._checked_at[engine] = self._clock()
+        print(f"Replica {engine.url.render_as_string()} marked unhealthy")
+
+    def probe(self, engine):
+        """True if the replica answers and (on Postgres) is not lagging beyond max_lag"""
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == 'postgresql':
+                    lag = conn.execute(text(
+                        'SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())'
+                    )).scalar()
+                    return lag is None or lag <= self.max_lag
+                conn.execute(text('SELECT 1'))
+                return True
+        except Exception:
+            return False
+
+    def _refresh(self, engine):
+        now = self._clock()
+        if now - self._checked_at[engine] < self.health_interval:
+            return self._healthy[engine]
+        with self._lock:
+            self._checked_at[engine] = now  # one thread probes, the others use the last result
+        healthy = self.probe(engine)
+        with self._lock:
+            self._healthy[engine] = healthy
+        return healthy
+
+    def choose(self):
+        """A healthy replica engine, or None to fall back to the primary"""
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._cycle)]
+            if self._refresh(engine):
+                self.routed += 1
+                return engine
+        self.fallbacks += 1
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'replicas': len(self.engines),
+                'healthy': sum(self._healthy.values()),
+                'routed': self.routed,
+                'fallbacks': self.fallbacks,
+            }
+
+def _wrote_recently(signer, window):
+    """True if the request carries a genuine last_write_at cookie younger than the window"""
+    cookie = request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    if not cookie:
+        return False
+    try:
+        written_at = float(signer.unsign(cookie))
+    except (BadSignature, ValueError):
+        return False
+    return time.time() - written_at < window
+
+def init_replicas(app, db):
+    """Route eligible reads to the replica binds configured through init_db"""
+    with app.app_context():
+        engines = [engine for key, engine in db.engines.items() if key and key.startswith(REPLICA_BIND_PREFIX)]
+    if not engines:
+        return None
+
+    replicas = ReplicaSet(engines)
+    window = app.config.get('READ_YOUR_WRITES_SECONDS', READ_YOUR_WRITES_SECONDS)
+    signer = Signer(app.config['SECRET_KEY'], salt=READ_YOUR_WRITES_COOKIE)
+    app.extensions['db_replicas'] = replicas
+
+    @event.listens_for(Session, 'after_commit')
+    def _remember_write(session):
+        if has_request_context():
+            g.db_wrote = True
+
+    @app.before_request
+    def _route_reads():
+        view = app.view_functions.get(request.endpoint)
+        if request.method in READ_METHODS:
+            eligible = request.blueprint in READ_BLUEPRINTS and not getattr(view, 'primary_reads', False)
+        else:
+            eligible = getattr(view, 'replica_reads', False)
+        if not eligible:
+            return
+        if _wrote_recently(signer, window):
+            return
+        g.db_replica = replicas.choose()
+
+    @app.after_request
+    def _after_routed_request(response):
+        if g.pop('db_replica_failed', False):
+            # Routed requests are GETs or @replica_reads views, which must be idempotent, so they
+            # are run again on the primary. The first response (status, headers, cookies) is discarded.
+            g.db_replica = None
+            db.session.rollback()
+            response = app.make_response(app.ensure_sync(app.view_functions[request.endpoint])(**request.view_args))
+        if g.get('db_wrote'):
+            response.set_cookie(READ_YOUR_WRITES_COOKIE, signer.sign(repr(time.time())).decode(),
+                                max_age=math.ceil(window), httponly=True, samesite='Lax',
+                                secure=request.is_secure)
+        return response
+
+    return replicas
@@ -0,0 +1,157 @@
+# burudani_backend/src/services/revocation.py
+#
+# JWT revocation without a database round trip per request. Revoked jtis
+# live in the revoked_tokens table; each worker mirrors the unexpired ones
+# in a dict (jti -> expiry) plus a heap ordered by expiry, so a blocklist
+# check is one dict lookup and expired entries fall out on their own. A
+# sync thread pulls rows revoked by other workers every
+# TOKEN_REVOCATION_SYNC_INTERVAL seconds; revocations made in this worker
+# apply immediately.
+
+import calendar
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from src.models.db import db
+from src.models.token import RevokedToken
+
+TOKEN_REVOCATION_SYNC_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_SYNC_INTERVAL', 5))
+# How often expired rows are deleted from revoked_tokens
+TOKEN_REVOCATION_PURGE_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_PURGE_INTERVAL', 3600))
+
+def _epoch(value):
+    return calendar.timegm(value.utctimetuple())
+
+class RevocationList:
+    """In-process expiring set of revoked jtis, synced from revoked_tokens"""
+
+    def __init__(self, app, interval=TOKEN_REVOCATION_SYNC_INTERVAL, purge_interval=TOKEN_REVOCATION_PURGE_INTERVAL,
+                 clock=time.time):
+        self.app = app
+        self.interval = interval
+        self.purge_interval = purge_interval
+        self._clock = clock
+        self._expires = {}  # jti -> expiry (epoch seconds)
+        self._heap = []  # (expiry, jti)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._synced_at = None  # datetime of the last sync's start
+        self._purged_at = 0
+        self.checks = 0
+        self.rejected = 0
+        self.syncs = 0
+        self.evicted = 0
+        self.errors = 0
+
+    def __len__(self):
+        return len(self._expires)
+
+    def _add(self, jti, expires):
+        if expires <= self._clock():
+            return
+        with self._lock:
+            if jti not in self._expires:
+                self._expires[jti] = expires
+                heapq.heappush(self._heap, (expires, jti))
+
+    def _evict(self, now):
+        # Caller holds the lock
+        while self._heap and self._heap[0][0] <= now:
+            _, jti = heapq.heappop(self._heap)
+            if self._expires.pop(jti, None) is not None:
+                self.evicted += 1
+
+    def is_revoked(self, jti):
+        """Blocklist check for a decoded token; no database access"""
+        now = self._clock()
+        with self._lock:
+            self.checks += 1
+            if self._heap and self._heap[0][0] <= now:
+                self._evict(now)
+            revoked = jti in self._expires
+            if revoked:
+                self.rejected += 1
+            return revoked
+
+    def revoke(self, jwt_payload):
+        """Persist a token's revocation and apply it to this worker at once (the caller commits)"""
+        jti = jwt_payload['jti']
+        self._add(jti, jwt_payload['exp'])
+        if RevokedToken.query.filter_by(jti=jti).first() is None:
+            db.session.add(RevokedToken(
+                jti=jti,
+                token_type=jwt_payload.get('type', 'access'),
+                user_id=jwt_payload.get('sub'),
+                expires_at=datetime.utcfromtimestamp(jwt_payload['exp']),
+            ))
+
+    def sync(self):
+        """Pull revocations recorded since the last sync (all unexpired ones on the first run)"""
+        started = datetime.utcnow()
+        with self.app.app_context():
+            try:
+                query = db.session.query(RevokedToken.jti, RevokedToken.expires_at).filter(
+                    RevokedToken.expires_at > started
+                )
+                if self._synced_at is not None:
+                    # Overlap the previous window so rows committed late or stamped by a skewed clock are not missed
+                    query = query.filter(RevokedToken.revoked_at >= self._synced_at - timedelta(seconds=max(self.interval, 1) * 2))
+                rows = query.all()
+                if self._clock() - self._purged_at >= self.purge_interval:
+                    RevokedToken.query.filter(RevokedToken.expires_at <= started).delete(synchronize_session=False)
+                    db.session.commit()
+                    self._purged_at = self._clock()
+            except Exception as e:
+                db.session.rollback()
+                self.errors += 1
+                print(f"Token revocation sync failed: {str(e)}")
+                return 0
+            finally:
+                db.session.remove()
+        for jti, expires_at in rows:
+            self._add(jti, _epoch(expires_at))
+        self._synced_at = started
+        self.syncs += 1
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sync()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='token-revocation-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'revoked': len(self._expires),
+                'checks': self.checks,
+                'rejected': self.rejected,
+                'evicted': self.evicted,
+                'syncs': self.syncs,
+                'sync_errors': self.errors,
+            }
+
+def init_revocation(app, jwt):
+    """Load the blocklist, start its sync thread and hook it into JWT verification"""
+    revocations = RevocationList(app, app.config.get('TOKEN_REVOCATION_SYNC_INTERVAL', TOKEN_REVOCATION_SYNC_INTERVAL))
+    revocations.sync()
+    if revocations.interval > 0:
+        revocations.start()
+
+    @jwt.token_in_blocklist_loader
+    def _token_revoked(jwt_header, jwt_payload):
+        return revocations.is_revoked(jwt_payload['jti'])
+
+    app.extensions['token_revocation'] = revocations
+    return revocations
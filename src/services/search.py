@@ -0,0 +1,297 @@
+# burudani_backend/src/services/search.py
+
+import bisect
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from flask import current_app
+from src.models.content import Content, db
+from src.services.migrations import invalid_postgres_indexes
+
+# 'auto' picks postgres/sqlite from the database URL and falls back to the
+# in-process index when the database has no full-text support (e.g. SQLite
+# built without FTS5). 'memory' forces the in-process index.
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+
+# Cap for clients that do not ask for cursor pagination
+MAX_UNPAGINATED_RESULTS = int(os.environ.get('SEARCH_MAX_UNPAGINATED_RESULTS', 100))
+
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+def tokenize(text_value):
+    """Lower-cased word tokens, matching what the database tokenizers produce"""
+    return re.findall(r'\w+', (text_value or '').lower())
+
+class InvertedIndex:
+    """In-process inverted index over Content.title/description with prefix matching"""
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # token -> {content_id: weighted term frequency}
+        self._documents = {}                # content_id -> set of tokens
+        self._terms = []                    # sorted tokens, rebuilt lazily for prefix lookups
+        self._terms_dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, content_id, title, description):
+        with self._lock:
+            self.remove(content_id)
+            weights = defaultdict(float)
+            for token in tokenize(title):
+                weights[token] += TITLE_WEIGHT
+            for token in tokenize(description):
+                weights[token] += DESCRIPTION_WEIGHT
+            for token, weight in weights.items():
+                if token not in self._postings:
+                    self._terms_dirty = True
+                self._postings[token][content_id] = weight
+            self._documents[content_id] = set(weights)
+
+    def remove(self, content_id):
+        with self._lock:
+            for token in self._documents.pop(content_id, ()):
+                postings = self._postings[token]
+                postings.pop(content_id, None)
+                if not postings:
+                    del self._postings[token]
+                    self._terms_dirty = True
+
+    def _expand(self, prefix):
+        if self._terms_dirty:
+            self._terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + '\uffff')
+        return self._terms[start:end]
+
+    def search(self, query, limit, after=None):
+        """Return up to `limit` (content_id, score) pairs, best first, all tokens required"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for term in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    for content_id, weight in postings.items():
+                        token_scores[content_id] = max(token_scores[content_id], weight * idf)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {cid: score + token_scores[cid] for cid, score in scores.items() if cid in token_scores}
+                if not scores:
+                    return []
+        ranked = sorted(((cid, round(score, 6)) for cid, score in scores.items()), key=lambda item: (-item[1], item[0]))
+        if after:
+            after_score, after_id = after
+            ranked = [item for item in ranked if item[1] < after_score or (item[1] == after_score and item[0] > after_id)]
+        return ranked[:limit]
+
+class MemorySearchBackend:
+    name = 'memory'
+
+    def __init__(self):
+        self.index = InvertedIndex()
+
+    def setup(self, app, db):
+        with app.app_context():
+            rows = db.session.query(Content.id, Content.title, Content.description).all()
+        for content_id, title, description in rows:
+            self.index.add(content_id, title, description)
+        event.listen(Content, 'after_insert', self._on_change)
+        event.listen(Content, 'after_update', self._on_change)
+        event.listen(Content, 'after_delete', self._on_delete)
+
+    def _on_change(self, mapper, connection, target):
+        self.index.add(target.id, target.title, target.description)
+
+    def _on_delete(self, mapper, connection, target):
+        self.index.remove(target.id)
+
+    def search(self, session, query, limit, after=None):
+        return self.index.search(query, limit, after)
+
+class SQLiteSearchBackend:
+    """FTS5 table mirroring content.title/description, kept in sync by triggers"""
+    name = 'sqlite'
+
+    # content_id is stored rather than relying on content's implicit rowid, which VACUUM may renumber
+    SETUP_STATEMENTS = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(content_id UNINDEXED, title, description)",
+        "CREATE TRIGGER IF NOT EXISTS content_fts_ai AFTER INSERT ON content BEGIN "
+        "INSERT INTO content_fts(content_id, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS content_fts_ad AFTER DELETE ON content BEGIN "
+        "DELETE FROM content_fts WHERE content_id = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS content_fts_au AFTER UPDATE OF title, description ON content BEGIN "
+        "DELETE FROM content_fts WHERE content_id = old.id; "
+        "INSERT INTO content_fts(content_id, title, description) VALUES (new.id, new.title, new.description); END",
+    ]
+
+    SEARCH_SQL = f"""
+        SELECT id, score FROM (
+            SELECT content_id AS id, -bm25(content_fts, 0.0, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) AS score
+            FROM content_fts
+            WHERE content_fts MATCH :match
+        )
+        {{after}}
+        ORDER BY score DESC, id
+        LIMIT :limit
+    """
+
+    @classmethod
+    def create(cls, conn):
+        """FTS table and sync triggers, filled from content the first time (idempotent)"""
+        created = not conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'content_fts'"
+        )).first()
+        for statement in cls.SETUP_STATEMENTS:
+            conn.execute(text(statement))
+        if created:
+            conn.execute(text(
+                "INSERT INTO content_fts(content_id, title, description) SELECT id, title, description FROM content"
+            ))
+
+    def setup(self, app, db):
+        # Local databases: cheap enough to create on first use
+        with app.app_context():
+            with db.engine.begin() as conn:
+                self.create(conn)
+
+    def search(self, session, query, limit, after=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        params = {'match': ' '.join(f'"{token}"*' for token in tokens), 'limit': limit}
+        after_sql = ''
+        if after:
+            after_sql = 'WHERE score < :after_score OR (score = :after_score AND id > :after_id)'
+            params.update(after_score=after[0], after_id=after[1])
+        rows = session.execute(text(self.SEARCH_SQL.format(after=after_sql)), params)
+        return [(row.id, row.score) for row in rows]
+
+class PostgresSearchBackend:
+    """tsvector expression over title/description backed by a GIN index.
+
+    The index is built by migrate_indexes.py (CREATE INDEX CONCURRENTLY can take
+    minutes on a large table); setup() only checks that it is there.
+    """
+    name = 'postgres'
+    INDEX_NAME = 'ix_content_search'
+
+    # Must stay textually identical between the index and the query so the planner uses the index
+    VECTOR_SQL = (
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+    )
+
+    SEARCH_SQL = f"""
+        SELECT id, score FROM (
+            SELECT content.id AS id, ts_rank(({VECTOR_SQL}), q)::float8 AS score
+            FROM content, to_tsquery('simple', :tsquery) q
+            WHERE ({VECTOR_SQL}) @@ q
+        ) ranked
+        {{after}}
+        ORDER BY score DESC, id
+        LIMIT :limit
+    """
+
+    @classmethod
+    def index_ready(cls, conn):
+        exists = conn.execute(text("SELECT 1 FROM pg_class WHERE relname = :name AND relkind = 'i'"),
+                              {'name': cls.INDEX_NAME}).first()
+        return exists is not None and cls.INDEX_NAME not in invalid_postgres_indexes(conn)
+
+    @classmethod
+    def build_index(cls, engine):
+        """Build the GIN index without locking content for writes (migration only)"""
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+            if cls.INDEX_NAME in invalid_postgres_indexes(conn):
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{cls.INDEX_NAME}"'))
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {cls.INDEX_NAME} ON content USING GIN (({cls.VECTOR_SQL}))"
+            ))
+
+    def setup(self, app, db):
+        with app.app_context():
+            with db.engine.connect() as conn:
+                ready = self.index_ready(conn)
+        if not ready:
+            # Still correct without the index, only slower; never build it from a request
+            print(f"Search index {self.INDEX_NAME} is missing or invalid; run `python migrate_indexes.py`")
+
+    def search(self, session, query, limit, after=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        params = {'tsquery': ' & '.join(f'{token}:*' for token in tokens), 'limit': limit}
+        after_sql = ''
+        if after:
+            after_sql = 'WHERE score < :after_score OR (score = :after_score AND id > :after_id)'
+            params.update(after_score=after[0], after_id=after[1])
+        rows = session.execute(text(self.SEARCH_SQL.format(after=after_sql)), params)
+        return [(row.id, row.score) for row in rows]
+
+BACKENDS = {
+    'memory': MemorySearchBackend,
+    'sqlite': SQLiteSearchBackend,
+    'postgres': PostgresSearchBackend,
+}
+
+_init_lock = threading.Lock()
+
+def init_search(app):
+    """Create/verify the search index for the configured backend and register it on the app"""
+    name = app.config.get('SEARCH_BACKEND', SEARCH_BACKEND)
+    if name == 'auto':
+        with app.app_context():
+            dialect = db.engine.dialect.name
+        name = {'postgresql': 'postgres', 'sqlite': 'sqlite'}.get(dialect, 'memory')
+    backend = BACKENDS[name]()
+    try:
+        backend.setup(app, db)
+    except SQLAlchemyError as e:
+        print(f"Search backend '{name}' unavailable ({e}), falling back to in-process index")
+        backend = MemorySearchBackend()
+        backend.setup(app, db)
+    app.extensions['search'] = backend
+    return backend
+
+def build_search_index(engine, dry_run=False, log=print):
+    """Create the database full-text index for the engine's dialect (run from migrate_indexes.py)"""
+    name = {'postgresql': 'postgres', 'sqlite': 'sqlite'}.get(engine.dialect.name)
+    if name is None:
+        return None
+    log(f"{'Would build' if dry_run else 'Building'} the {name} search index")
+    if dry_run:
+        return name
+    if name == 'postgres':
+        PostgresSearchBackend.build_index(engine)
+    else:
+        with engine.begin() as conn:
+            SQLiteSearchBackend.create(conn)
+    return name
+
+def get_search_backend():
+    """Search backend for the current app, initialized on first use"""
+    app = current_app._get_current_object()
+    backend = app.extensions.get('search')
+    if backend is None:
+        with _init_lock:
+            backend = app.extensions.get('search') or init_search(app)
+    return backend
+
+def search_content_ids(query, limit, after=None):
+    """Ranked (content_id, score) pairs for `query`, continuing after an optional (score, id) key"""
+    return get_search_backend().search(db.session, query, limit, after)
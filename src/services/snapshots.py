@@ -0,0 +1,58 @@
+# burudani_backend/src/services/snapshots.py
+
+import hashlib
+import os
+from functools import wraps
+from flask import current_app, request
+from src.services.cache import LRUCache
+from src.services.catalog import catalog_version, CATALOG_CACHE_TTL
+
+SNAPSHOT_CACHE_SIZE = int(os.environ.get('SNAPSHOT_CACHE_SIZE', 1024))
+# Total size of the cached bodies per worker
+SNAPSHOT_CACHE_BYTES = int(os.environ.get('SNAPSHOT_CACHE_BYTES', 64 * 1024 * 1024))
+
+# Query args read by the catalog views, for catalog_snapshot(...)
+FIELD_ARGS = ('fields', 'view')
+PAGE_ARGS = ('cursor', 'pagination', 'per_page', 'include_total')
+
+# (catalog version, path, values of the args the view reads) -> (etag, serialized JSON body)
+snapshot_cache = LRUCache(maxsize=SNAPSHOT_CACHE_SIZE, ttl=CATALOG_CACHE_TTL,
+                          maxbytes=SNAPSHOT_CACHE_BYTES, sizeof=lambda snapshot: len(snapshot[1]))
+
+def _snapshot_key(arg_names):
+    # Only the args the view reads (first value, as request.args.get does), so
+    # cache-busting junk parameters all map to the same snapshot
+    return (catalog_version(), request.path, tuple(request.args.get(name) for name in arg_names))
+
+def _snapshot_response(etag, body):
+    response = current_app.response_class(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    # Responses are per-user authenticated but identical for everyone; clients must revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+def catalog_snapshot(*arg_names):
+    """Serve a catalog view from a pre-serialized snapshot with a strong ETag.
+
+    Snapshots are keyed by the catalog version and the query args named here
+    (every arg the view reads), so a matching If-None-Match is answered with
+    304 and a warm snapshot is returned without touching the database. The
+    ETag is a hash of the body, so it is stable across workers.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = _snapshot_key(arg_names)
+            snapshot = snapshot_cache.get(key)
+            if snapshot is not None:
+                return _snapshot_response(*snapshot)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.mimetype != 'application/json':
+                return response
+            body = response.get_data()
+            etag = hashlib.sha256(body).hexdigest()[:32]
+            snapshot_cache.set(key, (etag, body))
+            return _snapshot_response(etag, body)
+        return wrapper
+    return decorator
@@ -0,0 +1,283 @@
+# burudani_backend/src/services/stream_health.py
+#
+# Liveness of Stream URLs. A prober (the `worker` process, or in-process
+# with STREAM_PROBER_IN_PROCESS) fetches every stream's manifest with
+# asyncio, at most STREAM_PROBE_CONCURRENCY at a time, and records status,
+# latency and HLS variant/bandwidth metadata in stream_health. Web workers
+# mirror that table in memory (refreshed in the background), so choosing a
+# healthy stream on /stream/link is a dict lookup. A result older than
+# STREAM_HEALTH_TTL counts as unknown, and unknown streams are served.
+
+import asyncio
+import calendar
+import os
+import re
+import ssl
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urljoin, urlsplit
+from src.models.content import Stream
+from src.models.db import db
+from src.models.stream_health import StreamHealth
+
+STREAM_PROBE_INTERVAL = float(os.environ.get('STREAM_PROBE_INTERVAL', 60))
+STREAM_PROBE_CONCURRENCY = int(os.environ.get('STREAM_PROBE_CONCURRENCY', 50))
+STREAM_PROBE_TIMEOUT = float(os.environ.get('STREAM_PROBE_TIMEOUT', 5))
+STREAM_HEALTH_TTL = float(os.environ.get('STREAM_HEALTH_TTL', 180))
+# How often web workers reload stream_health written by the worker process
+STREAM_HEALTH_REFRESH_INTERVAL = float(os.environ.get('STREAM_HEALTH_REFRESH_INTERVAL', 15))
+
+MANIFEST_MAX_BYTES = 256 * 1024
+MAX_REDIRECTS = 3
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+BANDWIDTH_RE = re.compile(r'[:,]BANDWIDTH=(\d+)')
+
+def parse_manifest(text):
+    """(variants, max bandwidth) of an HLS playlist; a media playlist has no variants"""
+    variants = text.count('#EXT-X-STREAM-INF')
+    bandwidths = [int(value) for value in BANDWIDTH_RE.findall(text)]
+    return variants, max(bandwidths) if bandwidths else None
+
+async def read_body(reader, timeout, limit=MANIFEST_MAX_BYTES):
+    """Body up to EOF or `limit` bytes; a single read() returns after the first chunk"""
+    chunks = []
+    size = 0
+    while size < limit:
+        chunk = await asyncio.wait_for(reader.read(limit - size), timeout)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    return b''.join(chunks)
+
+async def fetch(url, timeout=STREAM_PROBE_TIMEOUT, redirects=MAX_REDIRECTS):
+    """(status, body) of a GET, following redirects; plain asyncio streams, HTTP/1.0"""
+    parts = urlsplit(url)
+    secure = parts.scheme == 'https'
+    port = parts.port or (443 if secure else 80)
+    path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, port, ssl=ssl.create_default_context() if secure else None),
+        timeout,
+    )
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.0\r\nHost: {parts.netloc}\r\nUser-Agent: BurudaniProber/1.0\r\n'
+            f'Accept: */*\r\nConnection: close\r\n\r\n'.encode('latin-1')
+        )
+        await writer.drain()
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        if status in REDIRECT_STATUSES and headers.get('location') and redirects > 0:
+            return await fetch(urljoin(url, headers['location']), timeout, redirects - 1)
+        return status, await read_body(reader, timeout)
+    finally:
+        writer.close()
+
+async def probe(url, timeout=STREAM_PROBE_TIMEOUT):
+    """Probe one manifest URL; returns the fields of a StreamHealth row"""
+    started = time.perf_counter()
+    result = {'healthy': False, 'status_code': None, 'variants': None, 'max_bandwidth': None, 'error': None}
+    try:
+        status, body = await asyncio.wait_for(fetch(url, timeout), timeout * 2)
+        result['status_code'] = status
+        text = body.decode('utf-8', errors='replace').lstrip('\ufeff \r\n')
+        if status != 200:
+            result['error'] = f'HTTP {status}'
+        elif text.startswith('#EXTM3U'):
+            result['healthy'] = True
+            result['variants'], result['max_bandwidth'] = parse_manifest(text)
+        elif urlsplit(url).path.endswith('.m3u8'):
+            result['error'] = 'Not an HLS playlist'
+        else:
+            result['healthy'] = True  # DASH/other manifests: reachable is all we check
+    except asyncio.TimeoutError:
+        result['error'] = 'Timed out'
+    except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+        result['error'] = f'{e.__class__.__name__}: {str(e)}'[:255]
+    result['latency_ms'] = int((time.perf_counter() - started) * 1000)
+    return result
+
+def _epoch(value):
+    return calendar.timegm(value.utctimetuple())
+
+class StreamHealthCache:
+    """In-memory copy of stream_health: stream_id -> (healthy, checked_at epoch, details)"""
+
+    def __init__(self, app, refresh_interval=STREAM_HEALTH_REFRESH_INTERVAL, ttl=STREAM_HEALTH_TTL, clock=time.time):
+        self.app = app
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.errors = 0
+
+    def update(self, results):
+        """Apply {stream_id: StreamHealth fields (with checked_at)} from a probe run"""
+        with self._lock:
+            for stream_id, result in results.items():
+                self._entries[stream_id] = (result['healthy'], _epoch(result['checked_at']), result)
+
+    def is_down(self, stream_id):
+        """True only if a fresh probe found the stream unhealthy"""
+        entry = self._entries.get(stream_id)
+        return entry is not None and not entry[0] and self._clock() - entry[1] < self.ttl
+
+    def get(self, stream_id):
+        entry = self._entries.get(stream_id)
+        return entry[2] if entry is not None and self._clock() - entry[1] < self.ttl else None
+
+    def refresh(self):
+        """Reload every row of stream_health (one query)"""
+        with self.app.app_context():
+            try:
+                rows = StreamHealth.query.all()
+                results = {row.stream_id: row.to_dict() for row in rows}
+            except Exception as e:
+                self.errors += 1
+                print(f"Stream health refresh failed: {str(e)}")
+                return 0
+            finally:
+                db.session.remove()
+        with self._lock:
+            self._entries = {}
+        self.update(results)
+        self.refreshes += 1
+        return len(results)
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stream-health-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        now = self._clock()
+        with self._lock:
+            fresh = [entry for entry in self._entries.values() if now - entry[1] < self.ttl]
+        return {
+            'known': len(fresh),
+            'down': sum(1 for entry in fresh if not entry[0]),
+            'refreshes': self.refreshes,
+            'refresh_errors': self.errors,
+        }
+
+class StreamProber:
+    """Probes every Stream's manifest concurrently and records the results"""
+
+    def __init__(self, app, cache=None, interval=STREAM_PROBE_INTERVAL, concurrency=STREAM_PROBE_CONCURRENCY,
+                 timeout=STREAM_PROBE_TIMEOUT):
+        self.app = app
+        self.cache = cache
+        self.interval = interval
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.probed = 0
+        self.down = 0
+        self.last_run_seconds = None
+
+    async def _probe_all(self, streams):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(url):
+            async with semaphore:
+                return await probe(url, self.timeout)
+
+        return await asyncio.gather(*(bounded(url) for _, url in streams))
+
+    def _record(self, streams, results):
+        now = datetime.utcnow()
+        by_id = {}
+        for (stream_id, _), result in zip(streams, results):
+            by_id[stream_id] = {'stream_id': stream_id, **result, 'checked_at': now}
+        existing = {row.stream_id: row for row in StreamHealth.query.filter(StreamHealth.stream_id.in_(list(by_id)))}
+        for stream_id, fields in by_id.items():
+            row = existing.get(stream_id)
+            if row is None:
+                db.session.add(StreamHealth(**fields))
+            else:
+                for name, value in fields.items():
+                    setattr(row, name, value)
+        db.session.commit()
+        return by_id
+
+    def run_once(self):
+        """Probe all streams once; returns a summary of the run"""
+        started = time.perf_counter()
+        with self.app.app_context():
+            try:
+                streams = db.session.query(Stream.id, Stream.stream_url).all()
+                db.session.commit()  # do not hold a transaction open while probing
+                results = asyncio.run(self._probe_all(streams)) if streams else []
+                by_id = self._record(streams, results)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Stream probe run failed: {str(e)}")
+                return None
+            finally:
+                db.session.remove()
+        if self.cache is not None:
+            self.cache.update(by_id)
+        down = sum(1 for result in results if not result['healthy'])
+        self.runs += 1
+        self.probed += len(results)
+        self.down = down
+        self.last_run_seconds = round(time.perf_counter() - started, 3)
+        return {'probed': len(results), 'down': down, 'seconds': self.last_run_seconds}
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name='stream-prober', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'concurrency': self.concurrency,
+            'runs': self.runs,
+            'probed': self.probed,
+            'down': self.down,
+            'last_run_seconds': self.last_run_seconds,
+        }
+
+def init_stream_health(app):
+    """Load stream health into memory; probe in-process or follow the worker's results"""
+    cache = StreamHealthCache(app, app.config.get('STREAM_HEALTH_REFRESH_INTERVAL', STREAM_HEALTH_REFRESH_INTERVAL))
+    cache.refresh()
+    app.extensions['stream_health'] = cache
+    if app.config.get('STREAM_PROBER_IN_PROCESS'):
+        prober = StreamProber(app, cache)
+        prober.start()
+        app.extensions['stream_prober'] = prober
+    elif cache.refresh_interval > 0:
+        cache.start()
+    return cache
@@ -0,0 +1,209 @@
+# burudani_backend/src/services/stream_index.py
+#
+# Per-worker resolution index for playback starts: channel_id -> content_id
+# and content_id -> its streams, each with a pre-rendered /stream/link body.
+# Entries are filled on first use (one query) and then served without
+# touching the database. Commits in this worker evict exactly the contents
+# and channels they changed; a catalog version bumped by another worker
+# clears the index, which then refills lazily. Entries are always loaded from
+# the primary: right after a local commit evicts an entry, a lagging replica
+# would hand back the pre-edit row and it would be served until STREAM_INDEX_TTL.
+
+import os
+import threading
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from src.models.content import Content, Category, Stream
+from src.models.db import db
+from src.services.cache import LRUCache
+from src.services.catalog import catalog_version, content_query, get_content
+from src.services.replicas import use_primary
+
+STREAM_INDEX_SIZE = int(os.environ.get('STREAM_INDEX_SIZE', 20000))
+# Safety net for changes this worker could not attribute (e.g. raw SQL)
+STREAM_INDEX_TTL = int(os.environ.get('STREAM_INDEX_TTL', 600))
+
+class StreamEntry:
+    """What a playback start needs to know about one content item"""
+
+    def __init__(self, content, streams):
+        self.content_id = content.id
+        self.is_premium = bool(content.is_premium)
+        summary = content.to_dict()
+        # (stream_id, /stream/link response body) per stream, rendered once, primary first
+        self.links = [(stream.id, {
+            'streamURLAndroid': stream.stream_url,
+            'stream_type': stream.stream_type,
+            'channel_id': stream.channel_id or content.id,
+            'content': summary
+        }) for stream in streams]
+
+    @property
+    def link(self):
+        """The primary stream's link, or None if the content has no stream"""
+        return self.links[0][1] if self.links else None
+
+    def healthy_link(self, is_down):
+        """The first link whose stream is not known to be down, or None if all are"""
+        for stream_id, link in self.links:
+            if not is_down(stream_id):
+                return link
+        return None
+
+class StreamIndex:
+    def __init__(self, maxsize=STREAM_INDEX_SIZE, ttl=STREAM_INDEX_TTL):
+        self.contents = LRUCache(maxsize=maxsize, ttl=ttl)  # content_id -> StreamEntry (None: unknown)
+        self.channels = LRUCache(maxsize=maxsize, ttl=ttl)  # channel_id -> content_id (None: unknown)
+        self._version = None
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+        self.resets = 0
+
+    def _check_version(self):
+        version = catalog_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    if self._version is not None:
+                        self.resets += 1
+                    self.contents.clear()
+                    self.channels.clear()
+                    self._version = version
+
+    def _load_content(self, content_id):
+        with use_primary():
+            content = get_content(content_id)
+        with self._lock:
+            self.loads += 1
+        if content is None:
+            return None
+        return StreamEntry(content, content.streams)
+
+    def _load_channel(self, channel_id):
+        with self._lock:
+            self.loads += 1
+        with use_primary():
+            row = db.session.query(Stream.content_id).filter_by(channel_id=channel_id).first()
+        return row[0] if row else None
+
+    def by_content(self, content_id):
+        """StreamEntry for the content, or None if it does not exist"""
+        self._check_version()
+        return self.contents.get_or_set(content_id, lambda: self._load_content(content_id))
+
+    def content_for_channel(self, channel_id):
+        """content_id of the stream with this channel_id, or None"""
+        self._check_version()
+        return self.channels.get_or_set(channel_id, lambda: self._load_channel(channel_id))
+
+    def resolve_many(self, content_ids=(), channel_ids=()):
+        """({channel_id: content_id}, {content_id: StreamEntry}) for many ids.
+
+        Index misses are loaded together: one IN query on streams for unknown
+        channels, then one IN query per table (contents, categories, streams)
+        for unknown contents. Ids that do not exist map to None.
+        """
+        self._check_version()
+        missing = object()
+        channels = {channel_id: self.channels.get(channel_id, missing) for channel_id in channel_ids}
+        unknown_channels = [channel_id for channel_id, content_id in channels.items() if content_id is missing]
+        if unknown_channels:
+            found = {}
+            with use_primary():
+                for channel_id, content_id in db.session.query(Stream.channel_id, Stream.content_id).filter(
+                    Stream.channel_id.in_(unknown_channels)
+                ):
+                    found.setdefault(channel_id, content_id)
+            with self._lock:
+                self.loads += 1
+            for channel_id in unknown_channels:
+                channels[channel_id] = found.get(channel_id)
+                self.channels.set(channel_id, channels[channel_id])
+
+        wanted = set(content_ids) | {content_id for content_id in channels.values() if content_id}
+        entries = {content_id: self.contents.get(content_id, missing) for content_id in wanted}
+        unknown_contents = [content_id for content_id, entry in entries.items() if entry is missing]
+        if unknown_contents:
+            with use_primary():
+                loaded = {
+                    content.id: StreamEntry(content, content.streams)
+                    for content in content_query('selectin').filter(Content.id.in_(unknown_contents))
+                }
+            with self._lock:
+                self.loads += 1
+            for content_id in unknown_contents:
+                entries[content_id] = loaded.get(content_id)
+                self.contents.set(content_id, entries[content_id])
+        return channels, entries
+
+    def evict(self, content_ids=(), channel_ids=(), everything=False):
+        with self._lock:
+            if everything:
+                self.contents.clear()
+                self.channels.clear()
+            for content_id in content_ids:
+                self.contents.delete(content_id)
+            for channel_id in channel_ids:
+                self.channels.delete(channel_id)
+            self.evictions += 1
+
+    def adopt_version(self, seen_version):
+        """Accept the catalog version bumped by this worker's own commit.
+
+        Only if the index was current when the commit flushed; otherwise another
+        worker changed the catalog too and the next lookup must reset.
+        """
+        with self._lock:
+            if self._version == seen_version:
+                self._version = catalog_version()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'contents': len(self.contents),
+                'channels': len(self.channels),
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'resets': self.resets,
+                'content_hit_ratio': self.contents.stats()['hit_ratio'],
+            }
+
+stream_index = StreamIndex()
+
+def _collect_stream_changes(session, flush_context):
+    changes = session.info.get('stream_index_changes')
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, (Content, Stream, Category)):
+            continue
+        if changes is None:
+            changes = session.info['stream_index_changes'] = {
+                'contents': set(), 'channels': set(), 'all': False, 'version': catalog_version(),
+            }
+        if isinstance(obj, Content):
+            changes['contents'].add(obj.id)
+        elif isinstance(obj, Stream):
+            changes['contents'].add(obj.content_id)
+            changes['contents'].update(inspect(obj).attrs.content_id.history.deleted)
+            history = inspect(obj).attrs.channel_id.history
+            changes['channels'].update(c for c in (obj.channel_id, *history.deleted) if c)
+        else:
+            # Category names are rendered into every member's summary
+            changes['all'] = True
+
+def _apply_stream_changes(session):
+    # Registered after the catalog listeners, so the version this adopts includes our own bump
+    changes = session.info.pop('stream_index_changes', None)
+    if changes:
+        stream_index.evict(changes['contents'], changes['channels'], everything=changes['all'])
+        stream_index.adopt_version(changes['version'])
+
+def _discard_stream_changes(session):
+    session.info.pop('stream_index_changes', None)
+
+def register_stream_index_invalidation():
+    """Evict index entries for Content/Stream/Category rows changed by this worker's commits"""
+    if not event.contains(Session, 'after_flush', _collect_stream_changes):
+        event.listen(Session, 'after_flush', _collect_stream_changes)
+        event.listen(Session, 'after_commit', _apply_stream_changes)
+        event.listen(Session, 'after_rollback', _discard_stream_changes)
@@ -0,0 +1,221 @@
+# burudani_backend/src/services/watch_progress.py
+
+import atexit
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.content import Content, UserWatchHistory, db
+
+# Seconds between write-behind flushes; 0 writes every progress update immediately
+FLUSH_INTERVAL = float(os.environ.get('WATCH_PROGRESS_FLUSH_INTERVAL', 0))
+# Pending (user, content) entries that force an early flush
+MAX_PENDING = int(os.environ.get('WATCH_PROGRESS_MAX_PENDING', 10000))
+
+UPSERT_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+# ON CONFLICT target; db.create_all() does not add it to an existing table (migrate_indexes.py does)
+CONFLICT_INDEX = 'uq_user_watch_history_user_content'
+# Seconds between checks for the conflict index while it is missing
+CONFLICT_INDEX_RECHECK = 60
+
+_conflict_index = {'ready': False, 'checked_at': None}
+_conflict_index_lock = threading.Lock()
+
+def conflict_index_ready():
+    """True once the (user_id, content_id) unique index exists; until then writes use the merge path"""
+    if _conflict_index['ready']:
+        return True
+    with _conflict_index_lock:
+        checked_at = _conflict_index['checked_at']
+        if checked_at is None or time.monotonic() - checked_at >= CONFLICT_INDEX_RECHECK:
+            indexes = inspect(db.engine).get_indexes(UserWatchHistory.__tablename__)
+            _conflict_index['ready'] = any(index['name'] == CONFLICT_INDEX for index in indexes)
+            _conflict_index['checked_at'] = time.monotonic()
+            if not _conflict_index['ready']:
+                print(f"{CONFLICT_INDEX} is missing; run `python migrate_indexes.py` (watch progress uses row-by-row writes)")
+    return _conflict_index['ready']
+
+def parse_watched_duration(value):
+    """Seconds watched as a non-negative int (whole numbers and digit strings accepted); raises ValueError"""
+    if isinstance(value, bool):
+        raise ValueError('watched_duration must be a non-negative integer')
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, str) and value.strip().isdigit():
+        value = int(value.strip())
+    if not isinstance(value, int) or value < 0:
+        raise ValueError('watched_duration must be a non-negative integer')
+    return value
+
+def existing_content_ids(content_ids):
+    """Subset of content_ids that exist, in one IN query"""
+    if not content_ids:
+        return set()
+    return {row[0] for row in db.session.query(Content.id).filter(Content.id.in_(set(content_ids)))}
+
+def upsert_progress(entries):
+    """Write (user_id, content_id, watched_duration, watched_at) entries in a single statement.
+
+    Uses INSERT ... ON CONFLICT (user_id, content_id) DO UPDATE on Postgres and
+    SQLite once the unique index exists; the caller commits. Entries must
+    reference existing content.
+    """
+    if not entries:
+        return
+    insert = UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if insert is None or not conflict_index_ready():
+        return _merge_progress(entries)
+    now = datetime.utcnow()
+    stmt = insert(UserWatchHistory.__table__).values([{
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'content_id': content_id,
+        'watched_duration': watched_duration,
+        'last_watched_at': watched_at,
+        'created_at': now,
+        'updated_at': now,
+    } for user_id, content_id, watched_duration, watched_at in entries])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'content_id'],
+        set_={
+            'watched_duration': stmt.excluded.watched_duration,
+            'last_watched_at': stmt.excluded.last_watched_at,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+    db.session.execute(stmt)
+
+def _merge_progress(entries):
+    """Row-by-row fallback for databases without ON CONFLICT support or the unique index"""
+    for user_id, content_id, watched_duration, watched_at in entries:
+        history = UserWatchHistory.query.filter_by(user_id=user_id, content_id=content_id).first()
+        if history:
+            history.watched_duration = watched_duration
+            history.last_watched_at = watched_at
+        else:
+            db.session.add(UserWatchHistory(
+                user_id=user_id, content_id=content_id,
+                watched_duration=watched_duration, last_watched_at=watched_at
+            ))
+
+class WatchProgressBuffer:
+    """Write-behind buffer that coalesces playback heartbeats per (user, content).
+
+    Only the latest position per pair is kept, and everything pending is
+    written with one upsert per flush, so database writes scale with the
+    flush interval rather than with the number of concurrent viewers.
+    """
+
+    def __init__(self, app, interval, max_pending=MAX_PENDING):
+        self.app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}  # (user_id, content_id) -> (watched_duration, watched_at)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+
+    def add(self, user_id, content_id, watched_duration, watched_at=None):
+        with self._lock:
+            self._pending[(user_id, content_id)] = (watched_duration, watched_at or datetime.utcnow())
+            self.received += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write everything pending; returns the number of rows upserted"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            with self.app.app_context():
+                try:
+                    written = self._write(pending)
+                except OperationalError as e:
+                    # Database unreachable: keep everything for the next flush
+                    db.session.rollback()
+                    print(f"Watch progress flush failed, {len(pending)} entries re-queued: {str(e)}")
+                    self._requeue(pending)
+                    return 0
+                except Exception as e:
+                    # Some entry is bad: retry one row at a time so it cannot block everyone else's
+                    db.session.rollback()
+                    print(f"Watch progress flush failed, retrying {len(pending)} entries one by one: {str(e)}")
+                    written = self._write_rows(pending)
+            self.written += written
+            return written
+
+    def _write(self, pending):
+        known = existing_content_ids([content_id for _, content_id in pending])
+        entries = [
+            (user_id, content_id, watched_duration, watched_at)
+            for (user_id, content_id), (watched_duration, watched_at) in pending.items()
+            if content_id in known
+        ]
+        upsert_progress(entries)
+        db.session.commit()
+        return len(entries)
+
+    def _write_rows(self, pending):
+        written = 0
+        items = list(pending.items())
+        for position, (key, value) in enumerate(items):
+            try:
+                written += self._write({key: value})
+            except OperationalError as e:
+                db.session.rollback()
+                print(f"Watch progress flush failed, {len(items) - position} entries re-queued: {str(e)}")
+                self._requeue(dict(items[position:]))
+                break
+            except Exception as e:
+                db.session.rollback()
+                self.dropped += 1
+                print(f"Watch progress entry {key} dropped: {str(e)}")
+        return written
+
+    def _requeue(self, pending):
+        with self._lock:
+            for key, value in pending.items():
+                self._pending.setdefault(key, value)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='watch-progress-flush', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval': self.interval,
+                'pending': len(self._pending),
+                'received': self.received,
+                'written': self.written,
+                'dropped': self.dropped,
+            }
+
+def init_watch_progress(app):
+    """Start the write-behind buffer when WATCH_PROGRESS_FLUSH_INTERVAL > 0"""
+    interval = app.config.get('WATCH_PROGRESS_FLUSH_INTERVAL', FLUSH_INTERVAL)
+    if interval and interval > 0:
+        buffer = WatchProgressBuffer(app, interval)
+        buffer.start()
+        app.extensions['watch_progress'] = buffer
+    return app.extensions.get('watch_progress')
@@ -0,0 +1,166 @@
+# burudani_backend/src/services/webhooks.py
+#
+# Zeno webhook ingestion in two halves. The request path only validates and
+# records the event under an idempotency key (one INSERT ... ON CONFLICT DO
+# NOTHING), so retried or duplicated webhooks cost a single no-op insert.
+# A consumer thread applies recorded events to payments in batches, through
+# the payment state machine, and notifies waiting clients.
+
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from src.models.db import db
+from src.models.payment import Payment, PaymentWebhookEvent, can_transition
+from src.services.notifier import notify_payment
+
+# Seconds between consumer runs when nothing wakes it; 0 applies events inline in the request
+WEBHOOK_CONSUMER_INTERVAL = float(os.environ.get('WEBHOOK_CONSUMER_INTERVAL', 1))
+WEBHOOK_BATCH_SIZE = int(os.environ.get('WEBHOOK_BATCH_SIZE', 500))
+
+INSERT_IGNORE_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+class WebhookQueue:
+    """Durable webhook queue on the payment_webhook_events table"""
+
+    def __init__(self, app, interval=WEBHOOK_CONSUMER_INTERVAL, batch_size=WEBHOOK_BATCH_SIZE):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.received = 0
+        self.duplicates = 0
+        self.outcomes = Counter()
+
+    def record(self, data, key):
+        """Store a webhook event; returns False if the key was already recorded"""
+        values = {
+            'idempotency_key': key,
+            'order_id': data['order_id'],
+            'payment_status': data['payment_status'],
+            'reference': data.get('reference'),
+            'payload': json.dumps(data, default=str),
+            'received_at': datetime.utcnow(),
+        }
+        insert = INSERT_IGNORE_DIALECTS.get(db.session.get_bind().dialect.name)
+        if insert is not None:
+            stmt = insert(PaymentWebhookEvent.__table__).values(**values).on_conflict_do_nothing(
+                index_elements=['idempotency_key']
+            )
+            created = db.session.execute(stmt).rowcount == 1
+            db.session.commit()
+        else:
+            try:
+                db.session.add(PaymentWebhookEvent(**values))
+                db.session.commit()
+                created = True
+            except IntegrityError:
+                db.session.rollback()
+                created = False
+
+        with self._lock:
+            self.received += 1
+            if not created:
+                self.duplicates += 1
+        if created:
+            if self.interval > 0:
+                self._wake.set()
+            else:
+                self.process_batch()
+        return created
+
+    def _apply(self, event, payment):
+        if payment is None:
+            return 'unknown_order'
+        if event.payment_status == payment.payment_status:
+            return 'noop'
+        if not can_transition(payment.payment_status, event.payment_status):
+            return 'rejected'
+        payment.payment_status = event.payment_status
+        payment.reference = event.reference or payment.reference
+        payment.updated_at = datetime.utcnow()
+        return 'applied'
+
+    def process_batch(self):
+        """Apply up to batch_size pending events in order, in one transaction; returns events handled"""
+        with self.app.app_context():
+            try:
+                # SKIP LOCKED lets several consumers (one per web worker) share the queue on Postgres
+                events = PaymentWebhookEvent.query.filter(
+                    PaymentWebhookEvent.processed_at.is_(None)
+                ).order_by(PaymentWebhookEvent.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+                if not events:
+                    return 0
+                order_ids = {event.order_id for event in events}
+                payments = {p.order_id: p for p in Payment.query.filter(Payment.order_id.in_(order_ids))}
+                changed = {}
+                outcomes = Counter()
+                now = datetime.utcnow()
+                for event in events:
+                    payment = payments.get(event.order_id)
+                    outcome = self._apply(event, payment)
+                    if outcome == 'applied':
+                        changed[payment.order_id] = payment
+                    event.outcome = outcome
+                    event.processed_at = now
+                    outcomes[outcome] += 1
+                db.session.commit()
+                for payment in changed.values():
+                    notify_payment(payment)
+                with self._lock:
+                    self.outcomes.update(outcomes)
+                return len(events)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Webhook batch failed: {str(e)}")
+                return 0
+            finally:
+                db.session.remove()
+
+    def drain(self):
+        """Process batches until the queue is empty"""
+        total = 0
+        while True:
+            handled = self.process_batch()
+            total += handled
+            if handled < self.batch_size:
+                return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.drain()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='webhook-consumer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'received': self.received,
+                'duplicates': self.duplicates,
+                'outcomes': dict(self.outcomes),
+            }
+
+def init_webhooks(app):
+    """Create the webhook queue; starts the consumer thread unless WEBHOOK_CONSUMER_INTERVAL is 0"""
+    queue = WebhookQueue(app, app.config.get('WEBHOOK_CONSUMER_INTERVAL', WEBHOOK_CONSUMER_INTERVAL))
+    if queue.interval > 0:
+        queue.start()
+    app.extensions['payment_webhooks'] = queue
+    return queue
@@ -0,0 +1,182 @@
+# burudani_backend/src/services/zeno_client.py
+
+import json
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+# Zeno API Configuration - Use environment variable for production
+ZENO_API_KEY = os.environ.get('ZENO_API_KEY', 'ELyri3n4iLR6nqwixrwkjefTBFuxHSWlbho-esVC4fHYrQeZ4fKlOXa91MVrPfjI3nAYvmZO842Nle37tsK3lw')
+ZENO_BASE_URL = os.environ.get('ZENO_BASE_URL', 'https://zenoapi.com').rstrip('/')
+ZENO_API_URL = f"{ZENO_BASE_URL}/api/payments/mobile_money_tanzania"
+ZENO_ORDER_STATUS_URL = f"{ZENO_BASE_URL}/api/payments/order-status"
+
+ZENO_CONNECT_TIMEOUT = float(os.environ.get('ZENO_CONNECT_TIMEOUT', 3))
+ZENO_READ_TIMEOUT = float(os.environ.get('ZENO_READ_TIMEOUT', 10))
+ZENO_MAX_RETRIES = int(os.environ.get('ZENO_MAX_RETRIES', 2))
+ZENO_BACKOFF = float(os.environ.get('ZENO_BACKOFF', 0.25))
+ZENO_POOL_SIZE = int(os.environ.get('ZENO_POOL_SIZE', 10))
+ZENO_BREAKER_THRESHOLD = int(os.environ.get('ZENO_BREAKER_THRESHOLD', 5))
+ZENO_BREAKER_RESET = float(os.environ.get('ZENO_BREAKER_RESET', 30))
+
+class GatewayError(Exception):
+    """The payment gateway could not be reached or kept failing"""
+
+class CircuitOpenError(GatewayError):
+    """Calls are short-circuited because the gateway has been failing"""
+
+class GatewayResponse:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    @property
+    def ok(self):
+        return self.status_code == 200
+
+    def json(self):
+        return json.loads(self.text)
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and lets a single
+    trial call through once `reset_timeout` seconds have passed."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=ZENO_BREAKER_THRESHOLD, reset_timeout=ZENO_BREAKER_RESET, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+def _never_sent(error):
+    """True if the request failed before a connection to the gateway was established"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    return isinstance(reason, MaxRetryError) and isinstance(reason.reason, NewConnectionError)
+
+class ZenoClient:
+    """ZenoPay API client with a keep-alive connection pool, tight timeouts,
+    jittered exponential backoff and a circuit breaker."""
+
+    def __init__(self, api_key=ZENO_API_KEY, initiate_url=ZENO_API_URL, status_url=ZENO_ORDER_STATUS_URL,
+                 connect_timeout=ZENO_CONNECT_TIMEOUT, read_timeout=ZENO_READ_TIMEOUT,
+                 max_retries=ZENO_MAX_RETRIES, backoff=ZENO_BACKOFF, pool_size=ZENO_POOL_SIZE, breaker=None):
+        self.api_key = api_key
+        self.initiate_url = initiate_url
+        self.status_url = status_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'x-api-key': api_key})
+
+    def _sleep_before_retry(self, attempt):
+        # Full jitter: spread retries from many workers over the backoff window
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def _request(self, method, url, idempotent, **kwargs):
+        if not self.breaker.allow():
+            raise CircuitOpenError('Payment gateway circuit is open')
+        # Every exit must record an outcome, or a half-open trial stays in flight forever
+        recorded = False
+        try:
+            last_error = None
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self._sleep_before_retry(attempt - 1)
+                try:
+                    response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    # After a read timeout or a dropped connection Zeno may already have acted on
+                    # the request, so only idempotent calls are resent; others only if never sent
+                    last_error = e
+                    if idempotent or _never_sent(e):
+                        continue
+                    break
+                except requests.RequestException as e:
+                    # Broken body, bad encoding, redirect loop: not worth retrying
+                    last_error = e
+                    break
+                if response.status_code >= 500 and idempotent and attempt < self.max_retries:
+                    last_error = GatewayError(f'Zeno returned {response.status_code}')
+                    continue
+                recorded = True
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                return GatewayResponse(response.status_code, response.text)
+            recorded = True
+            self.breaker.record_failure()
+            raise GatewayError(f'Payment gateway unavailable: {last_error}')
+        finally:
+            if not recorded:
+                self.breaker.record_failure()
+
+    def initiate(self, payment_data):
+        """POST a USSD push request; only retried when the connection was never established"""
+        return self._request('POST', self.initiate_url, idempotent=False, json=payment_data)
+
+    def order_status(self, order_id):
+        """GET the order status for a single order"""
+        return self._request('GET', self.status_url, idempotent=True, params={'order_id': order_id})
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_zeno_client():
+    """Process-wide client so every request reuses the same connection pool"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = ZenoClient()
+    return _default_client
@@ -0,0 +1,36 @@
+# burudani_backend/worker.py
+#
+# Background worker: polls Zeno for PENDING/INITIATED payments so that
+# /payments/status/<order_id> can answer from the database, and probes
+# every stream's manifest so /stream/link can skip dead streams.
+#
+#   python worker.py            # run until interrupted
+#   python worker.py --once     # reconcile a single batch, probe once and exit
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import app
+from src.services.reconciler import PaymentReconciler
+from src.services.stream_health import StreamProber
+
+def main():
+    reconciler = PaymentReconciler(app)
+    prober = StreamProber(app)
+    if '--once' in sys.argv:
+        print(reconciler.run_once())
+        print(prober.run_once())
+        return
+    print(f"Payment reconciler running every {reconciler.interval}s")
+    print(f"Stream prober running every {prober.interval}s, {prober.concurrency} at a time")
+    prober.start()
+    try:
+        reconciler.run_forever()
+    except KeyboardInterrupt:
+        reconciler.stop()
+        prober.stop()
+
+if __name__ == '__main__':
+    main()